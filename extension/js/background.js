@@ -54,13 +54,18 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
 async function sendAudioToServer(audioData) {
   try {
     console.log('Sending audio data to server...');
-    
-    const response = await fetch(`${API_BASE_URL}/identify`, {
+
+    // Upload the raw bytes instead of base64-in-JSON to keep the request small
+    const audioBytes = base64ToBytes(audioData);
+    const clientId = await getClientId();
+
+    const response = await fetch(`${API_BASE_URL}/identify/raw`, {
       method: 'POST',
       headers: {
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/octet-stream',
+        'X-Lyrika-Client': clientId
       },
-      body: JSON.stringify({ audio_data: audioData })
+      body: audioBytes
     });
 
     if (!response.ok) {
@@ -76,6 +81,35 @@ async function sendAudioToServer(audioData) {
   }
 }
 
+/**
+ * Build an identifier for this browser tab so the server can reuse the
+ * previous result while the same song is still playing
+ */
+async function getClientId() {
+  const stored = await chrome.storage.local.get(['lyrikaInstallId']);
+  let installId = stored.lyrikaInstallId;
+  if (!installId) {
+    installId = crypto.randomUUID();
+    await chrome.storage.local.set({ lyrikaInstallId: installId });
+  }
+
+  const tabs = await chrome.tabs.query({ active: true, currentWindow: true });
+  const tabId = tabs && tabs[0] ? tabs[0].id : 'unknown';
+  return `${installId}:${tabId}`;
+}
+
+/**
+ * Decode a base64 string into a byte array
+ */
+function base64ToBytes(base64) {
+  const binary = atob(base64);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+}
+
 /**
  * Search for lyrics using song title and artist
  */
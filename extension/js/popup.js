@@ -46,6 +46,16 @@ let originalLyrics = '';
 // API base URL
 const API_BASE_URL = 'http://localhost:5001/api';
 
+// Polling for better formatted lyrics while the server upgrades them
+const LYRICS_REVALIDATE_INTERVAL = 1500;
+const LYRICS_REVALIDATE_ATTEMPTS = 20;
+let lyricsRevalidateTimer = null;
+
+// Translation being streamed, aborted when another language is picked
+let translationController = null;
+// Meaning explanation being streamed, aborted when the song changes
+let meaningController = null;
+
 // Event listeners
 document.addEventListener('DOMContentLoaded', () => {
   // Add event listeners to buttons
@@ -73,6 +83,7 @@ document.addEventListener('DOMContentLoaded', () => {
   translateOptions.forEach(option => {
     option.addEventListener('click', handleTranslateOption);
   });
+  document.getElementById('explain-meaning').addEventListener('click', handleExplainMeaning);
 
   // Load saved state if available
   restoreState();
@@ -254,6 +265,8 @@ function displayResults(data) {
 
     // Reset enhancement UI
     resetEnhancementUI();
+
+    watchLyricsUpgrade(data, showUpgradedLyrics);
   } else {
     lyricsElem.textContent = 'This appears to be an instrumental track.';
   }
@@ -316,6 +329,66 @@ function displayResults(data) {
   });
 }
 
+/**
+ * Poll the server until better formatted lyrics replace the ones shown.
+ * Only one song is watched at a time.
+ */
+function watchLyricsUpgrade(data, onUpgrade) {
+  clearTimeout(lyricsRevalidateTimer);
+  if (!data.upgrade_pending || !data.version) {
+    return;
+  }
+
+  let attempts = 0;
+  const check = async () => {
+    attempts++;
+    try {
+      const url = new URL(`${API_BASE_URL}/lyrics/revalidate`);
+      url.searchParams.append('title', data.title);
+      url.searchParams.append('artist', data.artist || '');
+      url.searchParams.append('version', data.version);
+
+      const response = await fetch(url.toString());
+      const result = await response.json();
+      if (result.changed) {
+        onUpgrade(result);
+        return;
+      }
+      if (!result.upgrade_pending) {
+        return;
+      }
+    } catch (error) {
+      console.error('Error checking for upgraded lyrics:', error);
+    }
+
+    if (attempts < LYRICS_REVALIDATE_ATTEMPTS) {
+      lyricsRevalidateTimer = setTimeout(check, LYRICS_REVALIDATE_INTERVAL);
+    }
+  };
+  lyricsRevalidateTimer = setTimeout(check, LYRICS_REVALIDATE_INTERVAL);
+}
+
+/**
+ * Replace the displayed lyrics with an upgraded version
+ */
+async function showUpgradedLyrics(upgraded) {
+  // Leave a translation the user is reading in place
+  if (lyricsElem.textContent === originalLyrics) {
+    lyricsElem.textContent = upgraded.lyrics;
+  }
+  originalLyrics = upgraded.lyrics;
+  if (currentSongData) {
+    currentSongData.lyrics = upgraded.lyrics;
+    currentSongData.version = upgraded.version;
+  }
+
+  const storedState = await getStoredState();
+  if (storedState && storedState.songData) {
+    storedState.songData.lyrics = upgraded.lyrics;
+    saveState(storedState);
+  }
+}
+
 /**
  * Save current state to Chrome storage
  */
@@ -541,6 +614,16 @@ function resetEnhancementUI() {
 
   // Add event listeners to new buttons
   document.getElementById('get-recommendations').addEventListener('click', handleGetRecommendations);
+
+  // Reset meaning tab
+  if (meaningController) {
+    meaningController.abort();
+  }
+  document.getElementById('meaning-placeholder').classList.remove('hidden');
+  document.getElementById('meaning-loading').classList.add('hidden');
+  const meaningTextElem = document.getElementById('meaning-text');
+  meaningTextElem.innerHTML = '';
+  meaningTextElem.classList.add('hidden');
 }
 
 /**
@@ -563,9 +646,16 @@ async function handleTranslateOption(event) {
   });
   langOption.classList.add('active');
 
+  // Stop streaming a translation to another language
+  if (translationController) {
+    translationController.abort();
+  }
+
   // If original, just restore original lyrics
   if (targetLang === 'original') {
     lyricsElem.textContent = originalLyrics;
+    lyricsElem.classList.remove('hidden');
+    lyricsLoadingElem.classList.add('hidden');
     return;
   }
 
@@ -573,9 +663,16 @@ async function handleTranslateOption(event) {
   lyricsElem.classList.add('hidden');
   lyricsLoadingElem.classList.remove('hidden');
 
+  const controller = new AbortController();
+  translationController = controller;
+  const showLyrics = () => {
+    lyricsElem.classList.remove('hidden');
+    lyricsLoadingElem.classList.add('hidden');
+  };
+
   try {
-    // Call the translation API
-    const response = await fetch(`${API_BASE_URL}/translate_lyrics`, {
+    // Stream the translation, showing lines as they arrive
+    const response = await fetch(`${API_BASE_URL}/translate_lyrics/stream`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json'
@@ -583,23 +680,64 @@ async function handleTranslateOption(event) {
       body: JSON.stringify({
         lyrics: originalLyrics,
         target_lang: targetLang
-      })
+      }),
+      signal: controller.signal
     });
 
-    const data = await response.json();
-
-    if (data.status === 'success') {
-      lyricsElem.textContent = data.translated_lyrics;
-    } else {
-      lyricsElem.textContent = `Translation failed: ${data.message || 'Unknown error'}`;
+    if (!response.ok) {
+      const data = await response.json();
+      throw new Error(data.message || `Server error: ${response.status}`);
     }
+
+    const translatedLines = [];
+    await readNdjson(response, event => {
+      if (event.type === 'line') {
+        translatedLines.push(event.text);
+        lyricsElem.textContent = translatedLines.join('\n');
+        showLyrics();
+      } else if (event.type === 'done') {
+        lyricsElem.textContent = event.result.translated_lyrics;
+      } else if (event.type === 'error') {
+        lyricsElem.textContent = `Translation failed: ${event.message || 'Unknown error'}`;
+      }
+    });
   } catch (error) {
+    if (error.name === 'AbortError') {
+      return;
+    }
     console.error('Translation error:', error);
     lyricsElem.textContent = `Translation error: ${error.message}`;
   } finally {
-    // Hide loading state
-    lyricsElem.classList.remove('hidden');
-    lyricsLoadingElem.classList.add('hidden');
+    if (translationController === controller) {
+      translationController = null;
+      showLyrics();
+    }
+  }
+}
+
+/**
+ * Read a newline-delimited JSON response, calling onEvent for each object
+ * as soon as its line has arrived
+ */
+async function readNdjson(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+
+    if (done) {
+      break;
+    }
+  }
+  if (buffer.trim()) {
+    onEvent(JSON.parse(buffer));
   }
 }
 
@@ -669,6 +807,83 @@ async function handleGetRecommendations() {
   }
 }
 
+/**
+ * Handle explain meaning button click, showing the explanation as it streams in
+ */
+async function handleExplainMeaning() {
+  if (!currentSongData) return;
+
+  // Get elements
+  const placeholderElem = document.getElementById('meaning-placeholder');
+  const meaningTextElem = document.getElementById('meaning-text');
+  const meaningLoadingElem = document.getElementById('meaning-loading');
+
+  // Show loading state
+  placeholderElem.classList.add('hidden');
+  meaningTextElem.innerHTML = '';
+  meaningLoadingElem.classList.remove('hidden');
+
+  const controller = new AbortController();
+  meaningController = controller;
+  const showMeaning = html => {
+    meaningTextElem.innerHTML = html;
+    meaningTextElem.classList.remove('hidden');
+    meaningLoadingElem.classList.add('hidden');
+  };
+
+  try {
+    const response = await fetch(`${API_BASE_URL}/explain_meaning/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify({
+        title: currentSongData.title,
+        artist: currentSongData.artist,
+        lyrics: originalLyrics
+      }),
+      signal: controller.signal
+    });
+
+    if (!response.ok) {
+      const data = await response.json();
+      throw new Error(data.message || `Server error: ${response.status}`);
+    }
+
+    const meaningLines = [];
+    await readNdjson(response, event => {
+      if (event.type === 'line') {
+        meaningLines.push(event.text);
+        showMeaning(convertMarkdownToHTML(escapeHTML(meaningLines.join('\n'))));
+      } else if (event.type === 'done') {
+        showMeaning(convertMarkdownToHTML(escapeHTML(event.result.meaning)));
+      } else if (event.type === 'error') {
+        showMeaning(`<p class="text-danger">Explanation failed: ${escapeHTML(event.message || 'Unknown error')}</p>`);
+      }
+    });
+  } catch (error) {
+    if (error.name === 'AbortError') {
+      return;
+    }
+    console.error('Meaning error:', error);
+    showMeaning(`<p class="text-danger">Explanation error: ${escapeHTML(error.message)}</p>`);
+  } finally {
+    if (meaningController === controller) {
+      meaningController = null;
+      meaningLoadingElem.classList.add('hidden');
+    }
+  }
+}
+
+/**
+ * Escape text for safe insertion as HTML
+ */
+function escapeHTML(text) {
+  const div = document.createElement('div');
+  div.textContent = text;
+  return div.innerHTML;
+}
+
 /**
  * Get the current stored state as a Promise
  */
@@ -736,6 +951,13 @@ function resetToInitialState() {
   // Clear current song data
   currentSongData = null;
   originalLyrics = '';
+  clearTimeout(lyricsRevalidateTimer);
+  if (translationController) {
+    translationController.abort();
+  }
+  if (meaningController) {
+    meaningController.abort();
+  }
 
   // Clear saved state
   chrome.storage.local.remove('lyrikaState', function () {
@@ -796,6 +1018,10 @@ function handleManualSearch() {
       document.getElementById('search-result-lyrics').textContent = response.lyrics || 'No lyrics found for this song.';
       document.getElementById('search-results').classList.remove('hidden');
 
+      watchLyricsUpgrade(response, upgraded => {
+        document.getElementById('search-result-lyrics').textContent = upgraded.lyrics;
+      });
+
       // Make sure we're on the search tab
       document.getElementById('search-tab').click();
     } else {
@@ -7,15 +7,29 @@ Handles song identification using the ACRCloud API.
 import base64
 import hashlib
 import hmac
-import io
-import json
+import logging
 import os
-import subprocess
-import tempfile
 import time
-from urllib.parse import urlencode
-
-import requests
+import uuid
+
+from api.audio_analysis import prefilter_sample
+from api.cache import normalize_song_key
+from api.debug_capture import save_debug_capture
+from api.decoder_pool import decode_audio
+from api.fingerprint import FINGERPRINT_CACHE_ENABLED, fingerprint_pcm
+from api.fingerprint import get_index as get_fingerprint_index
+from api.fingerprint import frames_to_ms, ms_to_frames
+from api.http_client import get_client
+from api.sample_profiles import apply_profile, get_profile
+from api.sessions import (
+    SESSION_CACHE_ENABLED,
+    SESSION_OFFSET_TOLERANCE_MS,
+    get_sessions,
+)
+from api.singleflight import single_flight
+from api.transcode import SAMPLE_WIDTH, TranscodeError, pcm_to_wav
+
+logger = logging.getLogger("acrcloud")
 
 # ACRCloud API configuration
 ACR_HOST = os.environ.get("ACRCLOUD_HOST", "identify-ap-southeast-1.acrcloud.com")
@@ -28,8 +42,9 @@ HEADERS = {"Authorization": f"Bearer {GENIUS_ACCESS_TOKEN}"}
 
 
 def search_song(song_name: str):
-    url = f"{GENIUS_BASE_URL}/search?q={song_name}"
-    response = requests.get(url, headers=HEADERS)
+    response = get_client().get(
+        f"{GENIUS_BASE_URL}/search", headers=HEADERS, params={"q": song_name}
+    )
     data = response.json()
 
     if response.status_code != 200:
@@ -50,12 +65,39 @@ def search_song(song_name: str):
     }
 
 
-def identify_song_from_audio(audio_data):
+def fetch_album_artwork(title, artist):
+    """
+    Look up album artwork for a song on Genius.
+
+    Args:
+        title (str): Song title
+        artist (str): Artist name
+
+    Returns:
+        str: Artwork thumbnail URL, or None if no song was found
+    """
+    try:
+        song = single_flight(
+            "artwork", normalize_song_key(title, artist), search_song, f"{title} {artist}"
+        )
+    except Exception as e:
+        print(f"Error fetching album artwork: {e}")
+        return None
+    return song.get("thumbnail") if song else None
+
+
+def identify_song_from_audio(
+    audio_data, client_id=None, fetch_artwork=True, request_id=None
+):
     """
     Identify a song using ACRCloud API.
 
     Args:
         audio_data (str): Base64-encoded audio data
+        client_id (str, optional): Identifier of the requesting client/tab
+        fetch_artwork (bool): Look up album artwork before returning
+        request_id (str, optional): Identifier of the request, used to name
+            its debug capture
 
     Returns:
         dict: Song identification result
@@ -63,119 +105,333 @@ def identify_song_from_audio(audio_data):
     try:
         # Convert base64 string to binary
         binary_data = base64.b64decode(audio_data)
+    except Exception as e:
+        return {"status": "error", "message": f"Error identifying song: {str(e)}"}
 
-        # Check audio format and size
-        # print(f"Audio data length: {len(audio_data)} characters")
-        # print(f"Binary data size: {len(binary_data)} bytes")
+    return identify_song_from_bytes(
+        binary_data,
+        client_id=client_id,
+        fetch_artwork=fetch_artwork,
+        request_id=request_id,
+    )
 
-        # Convert WebM to WAV for ACRCloud compatibility using ffmpeg
-        try:
-            # Create temporary files for conversion
-            with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as webm_file:
-                webm_file.write(binary_data)
-                webm_path = webm_file.name
-
-            wav_path = webm_path.replace(".webm", ".wav")
-
-            # Use ffmpeg to convert WebM to WAV with better quality for ACRCloud
-            cmd = [
-                "ffmpeg",
-                "-i",
-                webm_path,
-                "-acodec",
-                "pcm_s16le",  # 16-bit PCM
-                "-ar",
-                "44100",  # 44.1kHz sample rate (CD quality)
-                "-ac",
-                "2",  # Stereo (ACRCloud prefers stereo)
-                "-af",
-                "volume=2.0",  # Increase volume
-                "-y",  # Overwrite output file
-                wav_path,
-            ]
-
-            result = subprocess.run(cmd, capture_output=True, text=True)
-
-            if result.returncode == 0:
-                # Read the converted WAV file
-                with open(wav_path, "rb") as wav_file:
-                    wav_data = wav_file.read()
-
-                # print(f"Converted to WAV: {len(wav_data)} bytes")
-                binary_data = wav_data  # Use the converted WAV data
-            else:
-                print(f"FFmpeg conversion failed: {result.stderr}")
 
-            # Clean up temporary files
-            os.unlink(webm_path)
-            if os.path.exists(wav_path):
-                os.unlink(wav_path)
+def decode_sample(binary_data, settings):
+    """
+    Decode captured audio to PCM in the format required by a sample profile.
 
-        except Exception as e:
-            print(f"Error converting audio: {e}")
-            # Fallback to original data if conversion fails
-            pass
+    Args:
+        binary_data (bytes): Encoded audio as recorded by the extension (e.g. WebM)
+        settings (dict): Sample profile settings
 
-        # Save the converted WAV file for manual inspection
-        try:
-            with open("server/debug_output.wav", "wb") as debug_file:
-                debug_file.write(binary_data)
-        except Exception as e:
-            print(f"Error saving debug_output.wav: {e}")
-
-        # Prepare request
-        http_method = "POST"
-        http_uri = "/v1/identify"
-        data_type = "audio"
-        signature_version = "1"
-        timestamp = str(int(time.time()))
-
-        # Generate signature
-        string_to_sign = "\n".join(
-            [
-                http_method,
-                http_uri,
-                ACR_ACCESS_KEY,
-                data_type,
-                signature_version,
-                timestamp,
-            ]
+    Returns:
+        bytes: Interleaved 16-bit PCM samples
+
+    Raises:
+        TranscodeError: If the audio cannot be decoded
+    """
+    return decode_audio(
+        binary_data,
+        sample_rate=settings["sample_rate"],
+        channels=settings["channels"],
+        volume=settings["volume"],
+    )
+
+
+def build_sample(pcm_data, settings):
+    """
+    Trim decoded PCM to a profile's budget and wrap it as a WAV sample.
+
+    Args:
+        pcm_data (bytes): PCM decoded with decode_sample
+        settings (dict): Sample profile settings
+
+    Returns:
+        bytes: WAV sample
+    """
+    pcm_data = apply_profile(pcm_data, settings)
+    return pcm_to_wav(pcm_data, settings["sample_rate"], settings["channels"])
+
+
+def prepare_sample(binary_data, profile=None):
+    """
+    Convert captured audio into the WAV sample uploaded to ACRCloud.
+
+    Args:
+        binary_data (bytes): Encoded audio as recorded by the extension (e.g. WebM)
+        profile (str, optional): Sample profile name ("full" or "compact")
+
+    Returns:
+        bytes: WAV sample, or the original data if conversion fails
+    """
+    settings = get_profile(profile)
+    try:
+        return build_sample(decode_sample(binary_data, settings), settings)
+    except TranscodeError as e:
+        print(f"Error converting audio: {e}")
+        # Fallback to original data if conversion fails
+        return binary_data
+
+
+def send_sample_to_acrcloud(sample):
+    """
+    Send an audio sample to the ACRCloud identify endpoint.
+
+    Args:
+        sample (bytes): WAV sample to identify
+
+    Returns:
+        requests.Response: Raw HTTP response from ACRCloud
+    """
+    # Prepare request
+    http_method = "POST"
+    http_uri = "/v1/identify"
+    data_type = "audio"
+    signature_version = "1"
+    timestamp = str(int(time.time()))
+
+    # Generate signature
+    string_to_sign = "\n".join(
+        [
+            http_method,
+            http_uri,
+            ACR_ACCESS_KEY,
+            data_type,
+            signature_version,
+            timestamp,
+        ]
+    )
+
+    sign = base64.b64encode(
+        hmac.new(
+            ACR_ACCESS_SECRET.encode("utf-8"),
+            string_to_sign.encode("utf-8"),
+            digestmod=hashlib.sha1,
+        ).digest()
+    ).decode("utf-8")
+
+    # Prepare request data
+    # ACRCloud expects the audio file to be sent as 'sample' in multipart form data
+    files = {"sample": ("sample.wav", sample, "audio/wav")}
+
+    data = {
+        "access_key": ACR_ACCESS_KEY,
+        "data_type": data_type,
+        "signature": sign,
+        "signature_version": signature_version,
+        "timestamp": timestamp,
+        "sample_bytes": str(len(sample)),  # Add sample_bytes as required by ACRCloud
+    }
+
+    # Make request to ACRCloud
+    url = f"https://{ACR_HOST}{http_uri}"
+    logger.debug(f"Sending {len(sample)} byte sample to ACRCloud: {url}")
+
+    return get_client().post(url, files=files, data=data, timeout=ACR_TIMEOUT)
+
+
+def lookup_local_match(pcm_data, settings, client_id=None):
+    """
+    Try to answer an identify request without calling ACRCloud.
+
+    Checks the client's current session first (is this still the song that was
+    identified a moment ago?), then the shared fingerprint index.
+
+    Args:
+        pcm_data (bytes): Decoded capture
+        settings (dict): Sample profile settings the capture was decoded with
+        client_id (str, optional): Identifier of the requesting client/tab
+
+    Returns:
+        tuple: (song_info or None, capture) where capture holds the fingerprint
+            and length of the clip for remember_match
+    """
+    sample_rate, channels = settings["sample_rate"], settings["channels"]
+    capture = {
+        "client_id": client_id if SESSION_CACHE_ENABLED else None,
+        "clip_ms": len(pcm_data) * 1000 // (SAMPLE_WIDTH * channels * sample_rate),
+        "fingerprint": None,
+    }
+    if FINGERPRINT_CACHE_ENABLED:
+        capture["fingerprint"] = fingerprint_pcm(pcm_data, sample_rate, channels)
+
+    sessions = get_sessions()
+    session = sessions.get(client_id) if capture["client_id"] else None
+    if session is not None:
+        alignment = align_with_session(session, capture)
+        confirmed = sessions.confirm(alignment)
+        if confirmed:
+            logger.info(f"Session cache hit for '{session['track_key']}'")
+            # Re-anchor the session on the position the capture aligned at
+            position_ms = frames_to_ms(alignment["offset_frames"]) + capture["clip_ms"]
+            sessions.start(
+                client_id, session["song_info"], session["track_key"], position_ms
+            )
+            return dict(session["song_info"], cache="session"), capture
+        if confirmed is False:
+            logger.info(f"Capture no longer matches '{session['track_key']}'")
+            sessions.end(client_id)
+            session = None
+
+    cached = None
+    if capture["fingerprint"] is not None:
+        cached = get_fingerprint_index().match(*capture["fingerprint"])
+
+    if session is not None and cached is None:
+        # Nothing shows that the song changed, so trust the predicted position
+        logger.info(f"Session cache hit for '{session['track_key']}' (predicted)")
+        return dict(sessions.accept(session), cache="session"), capture
+
+    if cached:
+        logger.info(
+            f"Fingerprint cache hit for '{cached['track_key']}' "
+            f"({cached['matches']} matching hashes)"
         )
+        if capture["client_id"]:
+            # The match offset tells us where in the track this capture starts
+            position_ms = frames_to_ms(cached["offset_frames"]) + capture["clip_ms"]
+            sessions.start(
+                client_id,
+                cached["result"],
+                cached["track_key"],
+                position_ms,
+            )
+        return dict(cached["result"], cache="fingerprint"), capture
 
-        sign = base64.b64encode(
-            hmac.new(
-                ACR_ACCESS_SECRET.encode("utf-8"),
-                string_to_sign.encode("utf-8"),
-                digestmod=hashlib.sha1,
-            ).digest()
-        ).decode("utf-8")
-
-        # Prepare request data
-        # ACRCloud expects the audio file to be sent as 'sample' in multipart form data
-        files = {"sample": ("sample.wav", binary_data, "audio/wav")}
-
-        data = {
-            "access_key": ACR_ACCESS_KEY,
-            "data_type": data_type,
-            "signature": sign,
-            "signature_version": signature_version,
-            "timestamp": timestamp,
-            "sample_bytes": str(
-                len(binary_data)
-            ),  # Add sample_bytes as required by ACRCloud
-        }
+    return None, capture
+
+
+def align_with_session(session, capture):
+    """
+    Compare a capture with the session's track where playback should be now.
 
-        # Make request to ACRCloud
-        url = f"https://{ACR_HOST}{http_uri}"
-        print(f"Making request to ACRCloud: {url}")
-        print(
-            f"ACR_ACCESS_KEY: {ACR_ACCESS_KEY[:10]}..."
-        )  # Show first 10 chars for debugging
-        print(f"Audio data size: {len(binary_data)} bytes")
-        print(f"Request data: {data}")
-        print(f"String to sign: {string_to_sign}")
-
-        response = requests.post(url, files=files, data=data)
+    Args:
+        session (dict): Session returned by SessionCache.get
+        capture (dict): Capture details built by lookup_local_match
+
+    Returns:
+        dict: Result of FingerprintIndex.align, or None if there is no
+            fingerprint or predicted position to compare
+    """
+    expected_ms = get_sessions().expected_start_ms(session, capture["clip_ms"])
+    if capture["fingerprint"] is None or expected_ms is None:
+        return None
+    return get_fingerprint_index().align(
+        session["track_key"],
+        *capture["fingerprint"],
+        expected_offset=ms_to_frames(expected_ms),
+        tolerance=ms_to_frames(SESSION_OFFSET_TOLERANCE_MS),
+    )
+
+
+def track_key_for(song_info):
+    """Stable identifier of an identified track, used by the local caches."""
+    music = song_info.get("raw") or {}
+    return music.get("acrid") or f"{song_info['title']}|{song_info['artist']}"
+
+
+def remember_artwork(song_info, album_artwork, client_id=None):
+    """
+    Add artwork found after identification to the cached copies of a match.
+
+    The fingerprint index and the session cache may be reading or saving the
+    result they hold, so it is updated through their own locked APIs rather
+    than by changing song_info.
+
+    Args:
+        song_info (dict): Identification result the artwork belongs to
+        album_artwork (str): Artwork URL
+        client_id (str, optional): Identifier of the requesting client/tab
+    """
+    track_key = track_key_for(song_info)
+    fields = {"albumArtwork": album_artwork}
+    if FINGERPRINT_CACHE_ENABLED:
+        get_fingerprint_index().update_result(track_key, fields)
+    if client_id and SESSION_CACHE_ENABLED:
+        get_sessions().update_result(client_id, track_key, fields)
+
+
+def remember_match(song_info, capture):
+    """
+    Index a capture that ACRCloud identified so repeats can be answered locally.
+
+    Args:
+        song_info (dict): Successful identification result with "raw" ACRCloud metadata
+        capture (dict): Capture details returned by lookup_local_match
+    """
+    music = song_info.get("raw") or {}
+    track_key = track_key_for(song_info)
+
+    if capture["fingerprint"] is not None:
+        # play_offset_ms is the track position at the end of the sample
+        start_ms = max(0, music.get("play_offset_ms", 0) - capture["clip_ms"])
+        hashes, frames = capture["fingerprint"]
+        get_fingerprint_index().add(
+            track_key, hashes, frames + ms_to_frames(start_ms), song_info
+        )
+
+    if capture["client_id"]:
+        get_sessions().start(
+            capture["client_id"],
+            song_info,
+            track_key,
+            music.get("play_offset_ms"),
+        )
+
+
+def identify_song_from_bytes(
+    binary_data, profile=None, client_id=None, fetch_artwork=True, request_id=None
+):
+    """
+    Identify a song from raw captured audio using ACRCloud API.
+
+    Args:
+        binary_data (bytes): Encoded audio as recorded by the extension (e.g. WebM)
+        profile (str, optional): Sample profile name, defaults to ACR_SAMPLE_PROFILE
+        client_id (str, optional): Identifier of the requesting client/tab, used to
+            reuse the result while the same track is still playing
+        fetch_artwork (bool): Look up album artwork before returning. Callers
+            that fetch it concurrently with other work pass False and fill in
+            "albumArtwork" themselves.
+        request_id (str, optional): Identifier of the request, used to name
+            its debug capture; a new one is generated if not given
+
+    Returns:
+        dict: Song identification result
+    """
+    try:
+        settings = get_profile(profile)
+        capture = None
+        try:
+            pcm_data = decode_sample(binary_data, settings)
+        except TranscodeError as e:
+            print(f"Error converting audio: {e}")
+            # Fallback to original data if conversion fails
+            pcm_data = None
+
+        if pcm_data is not None:
+            # Reject silence, noise and speech locally instead of asking ACRCloud
+            rejection = prefilter_sample(
+                pcm_data, settings["sample_rate"], settings["channels"]
+            )
+            if rejection:
+                return rejection
+
+            # Answer repeat captures of recently identified tracks locally
+            cached, capture = lookup_local_match(pcm_data, settings, client_id)
+            if cached:
+                return cached
+
+            binary_data = build_sample(pcm_data, settings)
+
+        # Keep a sampled copy of the sample for manual inspection; if decoding
+        # failed it is still the original capture rather than a WAV
+        request_id = request_id or uuid.uuid4().hex
+        extension = "wav" if pcm_data is not None else "webm"
+        if save_debug_capture(request_id, binary_data, extension):
+            logger.info(f"Saved debug capture for request {request_id}")
+
+        response = send_sample_to_acrcloud(binary_data)
         # print(f"ACRCloud response status code: {response.status_code}")
 
         if response.status_code == 200:
@@ -215,10 +471,11 @@ def identify_song_from_audio(audio_data):
                     )
 
                 # Extract album artwork URLs
-                singleArtwork = search_song(f"{title} {artist}")
-                album_artwork = singleArtwork.get("thumbnail")
+                album_artwork = (
+                    fetch_album_artwork(title, artist) if fetch_artwork else None
+                )
 
-                return {
+                song_info = {
                     "status": "success",
                     "title": title,
                     "artist": artist,
@@ -228,6 +485,11 @@ def identify_song_from_audio(audio_data):
                     "albumArtwork": album_artwork,
                     "raw": music,  # Include raw data for debugging/future use
                 }
+
+                if capture is not None:
+                    remember_match(song_info, capture)
+
+                return song_info
             else:
                 # No match found
                 return {
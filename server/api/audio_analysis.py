@@ -0,0 +1,184 @@
+"""
+Audio Analysis
+
+Fast NumPy checks on decoded PCM that reject captures with no chance of
+matching (silence, broadband noise, speech) before they are sent to ACRCloud.
+"""
+
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger("audio_analysis")
+
+# Pre-filter configuration
+PREFILTER_ENABLED = os.environ.get("PREFILTER_ENABLED", "true").lower() == "true"
+# Overall level below which a capture is treated as silence (dBFS)
+PREFILTER_SILENCE_DBFS = float(os.environ.get("PREFILTER_SILENCE_DBFS", -55))
+# Minimum fraction of frames that must be above the silence level
+PREFILTER_MIN_ACTIVE_RATIO = float(os.environ.get("PREFILTER_MIN_ACTIVE_RATIO", 0.2))
+# Spectral flatness above which a capture is treated as noise (0 = tonal, 1 = white noise)
+PREFILTER_MAX_FLATNESS = float(os.environ.get("PREFILTER_MAX_FLATNESS", 0.45))
+# Speech has many quiet frames between syllables and a strong 2-8 Hz rhythm
+PREFILTER_SPEECH_LOW_ENERGY_RATIO = float(
+    os.environ.get("PREFILTER_SPEECH_LOW_ENERGY_RATIO", 0.4)
+)
+PREFILTER_SPEECH_MODULATION_RATIO = float(
+    os.environ.get("PREFILTER_SPEECH_MODULATION_RATIO", 0.4)
+)
+
+# Analysis frame sizes (in seconds)
+FRAME_SECONDS = 0.032
+HOP_SECONDS = 0.016
+
+# Error codes returned for rejected captures
+ERROR_SILENCE = "silence"
+ERROR_NOISE = "noise"
+ERROR_SPEECH = "speech"
+
+REJECTION_MESSAGES = {
+    ERROR_SILENCE: "No audio detected. Please make sure music is playing in the tab.",
+    ERROR_NOISE: "The captured audio sounds like noise rather than music.",
+    ERROR_SPEECH: "The captured audio sounds like speech rather than music.",
+}
+
+
+def _frame_signal(signal, frame_length, hop_length):
+    """Split a 1-D signal into overlapping frames without copying."""
+    if len(signal) < frame_length:
+        signal = np.pad(signal, (0, frame_length - len(signal)))
+    num_frames = 1 + (len(signal) - frame_length) // hop_length
+    return np.lib.stride_tricks.as_strided(
+        signal,
+        shape=(num_frames, frame_length),
+        strides=(signal.strides[0] * hop_length, signal.strides[0]),
+        writeable=False,
+    )
+
+
+def analyze_pcm(pcm_data, sample_rate, channels):
+    """
+    Compute loudness and spectral features for a PCM clip.
+
+    Args:
+        pcm_data (bytes): Interleaved 16-bit PCM samples
+        sample_rate (int): Sample rate in Hz
+        channels (int): Number of channels
+
+    Returns:
+        dict: Features (rms_dbfs, active_ratio, spectral_flatness,
+            low_energy_ratio, modulation_ratio)
+    """
+    samples = np.frombuffer(pcm_data, dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples[: len(samples) // channels * channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+
+    if samples.size == 0:
+        return {
+            "rms_dbfs": -np.inf,
+            "active_ratio": 0.0,
+            "spectral_flatness": 0.0,
+            "low_energy_ratio": 1.0,
+            "modulation_ratio": 0.0,
+        }
+
+    frame_length = max(16, int(sample_rate * FRAME_SECONDS))
+    hop_length = max(8, int(sample_rate * HOP_SECONDS))
+    frames = _frame_signal(np.ascontiguousarray(samples), frame_length, hop_length)
+
+    eps = 1e-10
+    frame_rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    rms_dbfs = float(20 * np.log10(np.sqrt(np.mean(np.square(samples))) + eps))
+
+    silence_level = 10 ** (PREFILTER_SILENCE_DBFS / 20)
+    active = frame_rms > silence_level
+    active_ratio = float(np.mean(active))
+
+    # Spectral flatness: geometric mean over arithmetic mean of the power spectrum
+    spectrum_frames = frames[active] if np.any(active) else frames
+    window = np.hanning(frame_length).astype(np.float32)
+    power = np.square(np.abs(np.fft.rfft(spectrum_frames * window, axis=1))) + eps
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+    spectral_flatness = float(np.median(flatness))
+
+    # Fraction of frames well below the average loudness
+    low_energy_ratio = float(np.mean(frame_rms < 0.5 * np.mean(frame_rms)))
+
+    # Share of loudness-envelope energy in the 2-8 Hz syllable band
+    envelope = frame_rms - np.mean(frame_rms)
+    envelope_spectrum = np.square(np.abs(np.fft.rfft(envelope)))
+    envelope_freqs = np.fft.rfftfreq(len(envelope), d=hop_length / sample_rate)
+    band = (envelope_freqs >= 0.5) & (envelope_freqs <= 20)
+    syllabic = (envelope_freqs >= 2) & (envelope_freqs <= 8)
+    band_energy = float(np.sum(envelope_spectrum[band]))
+    modulation_ratio = (
+        float(np.sum(envelope_spectrum[syllabic])) / band_energy
+        if band_energy > 0
+        else 0.0
+    )
+
+    return {
+        "rms_dbfs": rms_dbfs,
+        "active_ratio": active_ratio,
+        "spectral_flatness": spectral_flatness,
+        "low_energy_ratio": low_energy_ratio,
+        "modulation_ratio": modulation_ratio,
+    }
+
+
+def classify_features(features):
+    """
+    Decide whether analyzed audio is worth sending to ACRCloud.
+
+    Args:
+        features (dict): Output of analyze_pcm
+
+    Returns:
+        str: Rejection error code, or None if the capture looks like music
+    """
+    if (
+        features["rms_dbfs"] < PREFILTER_SILENCE_DBFS
+        or features["active_ratio"] < PREFILTER_MIN_ACTIVE_RATIO
+    ):
+        return ERROR_SILENCE
+
+    if features["spectral_flatness"] > PREFILTER_MAX_FLATNESS:
+        return ERROR_NOISE
+
+    if (
+        features["low_energy_ratio"] > PREFILTER_SPEECH_LOW_ENERGY_RATIO
+        and features["modulation_ratio"] > PREFILTER_SPEECH_MODULATION_RATIO
+    ):
+        return ERROR_SPEECH
+
+    return None
+
+
+def prefilter_sample(pcm_data, sample_rate, channels):
+    """
+    Check decoded audio and build an error result if it should not be identified.
+
+    Args:
+        pcm_data (bytes): Interleaved 16-bit PCM samples
+        sample_rate (int): Sample rate in Hz
+        channels (int): Number of channels
+
+    Returns:
+        dict: Error result with an "error_code", or None if the capture should be sent on
+    """
+    if not PREFILTER_ENABLED:
+        return None
+
+    features = analyze_pcm(pcm_data, sample_rate, channels)
+    error_code = classify_features(features)
+    if error_code is None:
+        return None
+
+    logger.info(f"Capture rejected by pre-filter ({error_code}): {features}")
+    return {
+        "status": "error",
+        "error_code": error_code,
+        "message": REJECTION_MESSAGES[error_code],
+    }
@@ -0,0 +1,250 @@
+"""
+Two-Tier Cache
+
+A small in-process LRU in front of a SQLite table with per-entry TTLs. The
+SQLite file is shared by every worker process on the host, so a value cached
+by one worker is found by the others and survives restarts.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger("cache")
+
+# Cache configuration
+CACHE_DB_PATH = os.environ.get(
+    "CACHE_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cache.sqlite3"),
+)
+
+# Caches created in this process, by name
+_caches = {}
+
+# Size-bounded caches trim the disk tier after this many writes
+TRIM_EVERY_WRITES = 50
+
+# "feat." credits, in brackets or after a separator such as " - " or ","; a
+# bare "feat"/"ft" can be part of the name itself ("Ft. Lauderdale")
+CREDITS = r"(?:feat|ft|featuring)\b"
+BRACKETED_CREDITS = re.compile(rf"[(\[]\s*{CREDITS}[^)\]]*[)\]]?")
+SEPARATED_CREDITS = re.compile(rf"\s*[-\u2013\u2014,/|:;]\s*{CREDITS}.*$")
+
+
+def normalize_text(text):
+    """
+    Lowercase a title or artist and strip accents, punctuation and "feat." credits.
+
+    Args:
+        text (str): Title or artist name
+
+    Returns:
+        str: Normalized text
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = text.casefold()
+    text = BRACKETED_CREDITS.sub(" ", text)
+    text = SEPARATED_CREDITS.sub("", text)
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def normalize_song_key(title, artist=""):
+    """
+    Build a lookup key that is the same for trivially different song names.
+
+    Case, accents, punctuation, "feat." credits and extra whitespace are
+    ignored, so "Beyoncé - Halo (feat. X)" and "beyonce halo" share a key.
+
+    Args:
+        title (str): Song title
+        artist (str): Artist name
+
+    Returns:
+        str: Normalized "title|artist" key
+    """
+    return f"{normalize_text(title)}|{normalize_text(artist)}"
+
+
+class TieredCache:
+    """In-memory LRU backed by a persistent SQLite table, with TTLs."""
+
+    def __init__(
+        self, name, ttl, memory_size=256, db_path=CACHE_DB_PATH, max_entries=None
+    ):
+        """
+        Args:
+            name (str): Cache name, also used as the SQLite table name
+            ttl (float): Default time to live in seconds
+            memory_size (int): Maximum entries kept in memory
+            db_path (str): SQLite file, or None for a memory-only cache
+            max_entries (int, optional): Maximum entries kept on disk; the
+                entries closest to expiry are evicted first
+        """
+        self.name = name
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+            "writes": 0,
+            "errors": 0,
+        }
+        _caches[name] = self
+
+    def _count(self, name, amount=1):
+        """Add to a counter, returning its new value."""
+        with self._lock:
+            self.stats[name] += amount
+            return self.stats[name]
+
+    def _connection(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.name}" ('
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _db_execute(self, sql, params=()):
+        """Run a statement against the disk tier, returning rows or None on error."""
+        if not self.db_path:
+            return None
+        try:
+            with self._db_lock:
+                db = self._connection()
+                rows = db.execute(sql, params).fetchall()
+                db.commit()
+                return rows
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.error(f"{self.name} cache database error: {e}")
+            return None
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._memory.pop(key, None)
+            self._memory[key] = (value, expires_at)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get(self, key, refresh=False):
+        """
+        Look up a value, checking memory first and then disk.
+
+        Args:
+            key (str): Cache key
+            refresh (bool): Read from disk even if the key is in memory, to
+                see values written by other processes
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = None if refresh and self.db_path else self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+        rows = self._db_execute(
+            f'SELECT value, expires_at FROM "{self.name}" WHERE key = ?', (key,)
+        )
+        if rows:
+            value, expires_at = rows[0]
+            if expires_at > now:
+                value = json.loads(value)
+                self._remember(key, value, expires_at)
+                self._count("disk_hits")
+                return value
+            self._count("expired")
+            self.delete(key)
+
+        self._count("misses")
+        return None
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a JSON-serializable value in both tiers.
+
+        Args:
+            key (str): Cache key
+            value: Value to store
+            ttl (float, optional): Time to live in seconds, defaults to the cache TTL
+        """
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._remember(key, value, expires_at)
+        self._db_execute(
+            f'INSERT OR REPLACE INTO "{self.name}" (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value), expires_at),
+        )
+        writes = self._count("writes")
+        if self.max_entries and writes % TRIM_EVERY_WRITES == 0:
+            self.trim()
+
+    def delete(self, key):
+        """Remove a key from both tiers."""
+        with self._lock:
+            self._memory.pop(key, None)
+        self._db_execute(f'DELETE FROM "{self.name}" WHERE key = ?', (key,))
+
+    def purge_expired(self):
+        """Delete expired rows from the disk tier."""
+        self._db_execute(
+            f'DELETE FROM "{self.name}" WHERE expires_at <= ?', (time.time(),)
+        )
+
+    def trim(self):
+        """Delete expired rows, then the rows closest to expiry beyond max_entries."""
+        self.purge_expired()
+        if not self.max_entries:
+            return
+        rows = self._db_execute(f'SELECT COUNT(*) FROM "{self.name}"')
+        excess = rows[0][0] - self.max_entries if rows else 0
+        if excess > 0:
+            self._db_execute(
+                f'DELETE FROM "{self.name}" WHERE key IN ('
+                f'SELECT key FROM "{self.name}" ORDER BY expires_at LIMIT ?)',
+                (excess,),
+            )
+            self._count("disk_evictions", excess)
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        self._db_execute(f'DELETE FROM "{self.name}"')
+
+
+def all_cache_stats():
+    """Return the counters of every cache created in this process, by name."""
+    return {
+        name: dict(cache.stats, memory_entries=len(cache._memory))
+        for name, cache in _caches.items()
+    }
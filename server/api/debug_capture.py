@@ -0,0 +1,141 @@
+"""
+Debug Captures
+
+Optionally keeps copies of the samples sent to ACRCloud for manual
+inspection. Captures are sampled (1 in N requests), written by a background
+thread so requests never wait on the disk, named by request ID, and kept in a
+bounded ring of files.
+"""
+
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger("debug_capture")
+
+# Debug capture configuration
+DEBUG_CAPTURE_ENABLED = os.environ.get("DEBUG_CAPTURE_ENABLED", "false").lower() == "true"
+DEBUG_CAPTURE_SAMPLE_EVERY = max(1, int(os.environ.get("DEBUG_CAPTURE_SAMPLE_EVERY", 1)))
+DEBUG_CAPTURE_DIR = os.environ.get(
+    "DEBUG_CAPTURE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "debug_captures"),
+)
+DEBUG_CAPTURE_MAX_FILES = int(os.environ.get("DEBUG_CAPTURE_MAX_FILES", 20))
+DEBUG_CAPTURE_QUEUE_SIZE = int(os.environ.get("DEBUG_CAPTURE_QUEUE_SIZE", 8))
+
+
+class DebugCaptureWriter:
+    """Writes sampled debug captures to a bounded on-disk ring in the background."""
+
+    def __init__(
+        self,
+        directory=DEBUG_CAPTURE_DIR,
+        sample_every=DEBUG_CAPTURE_SAMPLE_EVERY,
+        max_files=DEBUG_CAPTURE_MAX_FILES,
+        queue_size=DEBUG_CAPTURE_QUEUE_SIZE,
+    ):
+        self.directory = directory
+        self.sample_every = max(1, sample_every)
+        self.max_files = max(1, max_files)
+        self._counter = itertools.count()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self.stats = {"sampled": 0, "written": 0, "dropped": 0, "errors": 0}
+
+    def submit(self, request_id, data, extension="wav"):
+        """
+        Queue a capture for writing if this request is sampled.
+
+        Never blocks: if the writer is behind, the capture is dropped.
+
+        Args:
+            request_id (str): Identifier of the request the capture belongs to
+            data (bytes): File contents
+            extension (str): File extension to use
+
+        Returns:
+            bool: True if the capture was queued
+        """
+        if next(self._counter) % self.sample_every != 0:
+            return False
+
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((request_id, data, extension))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+
+        self.stats["sampled"] += 1
+        return True
+
+    def _ensure_thread(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="debug-capture-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            request_id, data, extension = self._queue.get()
+            try:
+                self._write(request_id, data, extension)
+                self.stats["written"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error saving debug capture {request_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, request_id, data, extension):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}_{request_id}.{extension}"
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as capture_file:
+            capture_file.write(data)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self):
+        """Delete the oldest captures beyond max_files."""
+        captures = sorted(
+            entry
+            for entry in os.listdir(self.directory)
+            if not entry.endswith(".tmp")
+        )
+        for name in captures[: max(0, len(captures) - self.max_files)]:
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def flush(self):
+        """Block until all queued captures have been written."""
+        self._queue.join()
+
+
+_writer = DebugCaptureWriter()
+
+
+def save_debug_capture(request_id, data, extension="wav"):
+    """
+    Keep a copy of a sample for debugging, if debug captures are enabled.
+
+    Args:
+        request_id (str): Identifier of the request the capture belongs to
+        data (bytes): File contents
+        extension (str): File extension to use
+
+    Returns:
+        bool: True if the capture was queued for writing
+    """
+    if not DEBUG_CAPTURE_ENABLED:
+        return False
+    return _writer.submit(request_id, data, extension)
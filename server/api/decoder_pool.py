@@ -0,0 +1,391 @@
+"""
+Decoder Worker Pool
+
+Keeps a small pool of long-lived worker processes that decode captured audio
+into PCM, so /api/identify does not pay process startup cost on every call.
+
+Workers decode in-process with PyAV when it is installed and fall back to
+piping through ffmpeg otherwise. The pool has a bounded queue, a periodic
+health check, and is rebuilt automatically if a worker crashes or hangs. A
+job that times out only retires its pool: new jobs go to fresh workers while
+the other jobs already on the old workers finish.
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+
+from api.transcode import (
+    CHANNELS,
+    SAMPLE_RATE,
+    TRANSCODE_MAX_INPUT_BYTES,
+    TRANSCODE_MAX_SECONDS,
+    TRANSCODE_TIMEOUT,
+    VOLUME_GAIN,
+    TranscodeError,
+    decode_to_pcm,
+)
+
+logger = logging.getLogger("decoder_pool")
+
+# Decoder pool configuration
+DECODER_BACKEND = os.environ.get("DECODER_BACKEND", "pool")  # "pool" or "subprocess"
+DECODER_POOL_SIZE = int(os.environ.get("DECODER_POOL_SIZE", 2))
+DECODER_MAX_PENDING = int(os.environ.get("DECODER_MAX_PENDING", 8))
+DECODER_QUEUE_TIMEOUT = float(os.environ.get("DECODER_QUEUE_TIMEOUT", 2))
+DECODER_HEALTH_INTERVAL = float(os.environ.get("DECODER_HEALTH_INTERVAL", 30))
+
+
+class DecoderBusyError(TranscodeError):
+    """Raised when the decoder queue is full."""
+
+
+def _pyav_available():
+    try:
+        import av  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _decode_with_pyav(binary_data, sample_rate, channels, volume):
+    """Decode audio in the current process using PyAV (libav* bindings)."""
+    import av
+    import numpy as np
+
+    layout = "mono" if channels == 1 else "stereo"
+    resampler = av.AudioResampler(format="s16", layout=layout, rate=sample_rate)
+    max_samples = int(TRANSCODE_MAX_SECONDS * sample_rate)
+
+    chunks = []
+    total_samples = 0
+    with av.open(io.BytesIO(binary_data), mode="r") as container:
+        stream = next((s for s in container.streams if s.type == "audio"), None)
+        if stream is None:
+            raise TranscodeError("No audio stream found in capture")
+
+        for frame in container.decode(stream):
+            for out_frame in resampler.resample(frame):
+                chunks.append(out_frame.to_ndarray().reshape(-1))
+                total_samples += out_frame.samples
+            if total_samples >= max_samples:
+                break
+        else:
+            # Flush samples buffered inside the resampler
+            for out_frame in resampler.resample(None):
+                chunks.append(out_frame.to_ndarray().reshape(-1))
+
+    if not chunks:
+        return b""
+
+    samples = np.concatenate(chunks)[: max_samples * channels]
+    if volume and volume != 1.0:
+        samples = np.clip(samples.astype(np.int32) * volume, -32768, 32767)
+    return samples.astype("<i2").tobytes()
+
+
+def _decode_job(binary_data, sample_rate, channels, volume):
+    """Entry point executed inside a worker process."""
+    if _pyav_available():
+        try:
+            return _decode_with_pyav(binary_data, sample_rate, channels, volume)
+        except TranscodeError:
+            raise
+        except Exception as e:
+            # PyAV can be stricter than the ffmpeg CLI about truncated captures
+            logger.warning(f"PyAV decode failed, falling back to ffmpeg: {e}")
+    return decode_to_pcm(binary_data, sample_rate, channels, volume)
+
+
+def _ping_job():
+    """Trivial job used to check that workers are responsive."""
+    return os.getpid()
+
+
+class DecoderPool:
+    """A bounded pool of long-lived audio decoder processes."""
+
+    def __init__(
+        self,
+        size=DECODER_POOL_SIZE,
+        max_pending=DECODER_MAX_PENDING,
+        queue_timeout=DECODER_QUEUE_TIMEOUT,
+        health_interval=DECODER_HEALTH_INTERVAL,
+    ):
+        self.size = max(1, size)
+        self.queue_timeout = queue_timeout
+        self.health_interval = health_interval
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._lock = threading.Lock()
+        self._executor = None
+        # Jobs not yet finished, per executor
+        self._inflight = {}
+        self._health_thread = None
+        self._stopped = threading.Event()
+        self.stats = {
+            "jobs": 0,
+            "failures": 0,
+            "rejected": 0,
+            "restarts": 0,
+            "retired": 0,
+            "last_health_check": None,
+            "healthy": None,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _submit(self, executor, *args):
+        future = executor.submit(*args)
+        with self._lock:
+            inflight = self._inflight.setdefault(executor, set())
+            inflight.add(future)
+
+        def job_done(done_future):
+            with self._lock:
+                inflight.discard(done_future)
+
+        future.add_done_callback(job_done)
+        return future
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"Started decoder pool with {self.size} workers")
+            self._start_health_thread()
+            return self._executor
+
+    def _start_health_thread(self):
+        if self.health_interval <= 0 or self._health_thread is not None:
+            return
+        self._health_thread = threading.Thread(
+            target=self._health_loop, name="decoder-pool-health", daemon=True
+        )
+        self._health_thread.start()
+
+    def _health_loop(self):
+        while not self._stopped.wait(self.health_interval):
+            self.health_check()
+
+    def restart(self, executor=None):
+        """
+        Tear down the worker processes and start fresh ones on next use.
+
+        Args:
+            executor (ProcessPoolExecutor, optional): Only restart if this is still
+                the active executor, so concurrent failures restart once
+        """
+        with self._lock:
+            if self._executor is None or (
+                executor is not None and executor is not self._executor
+            ):
+                return
+            old_executor, self._executor = self._executor, None
+            self._inflight.pop(old_executor, None)
+            self.stats["restarts"] += 1
+
+        logger.warning("Restarting decoder pool")
+        self._terminate(old_executor)
+
+    def retire(self, executor, stuck_future, timeout):
+        """
+        Replace a pool that has a hung worker without failing its other jobs.
+
+        New jobs go to a fresh set of workers. The old workers are terminated
+        once the jobs already submitted to them finish, or after timeout, by
+        which time the callers of those jobs (which wait as long) have given up.
+        Terminating any single worker would break the whole executor, so the
+        hung one is only killed together with the rest.
+
+        Args:
+            executor (ProcessPoolExecutor): Executor running the stuck job
+            stuck_future (Future): The job that timed out
+            timeout (float): Longest wait for the other jobs, in seconds
+        """
+        with self._lock:
+            if executor is not self._executor:
+                return
+            self._executor = None
+            others = self._inflight.pop(executor, set()) - {stuck_future}
+            self.stats["retired"] += 1
+
+        logger.warning(
+            f"Retiring decoder pool with a hung worker, "
+            f"{len(others)} other jobs running"
+        )
+
+        def terminate_when_done():
+            wait(others, timeout=timeout)
+            self._terminate(executor)
+
+        threading.Thread(
+            target=terminate_when_done, name="decoder-pool-retire", daemon=True
+        ).start()
+
+    @staticmethod
+    def _terminate(executor):
+        # Hung workers never finish on their own, so terminate them explicitly
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def health_check(self, timeout=5):
+        """
+        Check that the workers respond, replacing the pool if they do not.
+
+        The ping is skipped while decodes are running: busy workers would
+        delay it past the timeout, and decode() already retires a pool whose
+        job hangs. A ping that still times out retires the pool rather than
+        restarting it, so jobs submitted meanwhile are not cancelled.
+
+        Returns:
+            bool: True if the pool answered a ping in time or is busy decoding
+        """
+        executor = self._get_executor()
+        with self._lock:
+            busy = bool(self._inflight.get(executor))
+
+        healthy = True
+        if not busy:
+            try:
+                ping = self._submit(executor, _ping_job)
+                ping.result(timeout=timeout)
+            except FutureTimeoutError as e:
+                logger.error(f"Decoder pool health check timed out: {e}")
+                healthy = False
+                self.retire(executor, ping, TRANSCODE_TIMEOUT)
+            except (BrokenProcessPool, RuntimeError) as e:
+                logger.error(f"Decoder pool health check failed: {e}")
+                healthy = False
+                self.restart(executor)
+
+        with self._lock:
+            self.stats["last_health_check"] = time.time()
+            self.stats["healthy"] = healthy
+        return healthy
+
+    def decode(
+        self,
+        binary_data,
+        sample_rate=SAMPLE_RATE,
+        channels=CHANNELS,
+        volume=VOLUME_GAIN,
+        timeout=None,
+    ):
+        """
+        Decode audio to 16-bit PCM on one of the pool's workers.
+
+        Args:
+            binary_data (bytes): Encoded audio (e.g. WebM from MediaRecorder)
+            sample_rate (int): Output sample rate in Hz
+            channels (int): Number of output channels
+            volume (float): Gain applied while decoding
+            timeout (float, optional): Hard time limit in seconds
+
+        Returns:
+            bytes: Interleaved PCM samples
+
+        Raises:
+            DecoderBusyError: If the queue stays full for longer than queue_timeout
+            TranscodeError: If decoding fails or times out
+        """
+        if len(binary_data) > TRANSCODE_MAX_INPUT_BYTES:
+            raise TranscodeError(
+                f"Audio data too large: {len(binary_data)} bytes "
+                f"(limit {TRANSCODE_MAX_INPUT_BYTES})"
+            )
+
+        timeout = TRANSCODE_TIMEOUT if timeout is None else timeout
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count("rejected")
+            raise DecoderBusyError("Audio decoder is busy, please try again")
+
+        try:
+            self._count("jobs")
+            # A crashed worker breaks the whole pool; rebuild it and retry once.
+            # Jobs cancelled because their pool was retired are retried too.
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    future = self._submit(
+                        executor,
+                        _decode_job,
+                        binary_data,
+                        sample_rate,
+                        channels,
+                        volume,
+                    )
+                    return future.result(timeout=timeout)
+                except (BrokenProcessPool, CancelledError):
+                    self.restart(executor)
+                    if attempt == 1:
+                        self._count("failures")
+                        raise TranscodeError("Audio decoder worker crashed")
+                except FutureTimeoutError as e:
+                    self._count("failures")
+                    self.retire(executor, future, timeout)
+                    raise TranscodeError(
+                        f"Audio decoding timed out after {timeout}s"
+                    ) from e
+                except TranscodeError:
+                    self._count("failures")
+                    raise
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        """Stop the health checker and the worker processes."""
+        self._stopped.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._inflight.pop(executor, None)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide decoder pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DecoderPool()
+        return _pool
+
+
+def decode_audio(
+    binary_data, sample_rate=SAMPLE_RATE, channels=CHANNELS, volume=VOLUME_GAIN
+):
+    """
+    Decode captured audio to 16-bit PCM using the configured decoder backend.
+
+    Args:
+        binary_data (bytes): Encoded audio (e.g. WebM from MediaRecorder)
+        sample_rate (int): Output sample rate in Hz
+        channels (int): Number of output channels
+        volume (float): Gain applied while decoding
+
+    Returns:
+        bytes: Interleaved PCM samples
+
+    Raises:
+        TranscodeError: If the audio cannot be decoded
+    """
+    if DECODER_BACKEND == "subprocess":
+        return decode_to_pcm(binary_data, sample_rate, channels, volume)
+    return get_pool().decode(binary_data, sample_rate, channels, volume)
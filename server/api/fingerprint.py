@@ -0,0 +1,440 @@
+"""
+Local Audio Fingerprinting
+
+A small landmark (constellation) fingerprinting engine used as a cache in
+front of ACRCloud. Spectrogram peaks are paired into hashes; clips that
+ACRCloud identified are indexed with their metadata, and new captures that
+line up with an indexed track are answered locally.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger("fingerprint")
+
+# Fingerprint cache configuration
+FINGERPRINT_CACHE_ENABLED = (
+    os.environ.get("FINGERPRINT_CACHE_ENABLED", "true").lower() == "true"
+)
+FINGERPRINT_CACHE_PATH = os.environ.get(
+    "FINGERPRINT_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "fingerprints.npz"),
+)
+FINGERPRINT_MAX_TRACKS = int(os.environ.get("FINGERPRINT_MAX_TRACKS", 500))
+FINGERPRINT_MAX_HASHES_PER_TRACK = int(
+    os.environ.get("FINGERPRINT_MAX_HASHES_PER_TRACK", 50000)
+)
+FINGERPRINT_TTL = float(os.environ.get("FINGERPRINT_TTL", 7 * 24 * 3600))
+FINGERPRINT_MIN_MATCHES = int(os.environ.get("FINGERPRINT_MIN_MATCHES", 20))
+FINGERPRINT_MIN_CONFIDENCE = float(os.environ.get("FINGERPRINT_MIN_CONFIDENCE", 0.05))
+FINGERPRINT_SAVE_INTERVAL = float(os.environ.get("FINGERPRINT_SAVE_INTERVAL", 60))
+
+# Analysis parameters
+FINGERPRINT_SAMPLE_RATE = 8000
+FFT_SIZE = 1024
+HOP_SIZE = 256  # 32ms per frame at 8kHz
+PEAK_FREQ_NEIGHBORHOOD = 10  # bins on each side
+PEAK_TIME_NEIGHBORHOOD = 5  # frames on each side
+PEAK_MIN_DB_ABOVE_MEAN = 10
+FAN_OUT = 5
+MAX_PAIR_FRAMES = 63  # fits in 6 bits
+
+FRAMES_PER_SECOND = FINGERPRINT_SAMPLE_RATE / HOP_SIZE
+
+
+def _to_mono_8k(pcm_data, sample_rate, channels):
+    samples = np.frombuffer(pcm_data, dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples[: len(samples) // channels * channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if sample_rate != FINGERPRINT_SAMPLE_RATE and samples.size:
+        duration = len(samples) / sample_rate
+        target = np.arange(int(duration * FINGERPRINT_SAMPLE_RATE)) / FINGERPRINT_SAMPLE_RATE
+        samples = np.interp(target, np.arange(len(samples)) / sample_rate, samples)
+    return samples.astype(np.float32)
+
+
+def _sliding_max(values, radius, axis):
+    """Maximum over a window of +/- radius along one axis."""
+    result = values.copy()
+    length = values.shape[axis]
+    for shift in range(1, radius + 1):
+        if shift >= length:
+            break
+        lead = [slice(None)] * values.ndim
+        lag = [slice(None)] * values.ndim
+        lead[axis], lag[axis] = slice(shift, None), slice(None, -shift)
+        np.maximum(result[tuple(lag)], values[tuple(lead)], out=result[tuple(lag)])
+        np.maximum(result[tuple(lead)], values[tuple(lag)], out=result[tuple(lead)])
+    return result
+
+
+def fingerprint_pcm(pcm_data, sample_rate, channels):
+    """
+    Compute landmark hashes for a PCM clip.
+
+    Args:
+        pcm_data (bytes): Interleaved 16-bit PCM samples
+        sample_rate (int): Sample rate in Hz
+        channels (int): Number of channels
+
+    Returns:
+        tuple: (hashes, frames) as uint32 and int32 NumPy arrays, where frames
+            is the anchor time of each hash in 32ms frames from the clip start
+    """
+    samples = _to_mono_8k(pcm_data, sample_rate, channels)
+    if len(samples) < FFT_SIZE:
+        return np.empty(0, np.uint32), np.empty(0, np.int32)
+
+    num_frames = 1 + (len(samples) - FFT_SIZE) // HOP_SIZE
+    frames = np.lib.stride_tricks.as_strided(
+        samples,
+        shape=(num_frames, FFT_SIZE),
+        strides=(samples.strides[0] * HOP_SIZE, samples.strides[0]),
+        writeable=False,
+    )
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(FFT_SIZE), axis=1))[:, :512]
+    spectrogram = 20 * np.log10(spectrum + 1e-10)
+
+    # Local maxima that stand out from the overall level form the constellation
+    neighborhood_max = _sliding_max(
+        _sliding_max(spectrogram, PEAK_FREQ_NEIGHBORHOOD, axis=1),
+        PEAK_TIME_NEIGHBORHOOD,
+        axis=0,
+    )
+    threshold = spectrogram.mean() + PEAK_MIN_DB_ABOVE_MEAN
+    peak_times, peak_bins = np.nonzero(
+        (spectrogram == neighborhood_max) & (spectrogram > threshold)
+    )
+    if len(peak_times) < 2:
+        return np.empty(0, np.uint32), np.empty(0, np.int32)
+
+    order = np.lexsort((peak_bins, peak_times))
+    peak_times, peak_bins = peak_times[order], peak_bins[order]
+
+    # Pair each anchor with the next few peaks: hash = f1 (9 bits) | f2 (9 bits) | dt (6 bits)
+    hashes, anchors = [], []
+    for offset in range(1, FAN_OUT + 1):
+        anchor_t, target_t = peak_times[:-offset], peak_times[offset:]
+        dt = target_t - anchor_t
+        valid = (dt > 0) & (dt <= MAX_PAIR_FRAMES)
+        f1 = peak_bins[:-offset][valid].astype(np.uint32)
+        f2 = peak_bins[offset:][valid].astype(np.uint32)
+        hashes.append((f1 << 15) | (f2 << 6) | dt[valid].astype(np.uint32))
+        anchors.append(anchor_t[valid].astype(np.int32))
+
+    return np.concatenate(hashes), np.concatenate(anchors)
+
+
+class FingerprintIndex:
+    """LRU-bounded index of fingerprinted tracks with their identification results."""
+
+    def __init__(
+        self,
+        max_tracks=FINGERPRINT_MAX_TRACKS,
+        ttl=FINGERPRINT_TTL,
+        path=None,
+    ):
+        self.max_tracks = max_tracks
+        self.ttl = ttl
+        self.path = path
+        self._tracks = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+        self.stats = {"lookups": 0, "hits": 0, "evictions": 0, "tracks": 0}
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def add(self, track_key, hashes, frames, result):
+        """
+        Index a clip under a track, merging with earlier clips of the same track.
+
+        Args:
+            track_key (str): Stable track identifier (e.g. ACRCloud acrid)
+            hashes (np.ndarray): Clip hashes from fingerprint_pcm
+            frames (np.ndarray): Hash times, aligned to the track position
+            result (dict): Identification result to return on a match
+        """
+        if len(hashes) == 0:
+            return
+
+        with self._lock:
+            entry = self._tracks.pop(track_key, None)
+            if entry is not None and not self._expired(entry):
+                hashes = np.concatenate([entry["hashes"], hashes])
+                frames = np.concatenate([entry["frames"], frames])
+
+            # Keep one time per hash, sorted so lookups can use binary search
+            hashes, first = np.unique(hashes, return_index=True)
+            frames = frames[first]
+            if len(hashes) > FINGERPRINT_MAX_HASHES_PER_TRACK:
+                keep = np.sort(
+                    np.argsort(frames)[-FINGERPRINT_MAX_HASHES_PER_TRACK:]
+                )
+                hashes, frames = hashes[keep], frames[keep]
+
+            self._tracks[track_key] = {
+                "hashes": hashes,
+                "frames": frames.astype(np.int32),
+                "result": result,
+                "added": time.time(),
+            }
+            while len(self._tracks) > self.max_tracks:
+                self._tracks.popitem(last=False)
+                self.stats["evictions"] += 1
+            self.stats["tracks"] = len(self._tracks)
+            self._dirty = True
+
+        self._maybe_save()
+
+    def _expired(self, entry):
+        return self.ttl > 0 and time.time() - entry["added"] > self.ttl
+
+    @staticmethod
+    def _score(entry, hashes, frames, expected_offset=None, tolerance=0):
+        """Count query hashes that agree on a single time offset with the track."""
+        db_hashes = entry["hashes"]
+        positions = np.searchsorted(db_hashes, hashes)
+        positions[positions >= len(db_hashes)] = 0
+        found = db_hashes[positions] == hashes
+        if not np.any(found):
+            return 0, None
+        offsets = entry["frames"][positions[found]] - frames[found]
+        if expected_offset is not None:
+            offsets = offsets[np.abs(offsets - expected_offset) <= tolerance]
+            if offsets.size == 0:
+                return 0, None
+
+        # Clips rarely start on the same frame grid, so allow +/- 1 frame of jitter
+        low = offsets.min()
+        histogram = np.bincount(offsets - low)
+        smoothed = np.convolve(histogram, np.ones(3, dtype=np.int64), mode="same")
+        best = int(np.argmax(smoothed))
+        return int(smoothed[best]), int(best + low)
+
+    def match(
+        self,
+        hashes,
+        frames,
+        track_keys=None,
+        min_matches=FINGERPRINT_MIN_MATCHES,
+        min_confidence=FINGERPRINT_MIN_CONFIDENCE,
+    ):
+        """
+        Find the indexed track that best matches a clip.
+
+        Args:
+            hashes (np.ndarray): Query hashes from fingerprint_pcm
+            frames (np.ndarray): Query hash times
+            track_keys (list, optional): Restrict the search to these tracks
+            min_matches (int): Minimum number of time-aligned hashes
+            min_confidence (float): Minimum fraction of query hashes that align
+
+        Returns:
+            dict: {"track_key", "result", "matches", "confidence", "offset_frames"}
+                for the best match above the thresholds, or None
+        """
+        self.stats["lookups"] += 1
+        if len(hashes) == 0:
+            return None
+
+        best = None
+        with self._lock:
+            keys = list(self._tracks) if track_keys is None else track_keys
+            for key in keys:
+                entry = self._tracks.get(key)
+                if entry is None:
+                    continue
+                if self._expired(entry):
+                    del self._tracks[key]
+                    continue
+                matches, offset = self._score(entry, hashes, frames)
+                if best is None or matches > best["matches"]:
+                    best = {
+                        "track_key": key,
+                        "result": entry["result"],
+                        "matches": matches,
+                        "offset_frames": offset,
+                    }
+
+            if best is None:
+                return None
+            best["confidence"] = best["matches"] / len(hashes)
+            if best["matches"] < min_matches or best["confidence"] < min_confidence:
+                return None
+
+            self._tracks.move_to_end(best["track_key"])
+            self.stats["hits"] += 1
+            return best
+
+    def update_result(self, track_key, fields):
+        """
+        Merge fields into a track's stored result.
+
+        The result is replaced with an updated copy rather than changed in
+        place, so callers still holding the old one are unaffected.
+
+        Args:
+            track_key (str): Track to update
+            fields (dict): Fields to set on the result
+
+        Returns:
+            bool: True if the track is indexed
+        """
+        with self._lock:
+            entry = self._tracks.get(track_key)
+            if entry is None:
+                return False
+            entry["result"] = dict(entry["result"], **fields)
+            self._dirty = True
+        return True
+
+    def align(self, track_key, hashes, frames, expected_offset, tolerance):
+        """
+        Check a clip against one track at the position it is expected to start.
+
+        Args:
+            track_key (str): Track to check against
+            hashes (np.ndarray): Query hashes from fingerprint_pcm
+            frames (np.ndarray): Query hash times
+            expected_offset (int): Expected track position of the clip start, in frames
+            tolerance (int): Allowed distance from expected_offset, in frames
+
+        Returns:
+            dict: {"matches", "offset_frames", "indexed"}, where matches counts
+                hashes aligned near expected_offset and indexed counts the
+                track's hashes in the span the clip should cover, or None if
+                the track is not indexed
+        """
+        with self._lock:
+            entry = self._tracks.get(track_key)
+            if entry is None or self._expired(entry):
+                return None
+            span = int(frames.max()) if len(frames) else 0
+            track_frames = entry["frames"]
+            indexed = np.count_nonzero(
+                (track_frames >= expected_offset)
+                & (track_frames <= expected_offset + span)
+            )
+            matches, offset = 0, None
+            if len(hashes):
+                matches, offset = self._score(
+                    entry, hashes, frames, expected_offset, tolerance
+                )
+        return {"matches": matches, "offset_frames": offset, "indexed": int(indexed)}
+
+    def save(self, path=None):
+        """Write the index to disk atomically."""
+        path = path or self.path
+        if not path:
+            return
+
+        with self._lock:
+            keys = list(self._tracks)
+            entries = [self._tracks[key] for key in keys]
+            self._dirty = False
+            self._last_save = time.time()
+
+        metadata = [
+            {
+                "track_key": key,
+                "result": entry["result"],
+                "added": entry["added"],
+                "size": len(entry["hashes"]),
+            }
+            for key, entry in zip(keys, entries)
+        ]
+        empty_u32, empty_i32 = np.empty(0, np.uint32), np.empty(0, np.int32)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as index_file:
+            np.savez_compressed(
+                index_file,
+                hashes=np.concatenate([e["hashes"] for e in entries] or [empty_u32]),
+                frames=np.concatenate([e["frames"] for e in entries] or [empty_i32]),
+                metadata=np.array(json.dumps(metadata)),
+            )
+        os.replace(tmp_path, path)
+        logger.info(f"Saved fingerprint index with {len(keys)} tracks to {path}")
+
+    def load(self, path=None):
+        """Load a previously saved index, ignoring missing or unreadable files."""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                hashes, frames = data["hashes"], data["frames"]
+                metadata = json.loads(str(data["metadata"]))
+        except Exception as e:
+            logger.warning(f"Could not load fingerprint index from {path}: {e}")
+            return
+
+        with self._lock:
+            start = 0
+            for item in metadata:
+                end = start + item["size"]
+                self._tracks[item["track_key"]] = {
+                    "hashes": hashes[start:end],
+                    "frames": frames[start:end],
+                    "result": item["result"],
+                    "added": item["added"],
+                }
+                start = end
+            self.stats["tracks"] = len(self._tracks)
+        logger.info(f"Loaded fingerprint index with {len(metadata)} tracks from {path}")
+
+    def save_if_dirty(self):
+        """Save the index if it changed since the last save."""
+        if self._dirty:
+            self._save_quietly()
+
+    def _maybe_save(self):
+        if not self.path or not self._dirty:
+            return
+        if time.time() - self._last_save < FINGERPRINT_SAVE_INTERVAL:
+            return
+        self._last_save = time.time()
+        threading.Thread(target=self._save_quietly, daemon=True).start()
+
+    def _save_quietly(self):
+        try:
+            self.save()
+        except Exception as e:
+            logger.error(f"Failed to save fingerprint index: {e}")
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the process-wide fingerprint index, loading it from disk on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FingerprintIndex(path=FINGERPRINT_CACHE_PATH)
+            _index.load()
+            atexit.register(_index.save_if_dirty)
+        return _index
+
+
+def ms_to_frames(milliseconds):
+    """Convert a track position in milliseconds to fingerprint frames."""
+    return int(round(milliseconds / 1000 * FRAMES_PER_SECOND))
+
+
+def frames_to_ms(frames):
+    """Convert a track position in fingerprint frames to milliseconds."""
+    return int(round(frames / FRAMES_PER_SECOND * 1000))
@@ -6,14 +6,30 @@ Handles AI-powered features using Google's Gemini API:
 2. Song meaning explanations
 3. Similar song recommendations
 4. Lyrics generation (fallback when Genius doesn't have lyrics)
+
+Successful results are kept in a response cache shared by all worker
+processes, keyed by a hash of the operation, model and the inputs that go
+into its prompt, so repeated requests for popular songs skip Gemini.
 """
 
+import hashlib
+import json
 import logging
 import os
 import re  # Added for post-processing of lyrics
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
 
 import google.generativeai as genai
+from api.cache import TieredCache
+from api.lyrics_chunks import count_tokens, join_chunks, split_chunks
+from api.singleflight import single_flight
+from api.translation_memory import (
+    TRANSLATION_MEMORY_ENABLED,
+    assemble,
+    translation_memory,
+    unique_lines,
+)
 from dotenv import load_dotenv
 
 # Configure logging
@@ -29,6 +45,24 @@ load_dotenv()
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
 MODEL_NAME = "gemini-2.0-flash"  # Updated to use gemini-2.0-flash model
 
+# Response cache configuration
+GEMINI_CACHE_ENABLED = os.environ.get("GEMINI_CACHE_ENABLED", "true").lower() == "true"
+GEMINI_CACHE_TTL = int(os.environ.get("GEMINI_CACHE_TTL", 30 * 24 * 3600))
+GEMINI_CACHE_MEMORY_SIZE = int(os.environ.get("GEMINI_CACHE_MEMORY_SIZE", 256))
+GEMINI_CACHE_MAX_ENTRIES = int(os.environ.get("GEMINI_CACHE_MAX_ENTRIES", 20000))
+# Bump when prompts change so old responses are no longer used
+PROMPT_VERSION = 1
+
+# Batch translation configuration
+TRANSLATION_BATCH_MAX_LANGUAGES = int(
+    os.environ.get("TRANSLATION_BATCH_MAX_LANGUAGES", 10)
+)
+TRANSLATION_BATCH_WORKERS = int(os.environ.get("TRANSLATION_BATCH_WORKERS", 4))
+
+# Long lyrics are translated in chunks of about this many tokens, in parallel
+TRANSLATION_CHUNK_TOKENS = int(os.environ.get("TRANSLATION_CHUNK_TOKENS", 800))
+TRANSLATION_CHUNK_WORKERS = int(os.environ.get("TRANSLATION_CHUNK_WORKERS", 4))
+
 # Configure the Gemini API
 if GEMINI_API_KEY:
     logger.info("Gemini API key found, configuring API client")
@@ -39,6 +73,73 @@ else:
     )
 
 
+gemini_cache = TieredCache(
+    "gemini_responses",
+    ttl=GEMINI_CACHE_TTL,
+    memory_size=GEMINI_CACHE_MEMORY_SIZE,
+    max_entries=GEMINI_CACHE_MAX_ENTRIES,
+)
+
+
+def response_cache_key(operation: str, inputs: Dict[str, Any]) -> str:
+    """
+    Build the response cache key of a Gemini operation.
+
+    Args:
+        operation (str): Operation name, e.g. "translate"
+        inputs (dict): The inputs that go into the operation's prompt
+
+    Returns:
+        str: SHA-256 hex digest of the operation, model, prompt version and inputs
+    """
+    payload = json.dumps(
+        [operation, MODEL_NAME, PROMPT_VERSION, inputs],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_operation(
+    operation: str, inputs: Dict[str, Any], fn, *args
+) -> Dict[str, Any]:
+    """
+    Run a Gemini operation through the response cache.
+
+    Concurrent identical requests share one Gemini call. Only successful
+    Gemini results are stored, never errors or mock data.
+
+    Args:
+        operation (str): Operation name
+        inputs (dict): The inputs that go into the operation's prompt
+        fn (callable): Function that calls Gemini
+        *args: Arguments for fn
+
+    Returns:
+        dict: Operation result
+    """
+    key = response_cache_key(operation, inputs)
+    if GEMINI_CACHE_ENABLED:
+        cached = gemini_cache.get(key)
+        if cached is not None:
+            logger.info(f"Gemini response cache hit for {operation}")
+            return dict(cached)
+
+    result = single_flight(f"gemini_{operation}", key, _call_and_cache, key, fn, *args)
+    return dict(result)
+
+
+def _call_and_cache(key: str, fn, *args) -> Dict[str, Any]:
+    result = fn(*args)
+    if (
+        GEMINI_CACHE_ENABLED
+        and result.get("status") == "success"
+        and result.get("api_used", "gemini") == "gemini"
+    ):
+        gemini_cache.set(key, result)
+    return result
+
+
 def is_configured() -> bool:
     """Check if Gemini API is configured properly"""
     # Reload environment variables to ensure we have the latest
@@ -70,6 +171,16 @@ def get_lyrics_by_gemini(title: str, artist: str) -> Dict[str, Any]:
     Returns:
         dict: Lyrics result
     """
+    return cached_operation(
+        "lyrics",
+        {"title": title, "artist": artist},
+        _get_lyrics_by_gemini,
+        title,
+        artist,
+    )
+
+
+def _get_lyrics_by_gemini(title: str, artist: str) -> Dict[str, Any]:
     try:
         if not is_configured():
             logger.warning(f"Using mock lyrics for '{title}' by '{artist}'")
@@ -178,34 +289,438 @@ def translate_lyrics(
     Returns:
         dict: Translation result
     """
+    return cached_operation(
+        "translate",
+        {"lyrics": lyrics, "source_lang": source_lang, "target_lang": target_lang},
+        _translate_lyrics,
+        lyrics,
+        source_lang,
+        target_lang,
+    )
+
+
+def _translate_lyrics(
+    lyrics: str, source_lang: str = "auto", target_lang: str = "French"
+) -> Dict[str, Any]:
+    if not is_configured():
+        logger.warning(f"Using mock translation for {source_lang} -> {target_lang}")
+        return mock_translate_lyrics(lyrics, target_lang)
+
+    if TRANSLATION_MEMORY_ENABLED:
+        return _translate_with_memory(lyrics, source_lang, target_lang)
+    return _translate_full(lyrics, source_lang, target_lang)
+
+
+def _translate_with_memory(
+    lyrics: str, source_lang: str, target_lang: str
+) -> Dict[str, Any]:
+    """
+    Translate lyrics using the translation memory, sending only unseen lines to Gemini.
+
+    Args:
+        lyrics (str): The original lyrics to translate
+        source_lang (str): Source language (or "auto" for auto-detection)
+        target_lang (str): Target language for translation
+
+    Returns:
+        dict: Translation result, with the same line structure as the lyrics
+    """
+    known, missing = translation_memory.lookup(lyrics, target_lang)
+    if missing:
+        translated = _translate_lines_chunked(missing, source_lang, target_lang)
+        if translated is None:
+            # Translate the whole text instead, and remember its lines if they line up
+            result = _translate_full(lyrics, source_lang, target_lang)
+            if result.get("status") == "success":
+                translation_memory.learn(
+                    lyrics, result["translated_lyrics"], target_lang
+                )
+            return result
+
+        new_translations = dict(zip(missing, translated))
+        translation_memory.store(new_translations, target_lang)
+        known.update(new_translations)
+
+    logger.info(
+        f"Translated {len(missing)} lines with Gemini, "
+        f"{len(known) - len(missing)} from translation memory"
+    )
+    return _memory_translation(lyrics, source_lang, target_lang, known, len(missing))
+
+
+def _memory_translation(
+    lyrics: str,
+    source_lang: str,
+    target_lang: str,
+    translations: Dict[str, str],
+    lines_translated: int,
+) -> Dict[str, Any]:
+    """Build a translation result from line translations."""
+    return {
+        "status": "success",
+        "original_lyrics": lyrics,
+        "translated_lyrics": assemble(lyrics, translations),
+        "source_language": source_lang,
+        "target_language": target_lang,
+        "api_used": "gemini",
+        "lines_from_memory": len(translations) - lines_translated,
+        "lines_translated": lines_translated,
+    }
+
+
+def _translate_lines_chunked(
+    lines: List[str], source_lang: str, target_lang: str
+) -> Optional[List[str]]:
+    """
+    Translate lyric lines one for one, in parallel batches of about
+    TRANSLATION_CHUNK_TOKENS tokens when there are many of them.
+
+    Args:
+        lines (list): Distinct lyric lines, in song order
+        source_lang (str): Source language (or "auto" for auto-detection)
+        target_lang (str): Target language for translation
+
+    Returns:
+        list: Translated lines in the same order, or None if any batch failed
+    """
+    batches = _line_batches(lines)
+    if len(batches) == 1:
+        return _translate_lines(lines, source_lang, target_lang)
+
+    logger.info(f"Translating {len(lines)} lines in {len(batches)} parallel batches")
+    workers = min(len(batches), TRANSLATION_CHUNK_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(
+                lambda batch: _translate_lines(batch, source_lang, target_lang),
+                batches,
+            )
+        )
+    if any(result is None for result in results):
+        return None
+    return [line for result in results for line in result]
+
+
+def _line_batches(lines: List[str]) -> List[List[str]]:
+    """Split lines, in order, into batches of about TRANSLATION_CHUNK_TOKENS tokens."""
+    batches = [[]]
+    batch_tokens = 0
+    for line in lines:
+        tokens = count_tokens(line)
+        if batches[-1] and batch_tokens + tokens > TRANSLATION_CHUNK_TOKENS:
+            batches.append([])
+            batch_tokens = 0
+        batches[-1].append(line)
+        batch_tokens += tokens
+    return batches
+
+
+def _translate_lines(
+    lines: List[str], source_lang: str, target_lang: str
+) -> Optional[List[str]]:
+    """
+    Translate lyric lines one for one with Gemini.
+
+    Args:
+        lines (list): Distinct lyric lines, in song order
+        source_lang (str): Source language (or "auto" for auto-detection)
+        target_lang (str): Target language for translation
+
+    Returns:
+        list: Translated lines in the same order, or None if Gemini failed or
+            did not return one translation per line
+    """
     try:
-        if not is_configured():
-            logger.warning(f"Using mock translation for {source_lang} -> {target_lang}")
-            return mock_translate_lyrics(lyrics, target_lang)
+        logger.info(
+            f"Calling Gemini API to translate {len(lines)} lines: "
+            f"{source_lang} -> {target_lang}"
+        )
+
+        prompt = f"""
+        Translate each line of these song lyrics from {source_lang} to {target_lang}.
+        The lines are given as a JSON array, in the order they appear in the song:
+
+        {json.dumps(lines, ensure_ascii=False, indent=0)}
+
+        Rules:
+        1. Return ONLY a JSON array of strings with exactly {len(lines)} items, the translation of each line at the same position
+        2. Translate every line into a single line; never merge or split lines
+        3. Maintain the musicality and flow where possible
+        4. Focus on conveying the meaning rather than literal translation
+        5. Do not add explanations, notes or section labels like [Verse] or [Chorus]
+        """
+
+        model = genai.GenerativeModel(MODEL_NAME)
+        response = model.generate_content(prompt)
+        if not (response and response.text):
+            logger.error("Gemini API returned empty response for line translation")
+            return None
+
+        translated = json.loads(_json_text(response.text))
+    except Exception as e:
+        logger.error(f"Error in Gemini line translation: {str(e)}")
+        return None
+
+    return _clean_line_translations(translated, lines)
+
+
+def _json_text(text: str) -> str:
+    """Extract JSON from a response that might be wrapped in a markdown code block."""
+    text = text.strip()
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].strip()
+    return text
+
+
+def _clean_line_translations(translated: Any, lines: List[str]) -> Optional[List[str]]:
+    """
+    Check that Gemini returned one translation per line, and tidy them up.
 
+    Args:
+        translated: Parsed JSON returned for the lines
+        lines (list): Lines that were sent for translation
+
+    Returns:
+        list: Translated lines, or None if they don't match the lines one for one
+    """
+    if (
+        not isinstance(translated, list)
+        or len(translated) != len(lines)
+        or not all(isinstance(line, str) and line.strip() for line in translated)
+    ):
+        logger.warning(
+            f"Gemini returned {len(translated) if isinstance(translated, list) else 0} "
+            f"translated lines for {len(lines)} lines"
+        )
+        return None
+
+    # Remove any section labels and keep each translation on one line
+    return [" ".join(re.sub(r"\[.*?\]", "", line).split()) for line in translated]
+
+
+def translate_lyrics_batch(
+    lyrics: str, target_langs: List[str], source_lang: str = "auto"
+) -> Dict[str, Any]:
+    """
+    Translate song lyrics into several languages at once.
+
+    Cached translations are reused. The lines still to translate for every
+    other language (all distinct lines, less those in the translation memory)
+    are sent to Gemini in requests that return every language, split into
+    batches of about TRANSLATION_CHUNK_TOKENS tokens like translate_lyrics.
+    Each language only takes the lines it was missing. Languages missing
+    from the response are translated one by one in parallel, like
+    translate_lyrics. Each translation is cached under the same key as
+    translate_lyrics, so later single-language requests reuse it.
+
+    Args:
+        lyrics (str): The original lyrics to translate
+        target_langs (list): Target languages
+        source_lang (str): Source language (or "auto" for auto-detection)
+
+    Returns:
+        dict: {"status", "source_language", "translations"}, where
+            translations maps each target language to its translate_lyrics
+            result
+    """
+    languages = list(dict.fromkeys(lang.strip() for lang in target_langs))
+    translations = {}
+    keys = {}
+    for lang in languages:
+        inputs = {"lyrics": lyrics, "source_lang": source_lang, "target_lang": lang}
+        keys[lang] = response_cache_key("translate", inputs)
+        cached = gemini_cache.get(keys[lang]) if GEMINI_CACHE_ENABLED else None
+        if cached is not None:
+            translations[lang] = cached
+
+    pending = [lang for lang in languages if lang not in translations]
+    if pending and is_configured():
+        known = {}
+        missing = {}
+        for lang in pending:
+            if TRANSLATION_MEMORY_ENABLED:
+                known[lang], missing[lang] = translation_memory.lookup(lyrics, lang)
+            else:
+                known[lang], missing[lang] = {}, unique_lines(lyrics)
+
+        # Lines any language still needs, in song order
+        lines = list(dict.fromkeys(line for lang in pending for line in missing[lang]))
+        translated = (
+            _translate_lines_multi_chunked(lines, source_lang, pending) if lines else {}
+        )
+        for lang in pending:
+            if missing[lang] and lang not in translated:
+                continue
+            # Lines the language already had in memory keep their translation
+            translated_lines = dict(zip(lines, translated.get(lang, [])))
+            new_translations = {line: translated_lines[line] for line in missing[lang]}
+            if TRANSLATION_MEMORY_ENABLED:
+                translation_memory.store(new_translations, lang)
+            known[lang].update(new_translations)
+            result = _memory_translation(
+                lyrics, source_lang, lang, known[lang], len(missing[lang])
+            )
+            if GEMINI_CACHE_ENABLED:
+                gemini_cache.set(keys[lang], result)
+            translations[lang] = result
+
+    # Translate whatever is left separately, in parallel
+    pending = [lang for lang in languages if lang not in translations]
+    if pending:
+        workers = min(len(pending), TRANSLATION_BATCH_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                lambda lang: translate_lyrics(lyrics, source_lang, lang), pending
+            )
+            translations.update(zip(pending, results))
+
+    logger.info(
+        f"Batch translated lyrics into {len(languages)} languages, "
+        f"{len(pending)} translated separately"
+    )
+    return {
+        "status": "success",
+        "source_language": source_lang,
+        "translations": {lang: translations[lang] for lang in languages},
+    }
+
+
+def _translate_lines_multi_chunked(
+    lines: List[str], source_lang: str, target_langs: List[str]
+) -> Dict[str, List[str]]:
+    """
+    Translate lyric lines one for one into several languages, in parallel
+    batches of about TRANSLATION_CHUNK_TOKENS tokens when there are many of them.
+
+    Args:
+        lines (list): Distinct lyric lines, in song order
+        source_lang (str): Source language (or "auto" for auto-detection)
+        target_langs (list): Target languages
+
+    Returns:
+        dict: Target language -> translated lines in the same order, for the
+            languages every batch returned one translation per line for
+    """
+    batches = _line_batches(lines)
+    if len(batches) == 1:
+        return _translate_lines_multi(lines, source_lang, target_langs)
+
+    logger.info(
+        f"Translating {len(lines)} lines into {len(target_langs)} languages "
+        f"in {len(batches)} parallel batches"
+    )
+    workers = min(len(batches), TRANSLATION_CHUNK_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(
+                lambda batch: _translate_lines_multi(batch, source_lang, target_langs),
+                batches,
+            )
+        )
+    return {
+        lang: [line for result in results for line in result[lang]]
+        for lang in target_langs
+        if all(lang in result for result in results)
+    }
+
+
+def _translate_lines_multi(
+    lines: List[str], source_lang: str, target_langs: List[str]
+) -> Dict[str, List[str]]:
+    """
+    Translate lyric lines one for one into several languages with one Gemini call.
+
+    Args:
+        lines (list): Distinct lyric lines, in song order
+        source_lang (str): Source language (or "auto" for auto-detection)
+        target_langs (list): Target languages
+
+    Returns:
+        dict: Target language -> translated lines in the same order, for the
+            languages Gemini returned one translation per line for
+    """
+    if len(target_langs) == 1:
+        translated = _translate_lines(lines, source_lang, target_langs[0])
+        return {target_langs[0]: translated} if translated else {}
+
+    try:
         logger.info(
-            f"Calling Gemini API for translation: {source_lang} -> {target_lang}"
+            f"Calling Gemini API to translate {len(lines)} lines from {source_lang} "
+            f"into {len(target_langs)} languages"
         )
 
-        # Create the prompt for translation
         prompt = f"""
-        Translate these lyrics from {source_lang} to {target_lang}:
-        
-        {lyrics}
-        
+        Translate each line of these song lyrics from {source_lang} into each of these languages: {json.dumps(target_langs, ensure_ascii=False)}.
+        The lines are given as a JSON array, in the order they appear in the song:
+
+        {json.dumps(lines, ensure_ascii=False, indent=0)}
+
         Rules:
-        1. Keep the original structure, line breaks, and formatting intact
-        2. Maintain the musicality and flow where possible
-        3. Focus on conveying the meaning rather than literal translation
-        4. Do not add explanations or notes - just provide the translated lyrics
-        5. Ensure proper line breaks:
-           - Each line in the original should correspond to a line in the translation
-           - Preserve blank lines between verses/sections exactly as in the original
-           - Don't add or remove line breaks from the original structure
-        6. Do not add section labels like [Verse] or [Chorus]
-        7. Only output the translated lyrics, nothing else
+        1. Return ONLY a JSON object with one key per language, spelled exactly as given, whose value is an array of strings with exactly {len(lines)} items, the translation of each line at the same position
+        2. Translate every line into a single line; never merge or split lines
+        3. Maintain the musicality and flow where possible
+        4. Focus on conveying the meaning rather than literal translation
+        5. Do not add explanations, notes or section labels like [Verse] or [Chorus]
         """
 
+        model = genai.GenerativeModel(MODEL_NAME)
+        response = model.generate_content(prompt)
+        if not (response and response.text):
+            logger.error("Gemini API returned empty response for batch translation")
+            return {}
+
+        translated = json.loads(_json_text(response.text))
+    except Exception as e:
+        logger.error(f"Error in Gemini batch translation: {str(e)}")
+        return {}
+
+    if not isinstance(translated, dict):
+        logger.warning("Gemini did not return an object of translations per language")
+        return {}
+
+    results = {}
+    for lang in target_langs:
+        cleaned = _clean_line_translations(translated.get(lang), lines)
+        if cleaned is not None:
+            results[lang] = cleaned
+    return results
+
+
+def _translation_prompt(lyrics: str, source_lang: str, target_lang: str) -> str:
+    """Build the prompt for translating whole lyrics."""
+    return f"""
+    Translate these lyrics from {source_lang} to {target_lang}:
+    
+    {lyrics}
+    
+    Rules:
+    1. Keep the original structure, line breaks, and formatting intact
+    2. Maintain the musicality and flow where possible
+    3. Focus on conveying the meaning rather than literal translation
+    4. Do not add explanations or notes - just provide the translated lyrics
+    5. Ensure proper line breaks:
+       - Each line in the original should correspond to a line in the translation
+       - Preserve blank lines between verses/sections exactly as in the original
+       - Don't add or remove line breaks from the original structure
+    6. Do not add section labels like [Verse] or [Chorus]
+    7. Only output the translated lyrics, nothing else
+    """
+
+
+def _translate_full(lyrics: str, source_lang: str, target_lang: str) -> Dict[str, Any]:
+    chunks = split_chunks(lyrics, TRANSLATION_CHUNK_TOKENS)
+    if len(chunks) > 1:
+        return _translate_chunked(lyrics, chunks, source_lang, target_lang)
+
+    try:
+        logger.info(
+            f"Calling Gemini API for translation: {source_lang} -> {target_lang}"
+        )
+
+        prompt = _translation_prompt(lyrics, source_lang, target_lang)
+
         # Generate the translation using Gemini
         model = genai.GenerativeModel(MODEL_NAME)
         logger.info(f"Sending translation request to Gemini model: {MODEL_NAME}")
@@ -250,6 +765,68 @@ def translate_lyrics(
         }
 
 
+def _translate_chunked(
+    lyrics: str, chunks: List[tuple], source_lang: str, target_lang: str
+) -> Dict[str, Any]:
+    """
+    Translate long lyrics as stanza chunks in parallel, then join them in order.
+
+    Args:
+        lyrics (str): The original lyrics to translate
+        chunks (list): (chunk text, separator) pairs from split_chunks
+        source_lang (str): Source language (or "auto" for auto-detection)
+        target_lang (str): Target language for translation
+
+    Returns:
+        dict: Translation result, or the first chunk error
+    """
+    logger.info(
+        f"Translating {count_tokens(lyrics)} tokens of lyrics in {len(chunks)} "
+        f"parallel chunks: {source_lang} -> {target_lang}"
+    )
+    workers = min(len(chunks), TRANSLATION_CHUNK_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(
+                lambda chunk: _translate_full(chunk[0], source_lang, target_lang),
+                chunks,
+            )
+        )
+
+    for result in results:
+        if result.get("status") != "success":
+            return {**result, "original_lyrics": lyrics}
+
+    return {
+        "status": "success",
+        "original_lyrics": lyrics,
+        "translated_lyrics": join_chunks(
+            [result["translated_lyrics"] for result in results], chunks
+        ),
+        "source_language": source_lang,
+        "target_language": target_lang,
+        "api_used": "gemini",
+        "chunks": len(chunks),
+    }
+
+
+def _meaning_prompt(title: str, artist: str, lyrics: str) -> str:
+    """Build the prompt for explaining the meaning of a song."""
+    return f"""
+    Analyze these lyrics for "{title}" by "{artist}":
+    
+    {lyrics}
+    
+    Provide:
+    1. Main theme and message of the song
+    2. Cultural or historical context if relevant
+    3. Hidden meanings or metaphors
+    4. Personal interpretation of emotional impact
+    
+    Format your response with clear sections and keep the explanation concise but insightful (200-300 words total).
+    """
+
+
 def explain_song_meaning(title: str, artist: str, lyrics: str) -> Dict[str, Any]:
     """
     Analyze and explain the meaning behind a song using Gemini.
@@ -262,6 +839,17 @@ def explain_song_meaning(title: str, artist: str, lyrics: str) -> Dict[str, Any]
     Returns:
         dict: Song meaning analysis
     """
+    return cached_operation(
+        "explain",
+        {"title": title, "artist": artist, "lyrics": lyrics},
+        _explain_song_meaning,
+        title,
+        artist,
+        lyrics,
+    )
+
+
+def _explain_song_meaning(title: str, artist: str, lyrics: str) -> Dict[str, Any]:
     try:
         # First check if API key is available
         if not GEMINI_API_KEY:
@@ -283,20 +871,7 @@ def explain_song_meaning(title: str, artist: str, lyrics: str) -> Dict[str, Any]
             f"Using API key: {GEMINI_API_KEY[:4]}... (length: {len(GEMINI_API_KEY)})"
         )
 
-        # Create the prompt for song meaning analysis
-        prompt = f"""
-        Analyze these lyrics for "{title}" by "{artist}":
-        
-        {lyrics}
-        
-        Provide:
-        1. Main theme and message of the song
-        2. Cultural or historical context if relevant
-        3. Hidden meanings or metaphors
-        4. Personal interpretation of emotional impact
-        
-        Format your response with clear sections and keep the explanation concise but insightful (200-300 words total).
-        """
+        prompt = _meaning_prompt(title, artist, lyrics)
 
         # Generate the analysis using Gemini
         try:
@@ -348,6 +923,153 @@ def explain_song_meaning(title: str, artist: str, lyrics: str) -> Dict[str, Any]
         }
 
 
+def stream_translate_lyrics(
+    lyrics: str, source_lang: str = "auto", target_lang: str = "French"
+) -> Iterator[Dict[str, Any]]:
+    """
+    Translate song lyrics, yielding translated lines as Gemini generates them.
+
+    Cached translations, and lyrics whose lines are all in the translation
+    memory, are replayed at once. Otherwise the whole text is translated with
+    Gemini's streaming generation, and the result is cached and remembered
+    line by line like translate_lyrics results.
+
+    Args:
+        lyrics (str): The original lyrics to translate
+        source_lang (str): Source language (or "auto" for auto-detection)
+        target_lang (str): Target language for translation
+
+    Returns:
+        iterator: {"type": "line", "text"} events, then one {"type": "done",
+            "result"} event with the same result as translate_lyrics, or a
+            {"type": "error", "message"} event
+    """
+    inputs = {"lyrics": lyrics, "source_lang": source_lang, "target_lang": target_lang}
+    key = response_cache_key("translate", inputs)
+    result = gemini_cache.get(key) if GEMINI_CACHE_ENABLED else None
+    if result is None and not is_configured():
+        result = mock_translate_lyrics(lyrics, target_lang)
+    if result is None and TRANSLATION_MEMORY_ENABLED:
+        known, missing = translation_memory.lookup(lyrics, target_lang)
+        if not missing:
+            result = _memory_translation(lyrics, source_lang, target_lang, known, 0)
+    if result is not None:
+        yield from _replay(result, "translated_lyrics")
+        return
+
+    logger.info(f"Streaming translation from Gemini: {source_lang} -> {target_lang}")
+    prompt = _translation_prompt(lyrics, source_lang, target_lang)
+    lines = []
+    try:
+        for line in _stream_lines(prompt):
+            # Remove any section labels
+            line = re.sub(r"\[.*?\]", "", line)
+            if lines or line.strip():
+                lines.append(line)
+                yield {"type": "line", "text": line}
+    except Exception as e:
+        logger.exception(f"Error in Gemini streaming translation: {str(e)}")
+        yield {"type": "error", "message": f"Error translating lyrics: {str(e)}"}
+        return
+
+    # Remove enclosing quotes if present
+    translated_lyrics = re.sub(r'^"(.*)"$', r"\1", "\n".join(lines).strip())
+    if not translated_lyrics:
+        yield {"type": "error", "message": "Failed to generate translation"}
+        return
+
+    result = {
+        "status": "success",
+        "original_lyrics": lyrics,
+        "translated_lyrics": translated_lyrics,
+        "source_language": source_lang,
+        "target_language": target_lang,
+        "api_used": "gemini",
+    }
+    if TRANSLATION_MEMORY_ENABLED:
+        translation_memory.learn(lyrics, translated_lyrics, target_lang)
+    if GEMINI_CACHE_ENABLED:
+        gemini_cache.set(key, result)
+    yield {"type": "done", "result": result}
+
+
+def stream_explain_song_meaning(
+    title: str, artist: str, lyrics: str
+) -> Iterator[Dict[str, Any]]:
+    """
+    Explain the meaning of a song, yielding lines as Gemini generates them.
+
+    Args:
+        title (str): Song title
+        artist (str): Artist name
+        lyrics (str): Song lyrics
+
+    Returns:
+        iterator: {"type": "line", "text"} events, then one {"type": "done",
+            "result"} event with the same result as explain_song_meaning, or a
+            {"type": "error", "message"} event
+    """
+    key = response_cache_key(
+        "explain", {"title": title, "artist": artist, "lyrics": lyrics}
+    )
+    result = gemini_cache.get(key) if GEMINI_CACHE_ENABLED else None
+    if result is None and not is_configured():
+        result = mock_explain_song_meaning(title, artist)
+    if result is not None:
+        yield from _replay(result, "meaning")
+        return
+
+    logger.info(f"Streaming song meaning from Gemini: '{title}' by '{artist}'")
+    lines = []
+    try:
+        for line in _stream_lines(_meaning_prompt(title, artist, lyrics)):
+            if lines or line.strip():
+                lines.append(line)
+                yield {"type": "line", "text": line}
+    except Exception as e:
+        logger.exception(f"Error in Gemini streaming song meaning: {str(e)}")
+        yield {"type": "error", "message": f"Error analyzing song meaning: {str(e)}"}
+        return
+
+    meaning = "\n".join(lines).strip()
+    if not meaning:
+        yield {"type": "error", "message": "Failed to analyze song meaning"}
+        return
+
+    result = {
+        "status": "success",
+        "title": title,
+        "artist": artist,
+        "meaning": meaning,
+        "api_used": "gemini",
+    }
+    if GEMINI_CACHE_ENABLED:
+        gemini_cache.set(key, result)
+    yield {"type": "done", "result": result}
+
+
+def _stream_lines(prompt: str) -> Iterator[str]:
+    """Generate a response with Gemini's streaming API, yielding complete lines."""
+    model = genai.GenerativeModel(MODEL_NAME)
+    buffer = ""
+    for chunk in model.generate_content(prompt, stream=True):
+        buffer += chunk.text
+        *lines, buffer = buffer.split("\n")
+        yield from lines
+    if buffer:
+        yield buffer
+
+
+def _replay(result: Dict[str, Any], text_field: str) -> Iterator[Dict[str, Any]]:
+    """Yield the events of a streamed operation for an already known result."""
+    if result.get("status") != "success":
+        yield {"type": "error", "message": result.get("message", "Unknown error")}
+        return
+    for line in result[text_field].split("\n"):
+        yield {"type": "line", "text": line}
+    yield {"type": "done", "result": result}
+
+
 def get_similar_songs(title: str, artist: str, lyrics: str) -> Dict[str, Any]:
     """
     Get recommendations for similar songs based on the current song.
@@ -360,6 +1082,19 @@ def get_similar_songs(title: str, artist: str, lyrics: str) -> Dict[str, Any]:
     Returns:
         dict: List of similar song recommendations
     """
+    # Extract first few lines of lyrics for context (to keep prompt size reasonable)
+    lyrics_preview = "\n".join(lyrics.split("\n")[:10])
+    return cached_operation(
+        "similar",
+        {"title": title, "artist": artist, "lyrics_preview": lyrics_preview},
+        _get_similar_songs,
+        title,
+        artist,
+        lyrics_preview,
+    )
+
+
+def _get_similar_songs(title: str, artist: str, lyrics_preview: str) -> Dict[str, Any]:
     try:
         if not is_configured():
             logger.warning(f"Using mock similar songs for '{title}' by '{artist}'")
@@ -367,9 +1102,6 @@ def get_similar_songs(title: str, artist: str, lyrics: str) -> Dict[str, Any]:
 
         logger.info(f"Calling Gemini API for similar songs: '{title}' by '{artist}'")
 
-        # Extract first few lines of lyrics for context (to keep prompt size reasonable)
-        lyrics_preview = "\n".join(lyrics.split("\n")[:10])
-
         # Create the prompt for similar songs
         prompt = f"""
         Based on the song "{title}" by "{artist}" with these lyrics:
@@ -403,8 +1135,6 @@ def get_similar_songs(title: str, artist: str, lyrics: str) -> Dict[str, Any]:
 
         if response and response.text:
             # Parse the JSON response
-            import json
-
             try:
                 logger.info("Successfully received similar songs from Gemini API")
                 # Extract JSON from response (might be wrapped in markdown code block)
@@ -467,6 +1197,19 @@ def format_lyrics_with_gemini(
     Returns:
         dict: Formatted lyrics result
     """
+    return cached_operation(
+        "format",
+        {"lyrics": raw_lyrics, "title": title, "artist": artist},
+        _format_lyrics_with_gemini,
+        raw_lyrics,
+        title,
+        artist,
+    )
+
+
+def _format_lyrics_with_gemini(
+    raw_lyrics: str, title: str = "", artist: str = ""
+) -> Dict[str, Any]:
     try:
         if not is_configured():
             logger.warning("Gemini not configured, returning original lyrics")
@@ -4,17 +4,72 @@ Genius API Integration
 Handles fetching lyrics using the Genius API.
 """
 
+import codecs
+import difflib
+import logging
 import os
-import random
 import re
-import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-import requests
-from bs4 import BeautifulSoup
+from api.cache import normalize_text
+from api.html_extract import LyricsExtractor, extract_lyrics_text
+from api.http_client import get_client, iter_response_bytes, wire_bytes_read
+from api.lyrics_text import check_lyrics, format_lyrics, process_lyrics
+from api.singleflight import single_flight
+
+logger = logging.getLogger("genius")
 
 # Genius API configuration
 GENIUS_ACCESS_TOKEN = os.environ.get("GENIUS_ACCESS_TOKEN", "")
 GENIUS_BASE_URL = "https://api.genius.com"
+# Minimum match score (0-1) for a search hit to be considered the requested song
+GENIUS_MIN_HIT_SCORE = float(os.environ.get("GENIUS_MIN_HIT_SCORE", 0.5))
+# Maximum candidate pages scraped per lyrics request
+GENIUS_MAX_CANDIDATES = int(os.environ.get("GENIUS_MAX_CANDIDATES", 2))
+# "sequential" scrapes candidates one at a time; "speculative" scrapes them all at once
+GENIUS_SCRAPE_MODE = os.environ.get("GENIUS_SCRAPE_MODE", "sequential").lower()
+# Page downloads in flight at once across all speculative lookups
+GENIUS_SCRAPE_CONCURRENCY = int(os.environ.get("GENIUS_SCRAPE_CONCURRENCY", 4))
+# Parse song pages while they download and stop once the lyrics are complete
+GENIUS_STREAM_SCRAPE = os.environ.get("GENIUS_STREAM_SCRAPE", "true").lower() == "true"
+GENIUS_STREAM_CHUNK_SIZE = int(os.environ.get("GENIUS_STREAM_CHUNK_SIZE", 16384))
+# Stop reading once this many bytes pass after a lyrics container without another one
+GENIUS_STREAM_TAIL_BYTES = int(os.environ.get("GENIUS_STREAM_TAIL_BYTES", 65536))
+
+# Hits credited to these accounts are translations, charts or playlists
+NON_ARTIST_ACCOUNTS = re.compile(
+    r"(?i)^(?:genius\b|spotify$|apple music$|billboard$|rolling stone$)"
+)
+# Titles of list and playlist pages
+LIST_PAGE_TITLES = re.compile(
+    r"(?i)\b(?:best|worst|top \d+|year[- ]end|playlist|tracklist|songs of \d{4})\b"
+)
+
+# Upstream calls made, for measuring calls per lyrics request
+stats = {
+    "lyrics_requests": 0,
+    "searches": 0,
+    "scrapes": 0,
+    "scrapes_cancelled": 0,
+    "scrapes_aborted": 0,
+    "scrapes_stopped_early": 0,
+    "scrape_bytes_read": 0,
+    "scrape_bytes_saved": 0,
+}
+
+
+class GeniusSearchError(Exception):
+    """Raised when a Genius search request fails, as opposed to finding nothing."""
+
+
+class ScrapeCancelled(Exception):
+    """Raised inside a page scrape whose result is no longer needed."""
+
+
+scrape_executor = ThreadPoolExecutor(
+    max_workers=GENIUS_SCRAPE_CONCURRENCY, thread_name_prefix="genius-scrape"
+)
 
 
 def get_lyrics_by_song(title, artist=""):
@@ -31,90 +86,67 @@ def get_lyrics_by_song(title, artist=""):
     try:
         # For development/testing, use mock response if no API token
         if not GENIUS_ACCESS_TOKEN:
-            print("Warning: Using mock lyrics as Genius API token is not set")
+            logger.warning("Using mock lyrics as Genius API token is not set")
             return mock_get_lyrics(title, artist)
 
-        # Search for the song
-        search_term = f"{title} {artist}".strip()
-        song_url = search_song(search_term)
+        stats["lyrics_requests"] += 1
 
-        if not song_url:
+        # Search once and pick the best matching hits locally
+        candidates = rank_hits(search_hits(f"{title} {artist}".strip()), title, artist)
+        if not candidates and artist:
             # Try again with just the title if artist was provided
-            if artist:
-                song_url = search_song(title)
-
-        # Fetch and extract lyrics
-        if song_url:
-            raw_lyrics = scrape_lyrics(song_url)
-            if raw_lyrics:
-                # Validate that the content looks like actual lyrics
-                if not is_valid_lyrics(raw_lyrics, title, artist):
-                    print(
-                        f"Content doesn't appear to be valid lyrics for {title} by {artist}"
-                    )
-                    # Try again with a more specific search
-                    specific_search = f"{title} {artist}".strip()
-                    print(f"Trying specific search for lyrics: {specific_search}")
-                    second_song_url = search_song(specific_search)
-                    # print(second_song_url)
-                    # print(f"Trying alternative search for lyrics: {specific_search}")
-                    if second_song_url and second_song_url != song_url:
-                        print(f"Trying alternative URL for lyrics: {second_song_url}")
-                        raw_lyrics = scrape_lyrics(second_song_url)
-                        if not is_valid_lyrics(raw_lyrics, title, artist):
-                            print("Alternative URL also didn't provide valid lyrics")
-                            raw_lyrics = ""  # Reset to empty to trigger fallback
-
-                # Try to clean up the lyrics using Gemini if available
-                if raw_lyrics:
-                    try:
-                        from api.gemini import format_lyrics_with_gemini, is_configured
-
-                        if is_configured():
-                            print(
-                                f"Using Gemini to format lyrics for {title} by {artist}"
-                            )
-                            formatted_result = format_lyrics_with_gemini(
-                                raw_lyrics, title, artist
-                            )
-
-                            # If Gemini formatting was successful, use those lyrics
-                            if (
-                                formatted_result
-                                and formatted_result.get("status") == "success"
-                            ):
-                                lyrics = formatted_result.get("lyrics", raw_lyrics)
-                                return {
-                                    "status": "success",
-                                    "title": title,
-                                    "artist": artist,
-                                    "lyrics": lyrics,
-                                    "source_url": song_url,
-                                    "formatting": "gemini",
-                                }
-                    except Exception as formatting_error:
-                        print(f"Error using Gemini for formatting: {formatting_error}")
-                        # Continue with original lyrics if Gemini formatting fails
-
-                    # Return original lyrics if Gemini formatting wasn't available or failed
-                    return {
-                        "status": "success",
-                        "title": title,
-                        "artist": artist,
-                        "lyrics": raw_lyrics,
-                        "source_url": song_url,
-                        "formatting": "basic",
-                    }
-
-        # If we get here, we couldn't find lyrics
+            candidates = rank_hits(search_hits(title), title, artist)
+
+        # Fetch and extract lyrics, moving on to the next candidate if a page
+        # doesn't look like lyrics
+        candidates = candidates[:GENIUS_MAX_CANDIDATES]
+        if GENIUS_SCRAPE_MODE == "speculative" and len(candidates) > 1:
+            song_url, song_lyrics = scrape_best_candidate(candidates, title, artist)
+        else:
+            song_url, song_lyrics = None, ""
+            for candidate in candidates:
+                lyrics, check = scrape_lyrics(candidate["url"])
+                if check.valid:
+                    song_url, song_lyrics = candidate["url"], lyrics
+                    break
+                logger.info(
+                    f"Content at {candidate['url']} doesn't appear to be valid lyrics "
+                    f"for {title} by {artist} ({check.reason})"
+                )
+
+        if song_lyrics:
+            # Lyrics were laid out by the local formatter when scraped; Gemini
+            # formatting, if enabled, is applied later by api.lyrics
+            return {
+                "status": "success",
+                "title": title,
+                "artist": artist,
+                "lyrics": song_lyrics,
+                "source_url": song_url,
+                "formatting": "basic",
+            }
+
+        # If we get here, every search succeeded and no page had lyrics
         return {
             "status": "error",
+            "error_code": "not_found",
             "message": f"Could not find lyrics for {title} by {artist}",
             "title": title,
             "artist": artist,
             "lyrics": "",
         }
 
+    except GeniusSearchError as e:
+        logger.warning(f"Genius search failed: {str(e)}")
+        return {
+            "status": "error",
+            "error_code": "search_failed",
+            "message": f"Error searching Genius: {str(e)}",
+            "title": title,
+            "artist": artist,
+            "lyrics": "",
+        }
+
     except Exception as e:
         return {
             "status": "error",
@@ -125,220 +157,318 @@ def get_lyrics_by_song(title, artist=""):
         }
 
 
-def is_valid_lyrics(text, title, artist):
+def scrape_best_candidate(candidates, title, artist=""):
     """
-    Validate if the scraped content appears to be actual lyrics.
+    Scrape candidate pages concurrently and return the best valid lyrics.
+
+    A candidate is accepted once it is valid and every better-ranked candidate
+    has finished without valid lyrics. Candidates that have not started yet
+    are then cancelled, and running ones stop reading their page.
 
     Args:
-        text (str): The scraped text to validate
-        title (str): Song title
-        artist (str): Artist name
+        candidates (list): Ranked hits from rank_hits, best first
+        title (str): Song title, for validation
+        artist (str): Artist name, for validation
 
     Returns:
-        bool: True if the content appears to be valid lyrics, False otherwise
+        tuple: (song URL, lyrics), or (None, "") if no candidate had valid lyrics
     """
-    if not text:
-        return False
-
-    # Check if the text is too short to be lyrics
-    if len(text.strip()) < 100:
-        return False
-
-    # Check for common patterns that indicate the content is not lyrics
-    non_lyrics_patterns = [
-        r"(?i)best of \d{4}",  # "Best of 2015"
-        r"(?i)worst of \d{4}",  # "Worst of 2015"
-        r"(?i)top \d+ (songs|tracks)",  # "Top 10 songs"
-        r"(?i)#\d+:",  # "#1:", "#2:", etc. (ranking format)
-        r"(?i)honorable mention",  # List articles often have this
-        r"(?i)ft\.\s+[\w\s]+#\d+",  # Artist featuring someone followed by a number/ranking
+    cancel = threading.Event()
+    futures = [
+        scrape_executor.submit(scrape_lyrics, candidate["url"], cancel)
+        for candidate in candidates
     ]
+    results = [None] * len(futures)
+    pending = set(futures)
 
-    for pattern in non_lyrics_patterns:
-        if re.search(pattern, text):
-            print(f"Non-lyrics pattern detected: {pattern}")
-            return False
-
-    # Check if the text has too many instances of "#" followed by a number (ranking lists)
-    ranking_matches = re.findall(r"#\d+", text)
-    if len(ranking_matches) > 3:  # If there are multiple rankings, it's probably a list
-        print(f"Found {len(ranking_matches)} ranking patterns, likely not lyrics")
-        return False
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures.index(future)
+                try:
+                    lyrics, check = future.result()
+                except Exception as e:
+                    logger.warning(f"Error scraping {candidates[index]['url']}: {e}")
+                    lyrics, check = "", check_lyrics("")
+                results[index] = lyrics if check.valid else ""
+
+            # Best-ranked candidate whose result is known and valid, with no
+            # better-ranked candidate still running
+            for index, lyrics in enumerate(results):
+                if lyrics is None:
+                    break
+                if lyrics:
+                    return candidates[index]["url"], lyrics
+    finally:
+        cancel.set()
+        for future in pending:
+            if future.cancel():
+                stats["scrapes_cancelled"] += 1
+
+    logger.info(f"No candidate page had valid lyrics for {title} by {artist}")
+    return None, ""
+
+
+def get_stats():
+    """
+    Report Genius calls made by this process.
 
-    # Check for playlist/song list format with timestamps (e.g., "Artist ~ Song (3:45)")
-    timestamp_pattern = r"[\w\s&]+ ~ [\w\s&\'.]+ \(\d+:\d+\)"
-    timestamp_matches = re.findall(timestamp_pattern, text)
-    if (
-        len(timestamp_matches) > 2
-    ):  # If we find multiple song timestamps, it's a playlist
-        print(f"Found {len(timestamp_matches)} timestamp patterns, likely a playlist")
-        return False
-
-    # Check for comma-separated list of songs
-    comma_separated_songs = re.findall(r",\s*[\w\s&]+ ~ [\w\s&\'.]+ \(\d+:\d+\)", text)
-    if len(comma_separated_songs) > 2:
-        print(
-            f"Found {len(comma_separated_songs)} comma-separated song entries, likely a playlist"
-        )
-        return False
-
-    # Check for multiple artist names separated by commas or line breaks (common in playlists)
-    artist_pattern = r"(?:^|\n|\,)\s*([\w\s&]+),\s*$"
-    artist_matches = re.findall(artist_pattern, text)
-    if len(artist_matches) > 3:
-        print(
-            f"Found {len(artist_matches)} artist name patterns, likely a playlist or list"
-        )
-        return False
+    Returns:
+        dict: Counters plus average searches and scrapes per lyrics request
+    """
+    requests_made = max(1, stats["lyrics_requests"])
+    scrapes = max(1, stats["scrapes"])
+    return dict(
+        stats,
+        searches_per_request=round(stats["searches"] / requests_made, 2),
+        scrapes_per_request=round(stats["scrapes"] / requests_made, 2),
+        bytes_saved_per_scrape=stats["scrape_bytes_saved"] // scrapes,
+    )
 
-    # Check for multiple timestamp patterns (MM:SS) which would indicate a playlist
-    time_pattern = r"\(\d+:\d+\)"
-    time_matches = re.findall(time_pattern, text)
-    if (
-        len(time_matches) > 3
-    ):  # If there are multiple timestamps, it's probably a playlist
-        print(f"Found {len(time_matches)} time patterns, likely a playlist")
-        return False
 
-    # Check for line structure typical of lyrics
-    lines = text.strip().split("\n")
-    short_lines = [line for line in lines if 0 < len(line.strip()) < 80]
+def search_hits(search_term):
+    """
+    Search Genius and return every hit.
 
-    # Lyrics typically have a good percentage of short lines
-    if len(short_lines) < 8 or len(short_lines) / len(lines) < 0.5:
-        print("Line structure doesn't match typical lyrics pattern")
-        return False
+    Concurrent searches for the same term share one request.
 
-    return True
+    Args:
+        search_term (str): Search term
 
+    Returns:
+        list: Genius song results (dicts with "title", "url", "primary_artist", ...)
 
-def search_song(search_term):
+    Raises:
+        GeniusSearchError: If Genius did not answer the search (auth, rate
+            limit or server errors), so that no hits is never mistaken for
+            no such song
     """
-    Search for a song on Genius.
+    key = " ".join(search_term.casefold().split())
+    return single_flight("genius_search", key, _search_hits, search_term)
 
-    Args:
-        search_term (str): Search term (title and artist)
 
-    Returns:
-        str: URL of the song page, or None if not found
-    """
+def _search_hits(search_term):
     headers = {"Authorization": f"Bearer {GENIUS_ACCESS_TOKEN}"}
     params = {"q": search_term}
 
-    response = requests.get(f"{GENIUS_BASE_URL}/search", headers=headers, params=params)
+    stats["searches"] += 1
+    response = get_client().get(
+        f"{GENIUS_BASE_URL}/search", headers=headers, params=params
+    )
 
     if response.status_code == 200:
         data = response.json()
         hits = data.get("response", {}).get("hits", [])
+        return [hit["result"] for hit in hits if hit.get("type", "song") == "song"]
+
+    raise GeniusSearchError(f"Genius search returned HTTP {response.status_code}")
+
+
+def _similarity(expected, actual):
+    expected, actual = normalize_text(expected), normalize_text(actual)
+    if not expected or not actual:
+        return 0.0
+    if expected == actual:
+        return 1.0
+    ratio = difflib.SequenceMatcher(None, expected, actual).ratio()
+    # "Halo" vs "Halo (Live)" or "Beyonce" vs "Beyonce & Jay-Z"
+    if expected in actual or actual in expected:
+        ratio = max(ratio, 0.85)
+    return ratio
+
+
+def score_hit(hit, title, artist=""):
+    """
+    Score how well a Genius search hit matches the requested song.
+
+    Args:
+        hit (dict): Genius song result
+        title (str): Requested title
+        artist (str): Requested artist
 
-        # Return URL of first hit if any
-        if hits:
-            return hits[0]["result"]["url"]
+    Returns:
+        float: Score from 0 to 1, or 0 if the hit is not a lyrics page for a song
+    """
+    hit_title = hit.get("title", "")
+    hit_artist = (hit.get("primary_artist") or {}).get("name", "")
+
+    if hit.get("instrumental") or hit.get("lyrics_state") == "unreleased":
+        return 0.0
 
-    return None
+    title_score = max(
+        _similarity(title, hit_title),
+        _similarity(title, hit.get("title_with_featured", "")),
+    )
+
+    # Genius's own translation, chart and list pages (e.g. "Genius English
+    # Translations", "Spotify") are credited to a non-artist account
+    if (
+        NON_ARTIST_ACCOUNTS.search(hit_artist)
+        and not _similarity(artist, hit_artist) > 0.9
+    ):
+        return 0.0
+    if LIST_PAGE_TITLES.search(hit_title) and title_score < 0.9:
+        return 0.0
 
+    if not artist:
+        return title_score
+    artist_score = _similarity(artist, hit_artist)
+    return 0.6 * title_score + 0.4 * artist_score
 
-def scrape_lyrics(url):
+
+def rank_hits(hits, title, artist=""):
+    """
+    Order Genius search hits by how well they match the requested song.
+
+    Args:
+        hits (list): Genius song results from search_hits
+        title (str): Requested title
+        artist (str): Requested artist
+
+    Returns:
+        list: Hits scoring at least GENIUS_MIN_HIT_SCORE, best first, each
+            with a "score" key added
+    """
+    scored = []
+    for hit in hits:
+        score = score_hit(hit, title, artist)
+        if score >= GENIUS_MIN_HIT_SCORE:
+            scored.append(dict(hit, score=score))
+    scored.sort(key=lambda hit: hit["score"], reverse=True)
+    return scored
+
+
+def scrape_lyrics(url, cancel=None):
     """
     Scrape lyrics from a Genius song page.
 
+    Concurrent scrapes of the same page share one download. The lyrics are
+    cleaned and validated together, so callers don't check them again, and
+    valid lyrics are laid out with the local formatter.
+
     Args:
         url (str): URL of the Genius song page
+        cancel (threading.Event, optional): Set to stop the download early
 
     Returns:
-        str: Clean lyrics text, or empty string if not found
+        tuple: (clean lyrics text, or empty string if not found, LyricsCheck)
+
+    Raises:
+        ScrapeCancelled: If cancel was set before the page was read
     """
+    while True:
+        try:
+            return single_flight("genius_scrape", url, _scrape_lyrics, url, cancel)
+        except ScrapeCancelled:
+            if cancel is not None and cancel.is_set():
+                raise
+            # The shared download was cancelled by another lookup; fetch again
+
+
+def _scrape_lyrics(url, cancel=None):
+    if cancel is not None and cancel.is_set():
+        raise ScrapeCancelled(url)
+
+    stats["scrapes"] += 1
     try:
         # Send request with user agent
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36"
         }
-        response = requests.get(url, headers=headers)
-
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # Find lyrics container (may change based on Genius website structure)
-            lyrics_div = soup.find("div", class_=re.compile(r"Lyrics__Container.*"))
-
-            if not lyrics_div:
-                # Try alternate class if first method fails
-                lyrics_div = soup.find("div", class_="lyrics")
-
-            if lyrics_div:
-                # Extract lyrics and perform cleaning
-
-                # Remove unwanted elements
-                for unwanted in lyrics_div.select(
-                    ".InlineAnnotation__Container, .ReferentFragmentVariantdesktop__Container"
-                ):
-                    unwanted.decompose()
-
-                # Extract raw lyrics text
-                lyrics = lyrics_div.get_text()
-
-                # Clean up lyrics text
-                lyrics = re.sub(
-                    r"\d+ Contributors.*?Read More", "", lyrics, flags=re.DOTALL
-                )  # Remove contributors, translations etc.
-                lyrics = re.sub(
-                    r"Translations.*?Lyrics", "", lyrics, flags=re.DOTALL
-                )  # Remove translations section
-                lyrics = re.sub(
-                    r"[\w\s]+ Lyrics", "", lyrics
-                )  # Remove "Song Title Lyrics" text
-                lyrics = re.sub(
-                    r"\[.*?\]", "", lyrics
-                )  # Remove [Verse], [Chorus], etc.
-
-                # More aggressive cleaning of undesirable elements
-                lyrics = re.sub(
-                    r"Embed$", "", lyrics, flags=re.MULTILINE
-                )  # Remove "Embed" text
-                lyrics = re.sub(
-                    r"Share URL$", "", lyrics, flags=re.MULTILINE
-                )  # Remove "Share URL" text
-                lyrics = re.sub(
-                    r"Copy$", "", lyrics, flags=re.MULTILINE
-                )  # Remove "Copy" text
-
-                # Fix line breaks issues
-
-                # Step 1: Normalize all line breaks
-                lyrics = re.sub(r"\r\n", "\n", lyrics)
-
-                # Step 2: Join words broken across lines (lowercase to lowercase)
-                lyrics = re.sub(r"([a-z])[\s]*\n[\s]*([a-z])", r"\1 \2", lyrics)
-
-                # Step 3: Ensure proper spacing around punctuation
-                lyrics = re.sub(r"([.,;:!?])[\s]*\n", r"\1\n", lyrics)
-
-                # Step 4: Preserve intentional line breaks after punctuation
-                lyrics = re.sub(r"([.,;:!?])[\s]*([A-Z])", r"\1\n\2", lyrics)
-
-                # Step 5: Remove excess blank lines but preserve verse structure
-                lyrics = re.sub(r"\n{3,}", "\n\n", lyrics)
-
-                # Remove leading/trailing whitespace from each line
-                lyrics_lines = [line.strip() for line in lyrics.split("\n")]
-                lyrics = "\n".join(lyrics_lines)
-
-                # Final cleanup of excessive whitespace and blank lines
-                lyrics = re.sub(
-                    r" {2,}", " ", lyrics
-                )  # Replace multiple spaces with single space
-                lyrics = re.sub(r"^\n+", "", lyrics)  # Remove leading blank lines
-                lyrics = re.sub(r"\n+$", "", lyrics)  # Remove trailing blank lines
-                lyrics = re.sub(
-                    r"\n{3,}", "\n\n", lyrics
-                )  # Limit consecutive newlines to 2
-
-                return lyrics.strip()
-
+        response = get_client().get(url, headers=headers, stream=GENIUS_STREAM_SCRAPE)
+
+        try:
+            if response.status_code == 200:
+                # Extract the text of the lyrics containers and perform cleaning
+                if GENIUS_STREAM_SCRAPE:
+                    lyrics = stream_lyrics_text(response, url, cancel)
+                else:
+                    lyrics = extract_lyrics_text(response.text)
+                if lyrics:
+                    text, check = process_lyrics(lyrics)
+                    if check.valid:
+                        return format_lyrics(lyrics), check
+                    return text, check
+        finally:
+            response.close()
+
+    except ScrapeCancelled:
+        raise
     except Exception as e:
-        print(f"Error scraping lyrics: {e}")
+        logger.warning(f"Error scraping lyrics: {e}")
+
+    return "", check_lyrics("")
+
+
+def stream_lyrics_text(response, url="", cancel=None):
+    """
+    Extract lyrics from a streamed song page, stopping once they are complete.
+
+    Reading stops when a section that follows the lyrics starts, or when
+    GENIUS_STREAM_TAIL_BYTES pass after a lyrics container without another
+    one, so the scripts and JSON state at the end of the page are never
+    downloaded.
+
+    Args:
+        response (requests.Response | httpx.Response): Response made with stream=True
+        url (str): Page URL, for logging
+        cancel (threading.Event, optional): Checked between chunks; once set,
+            reading stops
+
+    Returns:
+        str: Raw text of the lyrics containers, or an empty string if none were found
+
+    Raises:
+        ScrapeCancelled: If cancel was set while reading
+    """
+    extractor = LyricsExtractor()
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(
+        errors="replace"
+    )
+    bytes_read = 0
+    last_container_end = 0
+    container_count = 0
+    stopped_early = False
+
+    for chunk in iter_response_bytes(response, GENIUS_STREAM_CHUNK_SIZE):
+        if cancel is not None and cancel.is_set():
+            stats["scrapes_aborted"] += 1
+            logger.info(
+                f"Stopped reading {url} after {bytes_read} bytes, no longer needed"
+            )
+            raise ScrapeCancelled(url)
+        bytes_read += len(chunk)
+        extractor.feed(decoder.decode(chunk))
+
+        if extractor.container_count != container_count:
+            container_count = extractor.container_count
+            last_container_end = bytes_read
+        if extractor.done or (
+            container_count
+            and not extractor.in_container
+            and bytes_read - last_container_end > GENIUS_STREAM_TAIL_BYTES
+        ):
+            stopped_early = True
+            break
+    else:
+        extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+
+    # Compare bytes on the wire with the (compressed) page size when it is known
+    wire_bytes = wire_bytes_read(response) or bytes_read
+    total_bytes = response.headers.get("Content-Length")
+    saved_bytes = max(0, int(total_bytes) - wire_bytes) if total_bytes else 0
+    stats["scrape_bytes_read"] += wire_bytes
+    stats["scrape_bytes_saved"] += saved_bytes
+    if stopped_early:
+        stats["scrapes_stopped_early"] += 1
+        logger.info(
+            f"Stopped reading {url} after {wire_bytes} bytes"
+            + (f", saved {saved_bytes} of {total_bytes}" if total_bytes else "")
+        )
 
-    return ""
+    return extractor.text()
 
 
 def mock_get_lyrics(title, artist):
@@ -0,0 +1,235 @@
+"""
+Lyrics HTML Extraction
+
+Pulls the raw lyrics text out of a Genius song page. Only the
+Lyrics__Container divs are needed, so instead of building a full
+BeautifulSoup tree the default backends either use lxml's C parser or stream
+the page through a targeted html.parser extractor that ignores everything
+outside the containers.
+
+Every backend collects all lyrics containers (Genius splits long songs
+across several), skips annotation popups, and turns <br> into line breaks.
+"""
+
+import functools
+import logging
+import os
+import re
+from html.parser import HTMLParser
+
+logger = logging.getLogger("html_extract")
+
+# "auto" uses lxml when installed and the streaming extractor otherwise
+GENIUS_HTML_BACKEND = os.environ.get("GENIUS_HTML_BACKEND", "auto").lower()
+
+CONTAINER_CLASS = "Lyrics__Container"
+# Legacy Genius page layout
+LEGACY_CONTAINER_CLASS = "lyrics"
+# Page sections that follow the last lyrics container
+END_MARKER_CLASSES = ("LyricsFooter__", "SongDescription__", "SongInfo__")
+# Annotation popups rendered inside the lyrics
+SKIPPED_CLASSES = (
+    "InlineAnnotation__Container",
+    "ReferentFragmentVariantdesktop__Container",
+)
+
+VOID_ELEMENTS = frozenset(
+    "area base br col embed hr img input link meta param source track wbr".split()
+)
+
+
+def _is_skipped(class_attr):
+    return any(name in class_attr for name in SKIPPED_CLASSES)
+
+
+class LyricsExtractor(HTMLParser):
+    """
+    Streaming extractor for the lyrics containers of a Genius page.
+
+    Feed the page in one piece or in chunks as it downloads; text outside the
+    lyrics containers is never stored. Once a section that follows the lyrics
+    is reached, done is set and the rest of the page can be skipped.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.containers = []
+        self.legacy_containers = []
+        self._parts = None
+        self._legacy = False
+        self._div_depth = 0
+        self._skip_tag = None
+        self._skip_depth = 0
+        self.done = False
+
+    @property
+    def in_container(self):
+        return self._parts is not None
+
+    @property
+    def container_count(self):
+        return len(self.containers) + len(self.legacy_containers)
+
+    def handle_starttag(self, tag, attrs):
+        if self._parts is None:
+            if tag == "div":
+                class_attr = dict(attrs).get("class") or ""
+                legacy = LEGACY_CONTAINER_CLASS in class_attr.split()
+                if CONTAINER_CLASS in class_attr or legacy:
+                    self._parts = []
+                    self._legacy = legacy
+                    self._div_depth = 1
+                elif self.container_count and any(
+                    marker in class_attr for marker in END_MARKER_CLASSES
+                ):
+                    self.done = True
+            return
+
+        if tag == "div":
+            self._div_depth += 1
+
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+
+        if tag == "br":
+            self._parts.append("\n")
+        elif tag not in VOID_ELEMENTS and _is_skipped(dict(attrs).get("class") or ""):
+            self._skip_tag = tag
+            self._skip_depth = 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/> and friends: never opens an element
+        if self._parts is not None and self._skip_tag is None and tag == "br":
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if self._parts is None:
+            return
+
+        if self._skip_tag is not None and tag == self._skip_tag:
+            self._skip_depth -= 1
+            if self._skip_depth == 0:
+                self._skip_tag = None
+
+        if tag == "div":
+            self._div_depth -= 1
+            if self._div_depth == 0:
+                containers = self.legacy_containers if self._legacy else self.containers
+                containers.append("".join(self._parts))
+                self._parts = None
+                self._skip_tag = None
+
+    def handle_data(self, data):
+        if self._parts is not None and self._skip_tag is None:
+            self._parts.append(data)
+
+    def text(self):
+        """Return the text of all lyrics containers seen so far."""
+        containers = list(self.containers)
+        legacy_containers = list(self.legacy_containers)
+        if self._parts:
+            (legacy_containers if self._legacy else containers).append("".join(self._parts))
+        return "\n".join(containers or legacy_containers)
+
+
+def _extract_stdlib(html):
+    extractor = LyricsExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text()
+
+
+def _extract_lxml(html):
+    from lxml import html as lxml_html
+
+    tree = lxml_html.fromstring(html)
+    containers = tree.xpath(f'//div[contains(@class, "{CONTAINER_CLASS}")]')
+    if not containers:
+        containers = tree.xpath(
+            '//div[contains(concat(" ", normalize-space(@class), " "), '
+            f'" {LEGACY_CONTAINER_CLASS} ")]'
+        )
+
+    skipped = " or ".join(f'contains(@class, "{name}")' for name in SKIPPED_CLASSES)
+    texts = []
+    for container in containers:
+        for unwanted in container.xpath(f".//*[{skipped}]"):
+            unwanted.drop_tree()
+        for br in container.iter("br"):
+            br.tail = "\n" + (br.tail or "")
+        texts.append(container.text_content())
+    return "\n".join(texts)
+
+
+def _extract_bs4(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    containers = soup.find_all("div", class_=re.compile(CONTAINER_CLASS))
+    if not containers:
+        containers = soup.find_all("div", class_=LEGACY_CONTAINER_CLASS)
+
+    selector = ", ".join(f".{name}" for name in SKIPPED_CLASSES)
+    texts = []
+    for container in containers:
+        for unwanted in container.select(selector):
+            unwanted.decompose()
+        for br in container.find_all("br"):
+            br.replace_with("\n")
+        texts.append(container.get_text())
+    return "\n".join(texts)
+
+
+def _lxml_available():
+    try:
+        import lxml.html  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+BACKENDS = {
+    "stdlib": _extract_stdlib,
+    "lxml": _extract_lxml,
+    "bs4": _extract_bs4,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_backend(name=None):
+    """
+    Pick the extraction backend to use.
+
+    Args:
+        name (str, optional): "auto", "lxml", "stdlib" or "bs4", defaults to
+            GENIUS_HTML_BACKEND
+
+    Returns:
+        str: Name of an available backend
+    """
+    name = (name or GENIUS_HTML_BACKEND).lower()
+    if name == "auto":
+        return "lxml" if _lxml_available() else "stdlib"
+    if name not in BACKENDS:
+        logger.warning(f"Unknown HTML backend '{name}', using stdlib")
+        return "stdlib"
+    if name == "lxml" and not _lxml_available():
+        logger.warning("lxml is not installed, using stdlib HTML backend")
+        return "stdlib"
+    return name
+
+
+def extract_lyrics_text(html, backend=None):
+    """
+    Extract the raw lyrics text from a Genius song page.
+
+    Args:
+        html (str): Page HTML
+        backend (str, optional): Backend name, defaults to GENIUS_HTML_BACKEND
+
+    Returns:
+        str: Text of all lyrics containers, or an empty string if none were found
+    """
+    return BACKENDS[resolve_backend(backend)](html)
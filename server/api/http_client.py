@@ -0,0 +1,213 @@
+"""
+Shared HTTP Client
+
+One place for outbound HTTP calls (ACRCloud, Genius API, Genius pages). Keeps
+a keep-alive connection pool per upstream host so repeat calls skip the TCP
+and TLS handshake, applies default connect/read timeouts, and records how
+often connections are reused.
+
+HTTP/2 is used when HTTP2_ENABLED is set and httpx (with the h2 extra) is
+installed; otherwise requests sessions over HTTP/1.1 are used.
+"""
+
+import logging
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("http_client")
+
+# HTTP client configuration
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 10))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 10))
+# Retries for idempotent requests that fail to connect or get a 502/503/504
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 1))
+HTTP2_ENABLED = os.environ.get("HTTP2_ENABLED", "false").lower() == "true"
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+        import httpx  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HttpClient:
+    """Per-host pooled HTTP sessions with default timeouts and reuse metrics."""
+
+    def __init__(
+        self,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        connect_timeout=HTTP_CONNECT_TIMEOUT,
+        read_timeout=HTTP_READ_TIMEOUT,
+        max_retries=HTTP_MAX_RETRIES,
+        http2=HTTP2_ENABLED,
+    ):
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.http2 = http2 and _http2_available()
+        if http2 and not self.http2:
+            logger.warning("HTTP/2 requested but httpx[http2] is not installed, using HTTP/1.1")
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def _new_session(self):
+        if self.http2:
+            import httpx
+
+            return httpx.Client(
+                http2=True,
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(
+                    max_connections=self.pool_maxsize,
+                    max_keepalive_connections=self.pool_maxsize,
+                ),
+                transport=httpx.HTTPTransport(http2=True, retries=self.max_retries),
+            )
+
+        session = requests.Session()
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=retry
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _session_for(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._new_session()
+                self._sessions[host] = session
+                self.stats[host] = {"requests": 0, "errors": 0}
+        return host, session
+
+    def request(self, method, url, timeout=None, stream=False, **kwargs):
+        """
+        Send a request through the pooled session for the URL's host.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            timeout (float | tuple, optional): Overrides the default
+                (connect, read) timeouts
+            stream (bool): Defer downloading the response body
+            **kwargs: Passed on to the underlying client (headers, params, data, files)
+
+        Returns:
+            requests.Response | httpx.Response: The response
+        """
+        host, session = self._session_for(url)
+        timeout = timeout or self.timeout
+        self.stats[host]["requests"] += 1
+        try:
+            if self.http2:
+                import httpx
+
+                if not isinstance(timeout, tuple):
+                    timeout = (timeout, timeout)
+                request = session.build_request(
+                    method,
+                    url,
+                    timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+                    **kwargs,
+                )
+                return session.send(request, stream=stream)
+            return session.request(method, url, timeout=timeout, stream=stream, **kwargs)
+        except Exception:
+            self.stats[host]["errors"] += 1
+            raise
+
+    def get(self, url, **kwargs):
+        """Send a GET request. See request()."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """Send a POST request. See request()."""
+        return self.request("POST", url, **kwargs)
+
+    def connection_stats(self):
+        """
+        Report request and connection counts per host.
+
+        Returns:
+            dict: host -> {"requests", "errors", "connections", "reused"}. Connection
+                counts are only available for the HTTP/1.1 backend.
+        """
+        with self._lock:
+            sessions = dict(self._sessions)
+
+        report = {}
+        for host, session in sessions.items():
+            host_stats = dict(self.stats[host])
+            if not self.http2:
+                pools = session.get_adapter(f"https://{host}").poolmanager.pools
+                connections = sum(pools[key].num_connections for key in pools.keys())
+                host_stats["connections"] = connections
+                host_stats["reused"] = max(0, host_stats["requests"] - connections)
+            report[host] = host_stats
+        return report
+
+    def close(self):
+        """Close all pooled connections."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+def iter_response_bytes(response, chunk_size=16384):
+    """
+    Iterate over the (decompressed) body of a response made with stream=True.
+
+    Args:
+        response (requests.Response | httpx.Response): Streamed response
+        chunk_size (int): Bytes per chunk
+
+    Returns:
+        iterator: Body chunks as bytes
+    """
+    if hasattr(response, "iter_content"):
+        return response.iter_content(chunk_size)
+    return response.iter_bytes(chunk_size)
+
+
+def wire_bytes_read(response):
+    """
+    Return how many body bytes have been received over the network so far.
+
+    Args:
+        response (requests.Response | httpx.Response): Streamed response
+
+    Returns:
+        int: Bytes received before decompression, or None if unknown
+    """
+    raw = getattr(response, "raw", None)
+    if raw is not None and hasattr(raw, "tell"):
+        return raw.tell()
+    return getattr(response, "num_bytes_downloaded", None)
+
+
+_client = HttpClient()
+
+
+def get_client():
+    """Return the process-wide HTTP client."""
+    return _client
@@ -0,0 +1,298 @@
+"""
+Lyrics Resolution
+
+Finds lyrics for a song, trying Genius first and falling back to Gemini.
+Found lyrics are cached by normalized title and artist. Songs that neither
+source has lyrics for (instrumentals, obscure tracks) are remembered in a
+separate, shorter-lived negative cache.
+
+Each result carries a version token (a hash of the lyrics). With
+LYRICS_FORMATTER=gemini, Genius lyrics are returned right away with the local
+layout while a background worker has Gemini reformat them and stores the
+result in the cache; clients poll revalidate_lyrics() with their version to
+pick it up.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api.cache import TieredCache, normalize_song_key
+from api.gemini import format_lyrics_with_gemini, get_lyrics_by_gemini
+from api.genius import get_lyrics_by_song
+from api.singleflight import single_flight
+
+logger = logging.getLogger("lyrics")
+
+# Lyrics cache configuration
+LYRICS_CACHE_ENABLED = os.environ.get("LYRICS_CACHE_ENABLED", "true").lower() == "true"
+LYRICS_CACHE_TTL = int(os.environ.get("LYRICS_CACHE_TTL", 7 * 24 * 3600))
+LYRICS_CACHE_MEMORY_SIZE = int(os.environ.get("LYRICS_CACHE_MEMORY_SIZE", 512))
+
+# Songs with no lyrics anywhere are retried sooner; jitter spreads out the retries
+LYRICS_NEGATIVE_CACHE_TTL = int(os.environ.get("LYRICS_NEGATIVE_CACHE_TTL", 6 * 3600))
+LYRICS_NEGATIVE_CACHE_JITTER = float(os.environ.get("LYRICS_NEGATIVE_CACHE_JITTER", 0.2))
+
+# Gemini results that mean "no lyrics exist", as opposed to a failed request
+GEMINI_DEFINITIVE_MISSES = ("gemini_no_lyrics",)
+
+# "local" serves Genius lyrics with the rule-based layout only; "gemini" also
+# has Gemini reformat them in the background (needs the lyrics cache)
+LYRICS_FORMATTER = os.environ.get("LYRICS_FORMATTER", "local").lower()
+LYRICS_UPGRADE_WORKERS = int(os.environ.get("LYRICS_UPGRADE_WORKERS", 2))
+# A pending upgrade older than this is assumed lost (e.g. worker restart) and retried
+LYRICS_UPGRADE_TIMEOUT = int(os.environ.get("LYRICS_UPGRADE_TIMEOUT", 120))
+
+lyrics_cache = TieredCache(
+    "lyrics", ttl=LYRICS_CACHE_TTL, memory_size=LYRICS_CACHE_MEMORY_SIZE
+)
+negative_lyrics_cache = TieredCache(
+    "lyrics_negative",
+    ttl=LYRICS_NEGATIVE_CACHE_TTL,
+    memory_size=LYRICS_CACHE_MEMORY_SIZE,
+)
+
+
+upgrade_executor = ThreadPoolExecutor(
+    max_workers=LYRICS_UPGRADE_WORKERS, thread_name_prefix="lyrics-upgrade"
+)
+# Keys with an upgrade running in this process
+_upgrades = set()
+_upgrades_lock = threading.Lock()
+
+
+def lyrics_version(lyrics):
+    """
+    Build the version token of a lyrics text.
+
+    Args:
+        lyrics (str): Lyrics text
+
+    Returns:
+        str: Short hash that changes whenever the lyrics change
+    """
+    return hashlib.sha256((lyrics or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _negative_ttl():
+    jitter = LYRICS_NEGATIVE_CACHE_JITTER
+    return LYRICS_NEGATIVE_CACHE_TTL * random.uniform(1 - jitter, 1 + jitter)
+
+
+def resolve_lyrics(title, artist=""):
+    """
+    Get lyrics for a song from the cache, Genius, or Gemini, in that order.
+
+    Concurrent requests for the same uncached song share one lookup. With
+    LYRICS_FORMATTER=gemini, locally formatted lyrics are returned without
+    waiting for Gemini, and an upgrade is started in the background.
+
+    Args:
+        title (str): Song title
+        artist (str): Artist name
+
+    Returns:
+        dict: Lyrics result with "lyrics", "lyrics_source" ("genius", "gemini"
+            or "none"), "formatting", and for found lyrics "version" and
+            "upgrade_pending" (a better formatted version is on its way)
+    """
+    key = normalize_song_key(title, artist)
+    if LYRICS_CACHE_ENABLED:
+        cached = lyrics_cache.get(key)
+        if cached is not None:
+            logger.info(f"Lyrics cache hit for '{title}' by '{artist}'")
+            return _with_upgrade(key, cached)
+
+        missing = negative_lyrics_cache.get(key)
+        if missing is not None:
+            logger.info(f"Negative lyrics cache hit for '{title}' by '{artist}'")
+            return dict(missing)
+
+    lyrics_info = single_flight("resolve_lyrics", key, _fetch_lyrics, title, artist, key)
+    return _with_upgrade(key, lyrics_info)
+
+
+def revalidate_lyrics(title, artist="", version=""):
+    """
+    Check whether the cached lyrics of a song changed from a known version.
+
+    Only the cache is consulted, so this is cheap enough to poll while a
+    background upgrade runs.
+
+    Args:
+        title (str): Song title
+        artist (str): Artist name
+        version (str): Version token the client has
+
+    Returns:
+        dict: {"changed": True} with the full lyrics result if the version
+            differs, otherwise {"changed": False} with "version" and
+            "upgrade_pending"
+    """
+    key = normalize_song_key(title, artist)
+    cached = lyrics_cache.get(key, refresh=True) if LYRICS_CACHE_ENABLED else None
+    if cached is None:
+        return {
+            "status": "error",
+            "message": f"No cached lyrics for {title} by {artist}",
+            "changed": False,
+            "upgrade_pending": False,
+        }
+
+    lyrics_info = _with_upgrade(key, cached)
+    if lyrics_info["version"] != version:
+        return dict(lyrics_info, changed=True)
+    return {
+        "status": "success",
+        "changed": False,
+        "version": version,
+        "upgrade_pending": lyrics_info["upgrade_pending"],
+    }
+
+
+def _needs_upgrade(lyrics_info):
+    return (
+        LYRICS_FORMATTER == "gemini"
+        and LYRICS_CACHE_ENABLED
+        and lyrics_info.get("lyrics_source") == "genius"
+        and lyrics_info.get("formatting") == "basic"
+        and lyrics_info.get("upgrade") != "failed"
+    )
+
+
+def _with_upgrade(key, lyrics_info):
+    """Copy a lyrics result for a response, starting an upgrade if one is due."""
+    lyrics_info = dict(lyrics_info)
+    if lyrics_info.get("lyrics_source", "none") == "none":
+        return lyrics_info
+
+    lyrics_info.setdefault("version", lyrics_version(lyrics_info.get("lyrics")))
+    pending = False
+    if _needs_upgrade(lyrics_info):
+        started = lyrics_info.get("upgrade_started", 0)
+        pending = time.time() - started < LYRICS_UPGRADE_TIMEOUT or _start_upgrade(
+            key, lyrics_info
+        )
+    lyrics_info["upgrade_pending"] = pending
+    lyrics_info.pop("upgrade", None)
+    lyrics_info.pop("upgrade_started", None)
+    return lyrics_info
+
+
+def _start_upgrade(key, lyrics_info):
+    with _upgrades_lock:
+        if key in _upgrades:
+            return True
+        _upgrades.add(key)
+
+    # Mark the entry so other worker processes don't start the same upgrade
+    entry = dict(lyrics_info, upgrade="pending", upgrade_started=time.time())
+    entry.pop("upgrade_pending", None)
+    lyrics_cache.set(key, entry)
+    upgrade_executor.submit(_upgrade_lyrics, key, entry)
+    return True
+
+
+def _upgrade_lyrics(key, entry):
+    title = entry.get("title", "")
+    artist = entry.get("artist", "")
+    try:
+        logger.info(f"Upgrading lyrics formatting for '{title}' by '{artist}'")
+        result = format_lyrics_with_gemini(entry["lyrics"], title, artist)
+        upgraded = dict(entry)
+        del upgraded["upgrade_started"]
+        if result.get("status") == "success" and result.get("lyrics"):
+            upgraded.update(
+                lyrics=result["lyrics"],
+                formatting="gemini",
+                version=lyrics_version(result["lyrics"]),
+            )
+            del upgraded["upgrade"]
+        else:
+            logger.warning(
+                f"Gemini formatting failed for '{title}' by '{artist}': "
+                f"{result.get('message')}"
+            )
+            upgraded["upgrade"] = "failed"
+
+        # Don't bring back an entry that was invalidated in the meantime
+        if lyrics_cache.get(key, refresh=True) is not None:
+            lyrics_cache.set(key, upgraded)
+    except Exception as e:
+        logger.exception(f"Error upgrading lyrics formatting: {e}")
+    finally:
+        with _upgrades_lock:
+            _upgrades.discard(key)
+
+
+def _fetch_lyrics(title, artist, key):
+    logger.info(f"Fetching lyrics for '{title}' by '{artist}' from Genius")
+    lyrics_info = get_lyrics_by_song(title, artist)
+    lyrics = lyrics_info.get("lyrics", "")
+
+    # If Genius didn't return lyrics or returned an error, try Gemini as a fallback
+    if not lyrics or lyrics.strip() == "" or lyrics_info.get("status") == "error":
+        logger.info(
+            f"No lyrics found from Genius for '{title}' by '{artist}', trying Gemini API"
+        )
+        gemini_lyrics_info = get_lyrics_by_gemini(title, artist)
+
+        if gemini_lyrics_info["status"] == "success":
+            # Replace the Genius response with Gemini's
+            lyrics_info = gemini_lyrics_info
+            lyrics_info["lyrics_source"] = "gemini"
+            lyrics_info["formatting"] = "gemini"
+            logger.info(
+                f"Successfully retrieved lyrics from Gemini API for '{title}' by '{artist}'"
+            )
+        else:
+            logger.warning(
+                f"Gemini API also couldn't find lyrics for '{title}' by '{artist}'"
+            )
+            lyrics_info["lyrics_source"] = "none"
+
+            # Only remember definitive misses, not network or API failures
+            if (
+                LYRICS_CACHE_ENABLED
+                and lyrics_info.get("error_code") == "not_found"
+                and gemini_lyrics_info.get("api_used") in GEMINI_DEFINITIVE_MISSES
+            ):
+                negative_lyrics_cache.set(key, lyrics_info, ttl=_negative_ttl())
+    else:
+        lyrics_info["lyrics_source"] = lyrics_info.get("lyrics_source", "genius")
+        lyrics_info["formatting"] = lyrics_info.get("formatting", "basic")
+
+    if lyrics_info["lyrics_source"] != "none":
+        lyrics_info["version"] = lyrics_version(lyrics_info.get("lyrics"))
+        if LYRICS_CACHE_ENABLED:
+            lyrics_cache.set(key, lyrics_info)
+
+    return lyrics_info
+
+
+def invalidate_lyrics(title=None, artist="", negative_only=False):
+    """
+    Drop cached lyrics for one song, or for every song if no title is given.
+
+    Args:
+        title (str, optional): Song title
+        artist (str): Artist name
+        negative_only (bool): Only forget "no lyrics found" entries
+
+    Returns:
+        list: Names of the caches that were invalidated
+    """
+    caches = [negative_lyrics_cache] if negative_only else [
+        lyrics_cache,
+        negative_lyrics_cache,
+    ]
+    for cache in caches:
+        if title:
+            cache.delete(normalize_song_key(title, artist))
+        else:
+            cache.clear()
+    return [cache.name for cache in caches]
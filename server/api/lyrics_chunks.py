@@ -0,0 +1,105 @@
+"""
+Lyrics Chunking
+
+Splits long lyrics into chunks at stanza boundaries so they can be translated
+in parallel, and puts the translated chunks back together with the original
+blank-line structure. Chunk sizes are measured with a local token estimate,
+which avoids a count_tokens round trip to Gemini for every song.
+"""
+
+import re
+
+# ASCII words cost about one token per four letters and numbers one per three
+# digits; every other visible character (punctuation, accented letters, CJK)
+# is counted as a token of its own, which errs on the high side for a budget
+TOKEN = re.compile(r"[A-Za-z]{1,4}|\d{1,3}|\S")
+STANZA_BREAK = re.compile(r"(\n[ \t]*\n\s*)")
+
+
+def count_tokens(text):
+    """
+    Estimate how many Gemini tokens a text takes.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Estimated token count
+    """
+    return len(TOKEN.findall(text))
+
+
+def split_chunks(text, max_tokens):
+    """
+    Split lyrics into chunks of about max_tokens, at stanza boundaries.
+
+    Consecutive stanzas are packed into a chunk while it stays within the
+    budget. A stanza over the budget on its own is split between lines.
+
+    Args:
+        text (str): Lyrics text
+        max_tokens (int): Token budget per chunk
+
+    Returns:
+        list: (chunk text, separator) pairs in order, where separator is the
+            blank-line text that followed the chunk in the original ("" for
+            the last one), so that join_chunks can restore it
+    """
+    parts = STANZA_BREAK.split(text.strip())
+    stanzas = zip(parts[::2], parts[1::2] + [""])
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for stanza, separator in _split_long_stanzas(stanzas, max_tokens):
+        tokens = count_tokens(stanza)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(_chunk(current))
+            current, current_tokens = [], 0
+        current.append((stanza, separator))
+        current_tokens += tokens
+    if current:
+        chunks.append(_chunk(current))
+    return chunks
+
+
+def _chunk(stanzas):
+    """Join (stanza, separator) pairs into one (chunk text, separator) pair."""
+    text = "".join(stanza + separator for stanza, separator in stanzas[:-1])
+    return text + stanzas[-1][0], stanzas[-1][1]
+
+
+def _split_long_stanzas(stanzas, max_tokens):
+    """Yield (stanza, separator) pairs, splitting stanzas over the budget by line."""
+    for stanza, separator in stanzas:
+        if count_tokens(stanza) <= max_tokens:
+            yield stanza, separator
+            continue
+        lines = stanza.split("\n")
+        piece = []
+        piece_tokens = 0
+        for line in lines:
+            tokens = count_tokens(line)
+            if piece and piece_tokens + tokens > max_tokens:
+                yield "\n".join(piece), "\n"
+                piece, piece_tokens = [], 0
+            piece.append(line)
+            piece_tokens += tokens
+        yield "\n".join(piece), separator
+
+
+def join_chunks(translated, chunks):
+    """
+    Put translated chunks back together with the original separators.
+
+    Args:
+        translated (list): Translated text of each chunk, in order
+        chunks (list): The (chunk text, separator) pairs from split_chunks
+
+    Returns:
+        str: The whole translated text
+    """
+    return "".join(
+        text.strip("\n") + separator
+        for text, (_, separator) in zip(translated, chunks)
+    )
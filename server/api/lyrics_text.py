@@ -0,0 +1,268 @@
+"""
+Lyrics Text Cleanup and Validation
+
+Cleans the raw text scraped from a Genius page and checks that it looks like
+lyrics, in one pass over precompiled patterns. Produces exactly the same
+text and decisions as the original step-by-step cleanup in genius.py (see
+benchmarks/bench_lyrics_text.py), with fewer passes:
+
+- the "Embed", "Share URL" and "Copy" trailer removals are fused into one
+  pattern that strips them in the same order,
+- blank-line trimming that the final strip() and newline collapse already
+  cover is skipped,
+- the title header pattern only starts at the beginning of a run of words,
+  instead of rescanning the run from every position,
+- validation reuses the line split of the cleaned text and skips scans whose
+  trigger characters do not occur. The old "more than 3 trailing artist
+  names" check is dropped: its pattern is anchored to the end of the text
+  and can match at most twice, so it never rejected anything.
+
+format_lyrics() lays out valid lyrics for display without an LLM: section
+labels become verse breaks, split lines are rejoined, and unlabelled lyrics
+are split into verses where a repeated chorus starts and ends.
+"""
+
+import re
+from collections import namedtuple
+
+# Cleanup patterns, in the order they are applied
+CONTRIBUTORS = re.compile(r"\d+ Contributors.*?Read More", re.DOTALL)
+TRANSLATIONS = re.compile(r"Translations.*?Lyrics", re.DOTALL)
+# Only tried at the start of a run of word characters and spaces: a match
+# starting later in the run would also have matched from its start, so this
+# removes the same text as "[\w\s]+ Lyrics" without rescanning every run
+# from each position
+TITLE_HEADER = re.compile(r"(?<![\w\s])[\w\s]+ Lyrics")
+SECTION_LABELS = re.compile(r"\[.*?\]")
+# Same as removing "Embed$", then "Share URL$", then "Copy$" in separate passes
+TRAILERS = re.compile(r"(?:Copy)?(?:Share URL)?(?:Embed)?$", re.MULTILINE)
+BROKEN_WORDS = re.compile(r"([a-z])[\s]*\n[\s]*([a-z])")
+PUNCTUATION_BREAK = re.compile(r"([.,;:!?])[\s]*\n")
+PUNCTUATION_CAPITAL = re.compile(r"([.,;:!?])[\s]*([A-Z])")
+MULTIPLE_SPACES = re.compile(r" {2,}")
+EXCESS_BLANK_LINES = re.compile(r"\n{3,}")
+
+# Formatting patterns
+INVISIBLE_CHARACTERS = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+CONTRIBUTOR_COUNT = re.compile(r"\A\s*\d+ Contributors?")
+TRANSLATIONS_HEADER = re.compile(r"\A\s*Translations.*?Lyrics", re.DOTALL)
+HEADER_LINE = re.compile(r"\A\s*[^\n\[]* Lyrics(?=\s|\[|$)")
+SECTION_LABEL = re.compile(r"\[[^\]\n]*\]")
+PAGE_FOOTER = re.compile(r"\d*(?:You might also like)?\d*Embed\s*\Z")
+CONTINUATION = re.compile(r"[,.;:!?)\]…]")
+SENTENCE_BREAK = re.compile(r"([.!?])\s+(?=[A-Z\"'(])")
+NORMALIZE_LINE = re.compile(r"[^\w\s]")
+# Lines Genius inserts inside the lyrics containers
+INSERTED_LINES = frozenset(["You might also like"])
+
+# Validation patterns
+NON_LYRICS = re.compile(
+    r"(?i)best of \d{4}"  # "Best of 2015"
+    r"|worst of \d{4}"  # "Worst of 2015"
+    r"|top \d+ (songs|tracks)"  # "Top 10 songs"
+    r"|#\d+:"  # "#1:", "#2:", etc. (ranking format)
+    r"|honorable mention"  # List articles often have this
+    r"|ft\.\s+[\w\s]+#\d+"  # Artist featuring someone followed by a number/ranking
+)
+RANKING = re.compile(r"#\d+")
+PLAYLIST_ENTRY = re.compile(r"[\w\s&]+ ~ [\w\s&\'.]+ \(\d+:\d+\)")
+COMMA_PLAYLIST_ENTRY = re.compile(r",\s*[\w\s&]+ ~ [\w\s&\'.]+ \(\d+:\d+\)")
+DURATION = re.compile(r"\(\d+:\d+\)")
+
+LONG_LINE_LENGTH = 100
+# Unlabelled lyrics longer than this are split at repeated choruses
+MAX_STANZA_LINES = 12
+MIN_REPEAT_LINES = 2
+
+MIN_LENGTH = 100
+MIN_SHORT_LINES = 8
+MIN_SHORT_LINE_RATIO = 0.5
+SHORT_LINE_LENGTH = 80
+
+LyricsCheck = namedtuple("LyricsCheck", ["valid", "score", "reason"])
+
+
+def clean_lyrics(text):
+    """
+    Remove Genius page furniture and fix line breaks in scraped lyrics.
+
+    Args:
+        text (str): Raw text of the lyrics containers
+
+    Returns:
+        str: Clean lyrics text
+    """
+    text = CONTRIBUTORS.sub("", text)
+    text = TRANSLATIONS.sub("", text)
+    text = TITLE_HEADER.sub("", text)
+    text = SECTION_LABELS.sub("", text)
+    text = TRAILERS.sub("", text)
+
+    text = text.replace("\r\n", "\n")
+    text = BROKEN_WORDS.sub(r"\1 \2", text)
+    text = PUNCTUATION_BREAK.sub(r"\1\n", text)
+    text = PUNCTUATION_CAPITAL.sub(r"\1\n\2", text)
+
+    text = "\n".join([line.strip() for line in text.split("\n")])
+    text = MULTIPLE_SPACES.sub(" ", text)
+    text = EXCESS_BLANK_LINES.sub("\n\n", text)
+    return text.strip()
+
+
+def check_lyrics(text, lines=None):
+    """
+    Decide whether text looks like song lyrics rather than a list or playlist.
+
+    Args:
+        text (str): Text to check
+        lines (list, optional): text.strip().split("\\n"), if already computed
+
+    Returns:
+        LyricsCheck: valid (bool), score (share of short, lyric-like lines,
+            0 when invalid) and reason (why the text was rejected, or None)
+    """
+    if not text:
+        return LyricsCheck(False, 0.0, "empty")
+
+    stripped = text.strip()
+    if len(stripped) < MIN_LENGTH:
+        return LyricsCheck(False, 0.0, "too short")
+
+    match = NON_LYRICS.search(text)
+    if match:
+        return LyricsCheck(False, 0.0, f"non-lyrics pattern '{match.group(0)}'")
+
+    if "#" in text and len(RANKING.findall(text)) > 3:
+        return LyricsCheck(False, 0.0, "ranking list")
+
+    if "~" in text:
+        if len(PLAYLIST_ENTRY.findall(text)) > 2:
+            return LyricsCheck(False, 0.0, "playlist with timestamps")
+        if len(COMMA_PLAYLIST_ENTRY.findall(text)) > 2:
+            return LyricsCheck(False, 0.0, "comma-separated playlist")
+
+    if "(" in text and len(DURATION.findall(text)) > 3:
+        return LyricsCheck(False, 0.0, "playlist with durations")
+
+    if lines is None:
+        lines = stripped.split("\n")
+    short_lines = sum(1 for line in lines if 0 < len(line.strip()) < SHORT_LINE_LENGTH)
+    ratio = short_lines / len(lines)
+    if short_lines < MIN_SHORT_LINES or ratio < MIN_SHORT_LINE_RATIO:
+        return LyricsCheck(False, 0.0, "line structure doesn't match lyrics")
+
+    return LyricsCheck(True, ratio, None)
+
+
+def process_lyrics(raw_text):
+    """
+    Clean scraped lyrics and check them, sharing one line split.
+
+    Args:
+        raw_text (str): Raw text of the lyrics containers
+
+    Returns:
+        tuple: (clean lyrics text, LyricsCheck)
+    """
+    text = clean_lyrics(raw_text)
+    # clean_lyrics already stripped the text
+    return text, check_lyrics(text, text.split("\n"))
+
+
+def format_lyrics(raw_text):
+    """
+    Lay out scraped lyrics as lines grouped into verses.
+
+    Works on the raw text of the lyrics containers (before clean_lyrics),
+    where section labels like [Chorus] still mark the verse boundaries.
+
+    Args:
+        raw_text (str): Raw text of the lyrics containers
+
+    Returns:
+        str: Lyrics with one line per lyric line and a blank line between verses
+    """
+    text = raw_text.replace("\r\n", "\n").replace("\r", "\n").replace("\xa0", " ")
+    text = INVISIBLE_CHARACTERS.sub("", text)
+    # Page header: "12 Contributors", translations list, "Song Title Lyrics"
+    text = CONTRIBUTORS.sub("", text)
+    text = CONTRIBUTOR_COUNT.sub("", text)
+    text = TRANSLATIONS_HEADER.sub("", text)
+    text = HEADER_LINE.sub("", text)
+    text = PAGE_FOOTER.sub("", text)
+    text = TRAILERS.sub("", text)
+    text = SECTION_LABEL.sub("\n\n", text)
+
+    stanzas = []
+    lines = []
+    for line in text.split("\n"):
+        line = MULTIPLE_SPACES.sub(" ", line.strip())
+        if line in INSERTED_LINES:
+            continue
+        if not line:
+            if lines:
+                stanzas.append(lines)
+                lines = []
+        elif lines and (CONTINUATION.match(line) or lines[-1][-1] in "(“"):
+            # Punctuation split off the end of the previous line, or an
+            # opening bracket left on its own
+            lines[-1] += line
+        elif len(line) > LONG_LINE_LENGTH:
+            lines.extend(SENTENCE_BREAK.sub("\\1\n", line).split("\n"))
+        else:
+            lines.append(line)
+    if lines:
+        stanzas.append(lines)
+
+    if len(stanzas) == 1 and len(stanzas[0]) > MAX_STANZA_LINES:
+        stanzas = split_repeated_sections(stanzas[0])
+
+    return "\n\n".join("\n".join(stanza) for stanza in stanzas)
+
+
+def split_repeated_sections(lines):
+    """
+    Split unlabelled lyrics into verses around repeated runs of lines.
+
+    A run of at least MIN_REPEAT_LINES lines that already appeared earlier
+    (usually a chorus) starts a new verse, and the lines after it start
+    another.
+
+    Args:
+        lines (list): Lyric lines without blank lines
+
+    Returns:
+        list: Verses, each a list of lines
+    """
+    keys = [" ".join(NORMALIZE_LINE.sub("", line).casefold().split()) for line in lines]
+    first_seen = {}
+    for index in range(len(keys) - MIN_REPEAT_LINES + 1):
+        first_seen.setdefault(tuple(keys[index : index + MIN_REPEAT_LINES]), index)
+
+    def repeats_earlier(index):
+        window = tuple(keys[index : index + MIN_REPEAT_LINES])
+        return first_seen.get(window, index) + MIN_REPEAT_LINES <= index
+
+    # Mark every line covered by a repeated window
+    repeated = [False] * len(lines)
+    for index in range(len(lines) - MIN_REPEAT_LINES + 1):
+        if repeats_earlier(index):
+            for offset in range(MIN_REPEAT_LINES):
+                repeated[index + offset] = True
+
+    # Lines whose windows match the first occurrence of a later repeat are the
+    # original chorus, so they get the same boundaries
+    original = [False] * len(lines)
+    for index in range(len(lines) - MIN_REPEAT_LINES + 1):
+        if repeats_earlier(index):
+            start = first_seen[tuple(keys[index : index + MIN_REPEAT_LINES])]
+            for offset in range(MIN_REPEAT_LINES):
+                original[start + offset] = True
+    marked = [a or b for a, b in zip(repeated, original)]
+
+    stanzas = [[lines[0]]]
+    for index in range(1, len(lines)):
+        if marked[index] != marked[index - 1]:
+            stanzas.append([])
+        stanzas[-1].append(lines[index])
+    return stanzas
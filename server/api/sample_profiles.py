@@ -0,0 +1,130 @@
+"""
+ACRCloud Sample Profiles
+
+Defines how captured audio is turned into the sample uploaded to ACRCloud.
+The "full" profile keeps the original 44.1kHz stereo behaviour, while the
+"compact" profile sends a small mono clip cut to the loudest part of the capture.
+"""
+
+import logging
+import os
+
+import numpy as np
+from api.transcode import SAMPLE_WIDTH, VOLUME_GAIN
+
+logger = logging.getLogger("sample_profiles")
+
+# Sample profile configuration
+ACR_SAMPLE_PROFILE = os.environ.get("ACR_SAMPLE_PROFILE", "full")
+ACR_COMPACT_SAMPLE_RATE = int(os.environ.get("ACR_COMPACT_SAMPLE_RATE", 8000))
+ACR_COMPACT_SECONDS = float(os.environ.get("ACR_COMPACT_SECONDS", 8))
+ACR_COMPACT_MAX_BYTES = int(os.environ.get("ACR_COMPACT_MAX_BYTES", 160 * 1024))
+
+PROFILES = {
+    "full": {
+        "sample_rate": 44100,
+        "channels": 2,
+        "volume": VOLUME_GAIN,
+        "max_seconds": None,
+        "max_bytes": None,
+    },
+    "compact": {
+        "sample_rate": ACR_COMPACT_SAMPLE_RATE,
+        "channels": 1,
+        "volume": VOLUME_GAIN,
+        "max_seconds": ACR_COMPACT_SECONDS,
+        "max_bytes": ACR_COMPACT_MAX_BYTES,
+    },
+}
+
+# Granularity of the loudness search when trimming (in seconds)
+ENERGY_BLOCK_SECONDS = 0.05
+
+
+def get_profile(name=None):
+    """
+    Look up a sample profile by name.
+
+    Args:
+        name (str, optional): Profile name, defaults to ACR_SAMPLE_PROFILE
+
+    Returns:
+        dict: Profile settings
+    """
+    name = name or ACR_SAMPLE_PROFILE
+    if name not in PROFILES:
+        logger.warning(f"Unknown ACR sample profile '{name}', using 'full'")
+        name = "full"
+    return PROFILES[name]
+
+
+def max_frames_for_profile(profile):
+    """
+    Work out how many audio frames fit within a profile's duration and byte budget.
+
+    Args:
+        profile (dict): Profile settings
+
+    Returns:
+        int: Maximum number of frames, or None for no limit
+    """
+    limits = []
+    if profile.get("max_seconds"):
+        limits.append(int(profile["max_seconds"] * profile["sample_rate"]))
+    if profile.get("max_bytes"):
+        # Leave room for the 44-byte WAV header
+        limits.append((profile["max_bytes"] - 44) // (SAMPLE_WIDTH * profile["channels"]))
+    return min(limits) if limits else None
+
+
+def trim_to_loudest(pcm_data, sample_rate, channels, max_frames):
+    """
+    Keep the highest-energy window of a PCM clip.
+
+    Args:
+        pcm_data (bytes): Interleaved 16-bit PCM samples
+        sample_rate (int): Sample rate in Hz
+        channels (int): Number of channels
+        max_frames (int): Length of the window to keep, in frames
+
+    Returns:
+        bytes: The trimmed PCM samples
+    """
+    samples = np.frombuffer(pcm_data, dtype="<i2")
+    total_frames = len(samples) // channels
+    if not max_frames or total_frames <= max_frames:
+        return pcm_data
+
+    frames = samples[: total_frames * channels].reshape(-1, channels)
+
+    # Sum energy over short blocks, then slide a window of whole blocks over them
+    block = max(1, int(sample_rate * ENERGY_BLOCK_SECONDS))
+    num_blocks = total_frames // block
+    energy = np.square(frames[: num_blocks * block].astype(np.float64)).sum(axis=1)
+    block_energy = energy.reshape(num_blocks, block).sum(axis=1)
+
+    window_blocks = max(1, max_frames // block)
+    cumulative = np.concatenate(([0.0], np.cumsum(block_energy)))
+    window_energy = cumulative[window_blocks:] - cumulative[:-window_blocks]
+    start = int(np.argmax(window_energy)) * block
+
+    return frames[start : start + max_frames].tobytes()
+
+
+def apply_profile(pcm_data, profile):
+    """
+    Apply a profile's duration and byte budget to decoded PCM.
+
+    Args:
+        pcm_data (bytes): PCM decoded with the profile's sample rate and channels
+        profile (dict): Profile settings
+
+    Returns:
+        bytes: PCM samples that fit the profile's budget
+    """
+    return trim_to_loudest(
+        pcm_data,
+        profile["sample_rate"],
+        profile["channels"],
+        max_frames_for_profile(profile),
+    )
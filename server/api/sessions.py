@@ -0,0 +1,193 @@
+"""
+Identify Sessions
+
+Remembers the last track identified for each client (browser tab) and, using
+ACRCloud's play_offset_ms and duration_ms, predicts where playback is and when
+that track ends. Repeat identify calls inside that window are answered locally
+instead of going back to ACRCloud, unless their fingerprint shows that the
+song has changed.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Session cache configuration
+SESSION_CACHE_ENABLED = os.environ.get("SESSION_CACHE_ENABLED", "true").lower() == "true"
+SESSION_MAX_CLIENTS = int(os.environ.get("SESSION_MAX_CLIENTS", 10000))
+# Used when ACRCloud does not report a duration
+SESSION_DEFAULT_REMAINING_MS = int(os.environ.get("SESSION_DEFAULT_REMAINING_MS", 60000))
+# Extra time allowed after the predicted end of the track
+SESSION_GRACE_MS = int(os.environ.get("SESSION_GRACE_MS", 5000))
+# Minimum aligned fingerprint hashes to confirm the same song
+SESSION_MIN_MATCHES = int(os.environ.get("SESSION_MIN_MATCHES", 8))
+# How far a capture may be from its predicted track position and still align
+SESSION_OFFSET_TOLERANCE_MS = int(os.environ.get("SESSION_OFFSET_TOLERANCE_MS", 3000))
+# Indexed hashes at the predicted position needed to call a failed alignment
+# a mismatch; with fewer there is nothing to compare the capture against
+SESSION_MISMATCH_MIN_HASHES = int(os.environ.get("SESSION_MISMATCH_MIN_HASHES", 200))
+
+
+class SessionCache:
+    """Per-client record of the track currently playing."""
+
+    def __init__(self, max_clients=SESSION_MAX_CLIENTS):
+        self.max_clients = max_clients
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "predicted": 0,
+            "misses": 0,
+            "mismatches": 0,
+            "expired": 0,
+        }
+
+    def start(self, client_id, song_info, track_key, position_ms=None):
+        """
+        Record a freshly identified track for a client.
+
+        Args:
+            client_id (str): Identifier of the requesting client/tab
+            song_info (dict): Identification result (with ACRCloud "raw" metadata)
+            track_key (str): Stable track identifier
+            position_ms (int, optional): Track position at the end of the
+                capture, usually ACRCloud's play_offset_ms
+        """
+        music = song_info.get("raw") or {}
+        duration_ms = music.get("duration_ms")
+        if duration_ms and position_ms is not None:
+            remaining_ms = max(0, duration_ms - position_ms)
+        else:
+            remaining_ms = SESSION_DEFAULT_REMAINING_MS
+
+        with self._lock:
+            self._sessions.pop(client_id, None)
+            self._sessions[client_id] = {
+                "song_info": song_info,
+                "track_key": track_key,
+                "position_ms": position_ms,
+                "anchored_at": time.time(),
+                "expires_at": time.time() + (remaining_ms + SESSION_GRACE_MS) / 1000,
+            }
+            while len(self._sessions) > self.max_clients:
+                self._sessions.popitem(last=False)
+
+    def get(self, client_id):
+        """
+        Return the client's active session, dropping it if the track has ended.
+
+        Args:
+            client_id (str): Identifier of the requesting client/tab
+
+        Returns:
+            dict: Session with "song_info" and "track_key", or None
+        """
+        with self._lock:
+            self.stats["lookups"] += 1
+            session = self._sessions.get(client_id)
+            if session is None:
+                self.stats["misses"] += 1
+                return None
+            if time.time() > session["expires_at"]:
+                del self._sessions[client_id]
+                self.stats["expired"] += 1
+                return None
+            self._sessions.move_to_end(client_id)
+            return session
+
+    @staticmethod
+    def expected_start_ms(session, clip_ms):
+        """
+        Predict where in the track a capture that just ended starts.
+
+        Args:
+            session (dict): Session returned by get()
+            clip_ms (int): Length of the capture
+
+        Returns:
+            int: Predicted track position of the capture start, or None if
+                the session has no known position
+        """
+        if session["position_ms"] is None:
+            return None
+        elapsed_ms = (time.time() - session["anchored_at"]) * 1000
+        return max(0, int(session["position_ms"] + elapsed_ms - clip_ms))
+
+    def confirm(self, alignment=None):
+        """
+        Decide whether a new capture still belongs to the session's track.
+
+        The capture is compared with the track's indexed fingerprint near the
+        position predicted by expected_start_ms(). Enough aligned hashes
+        confirm the track. When the index covers that position but the
+        capture does not align, the song has changed. When the index has
+        nothing there (e.g. a later part of the track than was captured
+        before), the fingerprint can't tell either way.
+
+        Args:
+            alignment (dict, optional): Result of FingerprintIndex.align for
+                the session's track at the predicted position
+
+        Returns:
+            bool: True if the capture aligns with the track, False on a clear
+                mismatch, or None if there is nothing to compare against
+        """
+        if alignment is None:
+            return None
+        if alignment["matches"] >= SESSION_MIN_MATCHES:
+            with self._lock:
+                self.stats["hits"] += 1
+            return True
+        if alignment["indexed"] >= SESSION_MISMATCH_MIN_HASHES:
+            with self._lock:
+                self.stats["mismatches"] += 1
+            return False
+        return None
+
+    def accept(self, session):
+        """
+        Reuse a session that could not be checked by fingerprint.
+
+        Called when nothing contradicts the session, so the predicted
+        position of the track is trusted until it ends.
+
+        Args:
+            session (dict): Session returned by get()
+
+        Returns:
+            dict: The session's identification result
+        """
+        with self._lock:
+            self.stats["hits"] += 1
+            self.stats["predicted"] += 1
+        return session["song_info"]
+
+    def update_result(self, client_id, track_key, fields):
+        """
+        Merge fields into a client's session result if it is still on the track.
+
+        Args:
+            client_id (str): Identifier of the requesting client/tab
+            track_key (str): Track the fields belong to
+            fields (dict): Fields to set on the session's song_info
+        """
+        with self._lock:
+            session = self._sessions.get(client_id)
+            if session is not None and session["track_key"] == track_key:
+                session["song_info"] = dict(session["song_info"], **fields)
+
+    def end(self, client_id):
+        """Forget a client's session (e.g. because the song changed)."""
+        with self._lock:
+            self._sessions.pop(client_id, None)
+
+
+_sessions = SessionCache()
+
+
+def get_sessions():
+    """Return the process-wide session cache."""
+    return _sessions
@@ -0,0 +1,115 @@
+"""
+Single-Flight Request Coalescing
+
+When several threads ask for the same thing at once (e.g. the lyrics of a
+trending song), only the first runs the upstream call; the others wait for
+it and share its result or exception.
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger("singleflight")
+
+# Single-flight configuration
+SINGLEFLIGHT_ENABLED = os.environ.get("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+# Longest time a caller waits on another caller's in-flight request (seconds)
+SINGLEFLIGHT_TIMEOUT = float(os.environ.get("SINGLEFLIGHT_TIMEOUT", 30))
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised when an in-flight call for the same key does not finish in time."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into a single execution."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "shared": 0, "timeouts": 0, "errors": 0}
+
+    def do(self, key, fn, *args, timeout=SINGLEFLIGHT_TIMEOUT, **kwargs):
+        """
+        Run fn(*args, **kwargs), or wait for an identical call already running.
+
+        Args:
+            key (hashable): Identifies equivalent calls, e.g. (operation, song key)
+            fn (callable): Function to run
+            timeout (float): Seconds to wait on another caller's call
+            *args, **kwargs: Passed to fn
+
+        Returns:
+            The result of fn. Waiting callers receive the same object, so it
+            must not be mutated.
+
+        Raises:
+            SingleFlightTimeout: If the in-flight call did not finish in time
+            Exception: Whatever fn raised, re-raised in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["calls"] += 1
+            else:
+                call.waiters += 1
+                self.stats["shared"] += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                self.stats["timeouts"] += 1
+                raise SingleFlightTimeout(f"Timed out waiting for in-flight call {key}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            self.stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.waiters:
+                logger.info(f"Shared result of {key} with {call.waiters} waiting callers")
+            call.done.set()
+
+
+_flights = SingleFlight()
+
+
+def single_flight(operation, key, fn, *args, **kwargs):
+    """
+    Run fn once for all concurrent callers with the same operation and key.
+
+    Args:
+        operation (str): Name of the operation, e.g. "genius_search"
+        key (str): Normalized identifier of the request, e.g. a song key
+        fn (callable): Function to run
+        *args, **kwargs: Passed to fn
+
+    Returns:
+        The result of fn
+    """
+    if not SINGLEFLIGHT_ENABLED:
+        return fn(*args, **kwargs)
+    return _flights.do((operation, key), fn, *args, **kwargs)
+
+
+def get_stats():
+    """Return the process-wide single-flight counters."""
+    return _flights.stats
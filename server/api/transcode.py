@@ -0,0 +1,156 @@
+"""
+Audio Transcoding
+
+Converts captured browser audio (WebM/Opus) into WAV for ACRCloud by
+streaming it through ffmpeg's stdin/stdout, without touching the disk.
+"""
+
+import io
+import os
+import subprocess
+import wave
+
+# Transcoding configuration
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+TRANSCODE_MAX_INPUT_BYTES = int(
+    os.environ.get("TRANSCODE_MAX_INPUT_BYTES", 10 * 1024 * 1024)
+)
+TRANSCODE_MAX_OUTPUT_BYTES = int(
+    os.environ.get("TRANSCODE_MAX_OUTPUT_BYTES", 20 * 1024 * 1024)
+)
+TRANSCODE_TIMEOUT = float(os.environ.get("TRANSCODE_TIMEOUT", 10))
+TRANSCODE_MAX_SECONDS = float(os.environ.get("TRANSCODE_MAX_SECONDS", 30))
+
+# Output format sent to ACRCloud
+SAMPLE_RATE = 44100  # 44.1kHz sample rate (CD quality)
+CHANNELS = 2  # Stereo (ACRCloud prefers stereo)
+SAMPLE_WIDTH = 2  # 16-bit PCM
+VOLUME_GAIN = 2.0  # Increase volume
+
+
+class TranscodeError(Exception):
+    """Raised when audio cannot be transcoded within the configured limits."""
+
+
+def build_ffmpeg_command(
+    sample_rate=SAMPLE_RATE, channels=CHANNELS, volume=VOLUME_GAIN
+):
+    """
+    Build the ffmpeg command that reads audio from stdin and writes raw PCM to stdout.
+
+    Args:
+        sample_rate (int): Output sample rate in Hz
+        channels (int): Number of output channels
+        volume (float): Gain applied with ffmpeg's volume filter
+
+    Returns:
+        list: Command line arguments for subprocess
+    """
+    cmd = [
+        FFMPEG_BINARY,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        "pipe:0",
+        "-vn",
+        "-t",
+        str(TRANSCODE_MAX_SECONDS),  # Never decode more than this much audio
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(sample_rate),
+        "-ac",
+        str(channels),
+    ]
+    if volume and volume != 1.0:
+        cmd += ["-af", f"volume={volume}"]
+    cmd += ["-f", "s16le", "pipe:1"]
+    return cmd
+
+
+def decode_to_pcm(
+    binary_data,
+    sample_rate=SAMPLE_RATE,
+    channels=CHANNELS,
+    volume=VOLUME_GAIN,
+    timeout=None,
+):
+    """
+    Decode compressed audio into raw 16-bit little-endian PCM using ffmpeg pipes.
+
+    Args:
+        binary_data (bytes): Encoded audio (e.g. WebM from MediaRecorder)
+        sample_rate (int): Output sample rate in Hz
+        channels (int): Number of output channels
+        volume (float): Gain applied while decoding
+        timeout (float, optional): Hard time limit in seconds
+
+    Returns:
+        bytes: Interleaved PCM samples
+
+    Raises:
+        TranscodeError: If the input is too large, ffmpeg fails, or the limits are exceeded
+    """
+    if not binary_data:
+        raise TranscodeError("No audio data to transcode")
+
+    if len(binary_data) > TRANSCODE_MAX_INPUT_BYTES:
+        raise TranscodeError(
+            f"Audio data too large: {len(binary_data)} bytes "
+            f"(limit {TRANSCODE_MAX_INPUT_BYTES})"
+        )
+
+    cmd = build_ffmpeg_command(sample_rate, channels, volume)
+    timeout = TRANSCODE_TIMEOUT if timeout is None else timeout
+
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except OSError as e:
+        raise TranscodeError(f"Could not start ffmpeg: {e}") from e
+
+    try:
+        pcm_data, stderr = process.communicate(input=binary_data, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        process.kill()
+        process.communicate()
+        raise TranscodeError(f"ffmpeg timed out after {timeout}s") from e
+
+    if process.returncode != 0:
+        raise TranscodeError(
+            f"FFmpeg conversion failed: {stderr.decode('utf-8', 'replace').strip()}"
+        )
+
+    if len(pcm_data) > TRANSCODE_MAX_OUTPUT_BYTES:
+        raise TranscodeError(
+            f"Decoded audio too large: {len(pcm_data)} bytes "
+            f"(limit {TRANSCODE_MAX_OUTPUT_BYTES})"
+        )
+
+    return pcm_data
+
+
+def pcm_to_wav(pcm_data, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """
+    Wrap raw 16-bit PCM in a WAV container in memory.
+
+    Args:
+        pcm_data (bytes): Interleaved 16-bit PCM samples
+        sample_rate (int): Sample rate in Hz
+        channels (int): Number of channels
+
+    Returns:
+        bytes: WAV file contents
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(SAMPLE_WIDTH)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm_data)
+    return buffer.getvalue()
@@ -0,0 +1,173 @@
+"""
+Translation Memory
+
+Remembers translations line by line, keyed by source line and target
+language, in a persistent store shared by all worker processes. Translating
+a song only needs Gemini for lines that have not been translated before:
+repeated choruses are translated once, and lines shared with other songs
+come from memory.
+"""
+
+import logging
+import os
+
+from api.cache import TieredCache
+
+logger = logging.getLogger("translation_memory")
+
+# Translation memory configuration
+TRANSLATION_MEMORY_ENABLED = (
+    os.environ.get("TRANSLATION_MEMORY_ENABLED", "true").lower() == "true"
+)
+TRANSLATION_MEMORY_TTL = int(os.environ.get("TRANSLATION_MEMORY_TTL", 90 * 24 * 3600))
+TRANSLATION_MEMORY_MEMORY_SIZE = int(
+    os.environ.get("TRANSLATION_MEMORY_MEMORY_SIZE", 4096)
+)
+TRANSLATION_MEMORY_MAX_ENTRIES = int(
+    os.environ.get("TRANSLATION_MEMORY_MAX_ENTRIES", 200000)
+)
+
+
+def unique_lines(text):
+    """
+    List the distinct non-blank lines of a text, in order of first appearance.
+
+    Args:
+        text (str): Lyrics text
+
+    Returns:
+        list: Stripped lines, each once
+    """
+    lines = (line.strip() for line in text.split("\n"))
+    return list(dict.fromkeys(line for line in lines if line))
+
+
+def assemble(text, translations):
+    """
+    Rebuild a text line by line from translations of its lines.
+
+    Blank lines and leading indentation are kept, so the translation has the
+    same verse structure as the original.
+
+    Args:
+        text (str): Original text
+        translations (dict): Stripped source line -> translated line
+
+    Returns:
+        str: Translated text
+    """
+    lines = []
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped:
+            indent = line[: len(line) - len(line.lstrip())]
+            lines.append(indent + translations[stripped])
+        else:
+            lines.append("")
+    return "\n".join(lines)
+
+
+class TranslationMemory:
+    """Persistent (source line, target language) -> translated line store."""
+
+    def __init__(self, cache=None):
+        """
+        Args:
+            cache (TieredCache, optional): Backing store, defaults to the
+                shared "translation_memory" cache
+        """
+        self.cache = cache or TieredCache(
+            "translation_memory",
+            ttl=TRANSLATION_MEMORY_TTL,
+            memory_size=TRANSLATION_MEMORY_MEMORY_SIZE,
+            max_entries=TRANSLATION_MEMORY_MAX_ENTRIES,
+        )
+        self.stats = {
+            "lines_requested": 0,
+            "lines_unique": 0,
+            "lines_from_memory": 0,
+            "lines_stored": 0,
+        }
+
+    @staticmethod
+    def _key(line, target_lang):
+        return f"{target_lang.strip().casefold()}|{line}"
+
+    def lookup(self, text, target_lang):
+        """
+        Find remembered translations for the lines of a text.
+
+        Args:
+            text (str): Text to translate
+            target_lang (str): Target language
+
+        Returns:
+            tuple: (translations found as {line: translation}, lines still
+                to translate in order of first appearance)
+        """
+        lines = unique_lines(text)
+        self.stats["lines_requested"] += sum(
+            1 for line in text.split("\n") if line.strip()
+        )
+        self.stats["lines_unique"] += len(lines)
+
+        found = {}
+        missing = []
+        for line in lines:
+            translation = self.cache.get(self._key(line, target_lang))
+            if translation is None:
+                missing.append(line)
+            else:
+                found[line] = translation
+        self.stats["lines_from_memory"] += len(found)
+        return found, missing
+
+    def store(self, translations, target_lang):
+        """
+        Remember translated lines.
+
+        Args:
+            translations (dict): Stripped source line -> translated line
+            target_lang (str): Target language
+        """
+        for line, translation in translations.items():
+            if line and translation.strip():
+                self.cache.set(self._key(line, target_lang), translation.strip())
+                self.stats["lines_stored"] += 1
+
+    def learn(self, text, translated_text, target_lang):
+        """
+        Remember the lines of a whole-text translation, if its lines line up.
+
+        Args:
+            text (str): Original text
+            translated_text (str): Its translation
+            target_lang (str): Target language
+
+        Returns:
+            bool: True if the lines lined up and were stored
+        """
+        source = [line.strip() for line in text.strip().split("\n")]
+        target = [line.strip() for line in translated_text.strip().split("\n")]
+        if len(source) != len(target) or any(
+            bool(a) != bool(b) for a, b in zip(source, target)
+        ):
+            logger.info("Translation lines don't line up with the original, not stored")
+            return False
+        self.store(dict(zip(source, target)), target_lang)
+        return True
+
+
+translation_memory = TranslationMemory()
+
+
+def get_stats():
+    """Return the translation memory counters of this process."""
+    stats = dict(translation_memory.stats)
+    requested = stats["lines_requested"]
+    stats["reuse_ratio"] = (
+        round(1 - (stats["lines_unique"] - stats["lines_from_memory"]) / requested, 3)
+        if requested
+        else 0.0
+    )
+    return stats
@@ -4,16 +4,40 @@ Lyrika Server
 Flask application serving as backend for the Lyrika browser extension.
 """
 
+import hmac
+import json
 import logging
 import os
-
-from api.acrcloud import identify_song_from_audio
-from api.gemini import explain_song_meaning, get_lyrics_by_gemini, get_similar_songs
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from api.acrcloud import (
+    fetch_album_artwork,
+    identify_song_from_audio,
+    identify_song_from_bytes,
+    remember_artwork,
+)
+from api.cache import all_cache_stats
+from api.decoder_pool import DECODER_BACKEND, get_pool
+from api.gemini import explain_song_meaning, get_similar_songs
 from api.gemini import is_configured as gemini_configured
-from api.gemini import translate_lyrics
-from api.genius import get_lyrics_by_song
+from api.gemini import (
+    TRANSLATION_BATCH_MAX_LANGUAGES,
+    stream_explain_song_meaning,
+    stream_translate_lyrics,
+    translate_lyrics,
+    translate_lyrics_batch,
+)
+from api.genius import get_stats as get_genius_stats
+from api.http_client import get_client as get_http_client
+from api.lyrics import invalidate_lyrics, resolve_lyrics, revalidate_lyrics
+from api.singleflight import get_stats as get_singleflight_stats
+from api.transcode import TRANSCODE_MAX_INPUT_BYTES
+from api.translation_memory import get_stats as get_translation_memory_stats
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 
 # Configure logging
@@ -28,6 +52,43 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)  # Enable Cross-Origin Resource Sharing
 
+# Header carrying the browser tab identifier used for identify sessions
+CLIENT_ID_HEADER = "X-Lyrika-Client"
+
+# Largest raw audio upload accepted by /api/identify/raw
+MAX_AUDIO_UPLOAD_BYTES = int(
+    os.environ.get("MAX_AUDIO_UPLOAD_BYTES", TRANSCODE_MAX_INPUT_BYTES)
+)
+# Room for multipart headers and the JSON fields around the audio
+REQUEST_OVERHEAD_BYTES = 64 * 1024
+
+# Werkzeug rejects larger bodies before parsing them, including chunked uploads
+# without a Content-Length. The largest legitimate body is a base64 capture
+# sent to /api/identify, which is 4/3 the size of the audio.
+app.config["MAX_CONTENT_LENGTH"] = (
+    (MAX_AUDIO_UPLOAD_BYTES + 2) // 3 * 4 + REQUEST_OVERHEAD_BYTES
+)
+
+# Token required by the /api/admin endpoints (disabled when unset)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+# Deadlines (in seconds) for the lookups run after a song is identified
+IDENTIFY_ARTWORK_TIMEOUT = float(os.environ.get("IDENTIFY_ARTWORK_TIMEOUT", 3))
+IDENTIFY_LYRICS_TIMEOUT = float(os.environ.get("IDENTIFY_LYRICS_TIMEOUT", 20))
+
+# Threads shared by the artwork and lyrics lookups of all identify requests
+identify_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("IDENTIFY_WORKERS", 8)),
+    thread_name_prefix="identify",
+)
+
+
+@app.errorhandler(413)
+def request_too_large(error):
+    """Answer oversized request bodies with the usual JSON error."""
+    return jsonify({"status": "error", "message": "Request too large"}), 413
+
 
 @app.route("/api/health", methods=["GET"])
 def health_check():
@@ -51,6 +112,8 @@ def identify_song():
 
     Expected request format:
     - audio_data: Base64 encoded audio data (required)
+    - client_id: Identifier of the browser tab (optional, may also be sent
+      as the X-Lyrika-Client header)
     """
     if not request.is_json:
         return jsonify({"status": "error", "message": "Request must be JSON"}), 400
@@ -61,43 +124,152 @@ def identify_song():
     if not audio_data:
         return jsonify({"status": "error", "message": "Missing audio data"}), 400
 
+    client_id = data.get("client_id") or request.headers.get(CLIENT_ID_HEADER)
+    return _identify_and_fetch_lyrics(identify_song_from_audio, audio_data, client_id)
+
+
+@app.route("/api/identify/raw", methods=["POST"])
+def identify_song_raw():
+    """
+    Identify a song from raw audio bytes sent by the extension.
+
+    Accepts either:
+    - application/octet-stream: the recorded audio as the request body
+    - multipart/form-data: the recorded audio in an "audio" file field
+
+    The optional X-Lyrika-Client header identifies the browser tab.
+    """
+    if request.content_length and request.content_length > MAX_AUDIO_UPLOAD_BYTES:
+        return jsonify({"status": "error", "message": "Audio data too large"}), 413
+
+    if request.mimetype == "multipart/form-data":
+        audio_file = request.files.get("audio")
+        stream = audio_file.stream if audio_file else None
+    elif request.mimetype == "application/octet-stream":
+        stream = request.stream
+    else:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "Request must be application/octet-stream or multipart/form-data",
+                }
+            ),
+            415,
+        )
+
+    # Read at most one byte past the limit so oversized chunked uploads are caught
+    audio_bytes = stream.read(MAX_AUDIO_UPLOAD_BYTES + 1) if stream else b""
+
+    if not audio_bytes:
+        return jsonify({"status": "error", "message": "Missing audio data"}), 400
+
+    if len(audio_bytes) > MAX_AUDIO_UPLOAD_BYTES:
+        return jsonify({"status": "error", "message": "Audio data too large"}), 413
+
+    client_id = request.headers.get(CLIENT_ID_HEADER)
+    return _identify_and_fetch_lyrics(identify_song_from_bytes, audio_bytes, client_id)
+
+
+def _stage_result(future, started, timeout, stage):
+    """
+    Wait for a lookup until its deadline, measured from when the stages started.
+
+    Args:
+        future (Future): Running lookup
+        started (float): time.monotonic() when the lookups were submitted
+        timeout (float): Stage deadline in seconds
+        stage (str): Stage name for logging
+
+    Returns:
+        The lookup result, or None if it failed or missed its deadline
+    """
+    remaining = max(0, started + timeout - time.monotonic())
+    try:
+        return future.result(timeout=remaining)
+    except FutureTimeoutError:
+        logger.warning(f"{stage} lookup missed its {timeout}s deadline")
+    except Exception as e:
+        logger.exception(f"Error in {stage} lookup: {str(e)}")
+    return None
+
+
+def _fetch_song_details(song_info, client_id=None):
+    """
+    Fetch album artwork and lyrics for an identified song concurrently.
+
+    Each lookup has its own deadline, so the response waits for the slowest
+    stage rather than the sum of both. Artwork is stored with the cached
+    match, even when it is found after its deadline, so repeats include it.
+
+    Args:
+        song_info (dict): Successful identification result
+        client_id (str, optional): Identifier of the requesting browser tab
+
+    Returns:
+        tuple: (lyrics_info or None, album artwork URL or None)
+    """
+    title = song_info.get("title")
+    artist = song_info.get("artist")
+    started = time.monotonic()
+
+    lyrics_future = identify_executor.submit(resolve_lyrics, title, artist)
+    album_artwork = song_info.get("albumArtwork")
+    artwork_future = None
+    if not album_artwork:
+        artwork_future = identify_executor.submit(fetch_album_artwork, title, artist)
+
+    if artwork_future is not None:
+        album_artwork = _stage_result(
+            artwork_future, started, IDENTIFY_ARTWORK_TIMEOUT, "Artwork"
+        )
+        if album_artwork:
+            remember_artwork(song_info, album_artwork, client_id)
+        elif not artwork_future.done():
+
+            def store_late_artwork(future):
+                if future.exception() is None and future.result():
+                    remember_artwork(song_info, future.result(), client_id)
+
+            artwork_future.add_done_callback(store_late_artwork)
+
+    lyrics_info = _stage_result(
+        lyrics_future, started, IDENTIFY_LYRICS_TIMEOUT, "Lyrics"
+    )
+    return lyrics_info, album_artwork
+
+
+def _identify_and_fetch_lyrics(identify, audio, client_id=None):
+    """
+    Run song identification and attach lyrics to a successful match.
+
+    Args:
+        identify (callable): Identification function for the audio representation
+        audio (str | bytes): Audio payload passed to the identification function
+        client_id (str, optional): Identifier of the requesting browser tab
+
+    Returns:
+        Response: Flask JSON response
+    """
+    request_id = uuid.uuid4().hex
     try:
         # Identify the song using ACRCloud
-        logger.info("Identifying song using ACRCloud")
-        song_info = identify_song_from_audio(audio_data)
+        logger.info(f"Identifying song using ACRCloud (request {request_id})")
+        song_info = identify(
+            audio, client_id=client_id, fetch_artwork=False, request_id=request_id
+        )
 
         if song_info["status"] == "success":
-            # Get lyrics from Genius
             title = song_info.get("title")
             artist = song_info.get("artist")
             logger.info(
-                f"Song identified: '{title}' by '{artist}', fetching lyrics from Genius"
+                f"Song identified: '{title}' by '{artist}', fetching artwork and lyrics"
             )
-            lyrics_info = get_lyrics_by_song(title, artist)
-
-            # Check if Genius returned lyrics
-            lyrics = lyrics_info.get("lyrics", "")
-            lyrics_source = lyrics_info.get("lyrics_source", "genius")
-            formatting_source = lyrics_info.get("formatting", "basic")
-
-            # If Genius didn't return lyrics, try Gemini as a fallback
-            if not lyrics or lyrics.strip() == "":
-                logger.info(
-                    f"No lyrics found from Genius for '{title}' by '{artist}', trying Gemini API"
-                )
-                gemini_lyrics_info = get_lyrics_by_gemini(title, artist)
-
-                if gemini_lyrics_info["status"] == "success":
-                    lyrics = gemini_lyrics_info.get("lyrics", "")
-                    lyrics_source = "gemini"
-                    formatting_source = "gemini"
-                    logger.info(
-                        f"Successfully retrieved lyrics from Gemini API for '{title}' by '{artist}'"
-                    )
-                else:
-                    logger.warning(
-                        f"Gemini API also couldn't find lyrics for '{title}' by '{artist}'"
-                    )
+            lyrics_info, album_artwork = _fetch_song_details(song_info, client_id)
+
+            lyrics = (lyrics_info or {}).get("lyrics", "")
+            lyrics_source = (lyrics_info or {}).get("lyrics_source", "none")
+            formatting_source = (lyrics_info or {}).get("formatting", "basic")
 
             # Combine results
             result = {
@@ -108,14 +280,19 @@ def identify_song():
                 "lyrics": lyrics,
                 "youtubeId": song_info.get("youtubeId"),
                 "spotifyId": song_info.get("spotifyId"),
-                "albumArtwork": song_info.get("albumArtwork"),
+                "albumArtwork": album_artwork,
                 "lyrics_source": lyrics_source,
                 "formatting": formatting_source,
+                "version": (lyrics_info or {}).get("version"),
+                "upgrade_pending": (lyrics_info or {}).get("upgrade_pending", False),
             }
+            if song_info.get("cache"):
+                result["cache"] = song_info["cache"]
             return jsonify(result)
         else:
             logger.warning(
-                f"Failed to identify song: {song_info.get('message', 'Unknown error')}"
+                f"Failed to identify song (request {request_id}): "
+                f"{song_info.get('message', 'Unknown error')}"
             )
             return jsonify(song_info)
 
@@ -145,38 +322,7 @@ def get_lyrics():
         return jsonify({"status": "error", "message": "Missing song title"}), 400
 
     try:
-        logger.info(f"Fetching lyrics for '{title}' by '{artist}' from Genius")
-        lyrics_info = get_lyrics_by_song(title, artist)
-
-        # Check if Genius returned lyrics
-        lyrics = lyrics_info.get("lyrics", "")
-        lyrics_source = lyrics_info.get("lyrics_source", "genius")
-        formatting_source = lyrics_info.get("formatting", "basic")
-
-        # If Genius didn't return lyrics or returned an error, try Gemini as a fallback
-        if not lyrics or lyrics.strip() == "" or lyrics_info.get("status") == "error":
-            logger.info(
-                f"No lyrics found from Genius for '{title}' by '{artist}', trying Gemini API"
-            )
-            gemini_lyrics_info = get_lyrics_by_gemini(title, artist)
-
-            if gemini_lyrics_info["status"] == "success":
-                # Replace the Genius response with Gemini's
-                lyrics_info = gemini_lyrics_info
-                lyrics_info["lyrics_source"] = "gemini"
-                lyrics_info["formatting"] = "gemini"
-                logger.info(
-                    f"Successfully retrieved lyrics from Gemini API for '{title}' by '{artist}'"
-                )
-            else:
-                logger.warning(
-                    f"Gemini API also couldn't find lyrics for '{title}' by '{artist}'"
-                )
-                lyrics_info["lyrics_source"] = "none"
-        else:
-            lyrics_info["lyrics_source"] = lyrics_source
-            lyrics_info["formatting"] = formatting_source
-
+        lyrics_info = resolve_lyrics(title, artist)
         return jsonify(lyrics_info)
     except Exception as e:
         logger.exception(f"Error fetching lyrics: {str(e)}")
@@ -188,6 +334,28 @@ def get_lyrics():
         )
 
 
+@app.route("/api/lyrics/revalidate", methods=["GET"])
+def check_lyrics_version():
+    """
+    Check whether better formatted lyrics are available for a song.
+
+    Expected query parameters:
+    - title: Song title (required)
+    - artist: Artist name (optional)
+    - version: Version token from the previous lyrics response (required)
+    """
+    title = request.args.get("title")
+    artist = request.args.get("artist", "")
+    version = request.args.get("version")
+    if not title or not version:
+        return (
+            jsonify({"status": "error", "message": "Missing song title or version"}),
+            400,
+        )
+
+    return jsonify(revalidate_lyrics(title, artist, version))
+
+
 @app.route("/api/translate_lyrics", methods=["POST"])
 def translate():
     """
@@ -227,6 +395,94 @@ def translate():
         )
 
 
+@app.route("/api/translate_lyrics/batch", methods=["POST"])
+def translate_batch():
+    """
+    Translate lyrics into several target languages in one request.
+
+    Expected request format:
+    - lyrics: The lyrics to translate (required)
+    - source_lang: Source language (optional, defaults to "auto")
+    - target_langs: List of target languages (required)
+    """
+    if not request.is_json:
+        return jsonify({"status": "error", "message": "Request must be JSON"}), 400
+
+    data = request.json
+    lyrics = data.get("lyrics")
+    source_lang = data.get("source_lang", "auto")
+    target_langs = data.get("target_langs")
+
+    if not lyrics:
+        return jsonify({"status": "error", "message": "Missing lyrics"}), 400
+
+    if (
+        not isinstance(target_langs, list)
+        or not target_langs
+        or not all(isinstance(lang, str) and lang.strip() for lang in target_langs)
+    ):
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "target_langs must be a non-empty list of languages",
+                }
+            ),
+            400,
+        )
+
+    if len(target_langs) > TRANSLATION_BATCH_MAX_LANGUAGES:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": f"At most {TRANSLATION_BATCH_MAX_LANGUAGES} "
+                    "target languages per request",
+                }
+            ),
+            400,
+        )
+
+    try:
+        logger.info(f"Translating lyrics from {source_lang} to {target_langs}")
+        return jsonify(translate_lyrics_batch(lyrics, target_langs, source_lang))
+    except Exception as e:
+        logger.exception(f"Error batch translating lyrics: {str(e)}")
+        return (
+            jsonify(
+                {"status": "error", "message": f"Failed to translate lyrics: {str(e)}"}
+            ),
+            500,
+        )
+
+
+@app.route("/api/translate_lyrics/stream", methods=["POST"])
+def translate_stream():
+    """
+    Translate lyrics, streaming translated lines as they are generated.
+
+    Same request format as /api/translate_lyrics. The response is
+    newline-delimited JSON: {"type": "line", "text"} events, then a "done"
+    event with the /api/translate_lyrics result or an "error" event.
+    """
+    if not request.is_json:
+        return jsonify({"status": "error", "message": "Request must be JSON"}), 400
+
+    data = request.json
+    lyrics = data.get("lyrics")
+    source_lang = data.get("source_lang", "auto")
+    target_lang = data.get("target_lang")
+
+    if not lyrics:
+        return jsonify({"status": "error", "message": "Missing lyrics"}), 400
+
+    if not target_lang:
+        return jsonify({"status": "error", "message": "Missing target language"}), 400
+
+    logger.info(f"Streaming translation from {source_lang} to {target_lang}")
+    return _ndjson_response(stream_translate_lyrics(lyrics, source_lang, target_lang))
+
+
 @app.route("/api/explain_meaning", methods=["POST"])
 def explain_meaning():
     """
@@ -285,6 +541,56 @@ def explain_meaning():
         )
 
 
+@app.route("/api/explain_meaning/stream", methods=["POST"])
+def explain_meaning_stream():
+    """
+    Explain the meaning of a song, streaming the explanation line by line.
+
+    Same request format as /api/explain_meaning. The response is
+    newline-delimited JSON: {"type": "line", "text"} events, then a "done"
+    event with the /api/explain_meaning result or an "error" event.
+    """
+    if not request.is_json:
+        return jsonify({"status": "error", "message": "Request must be JSON"}), 400
+
+    data = request.json
+    title = data.get("title")
+    artist = data.get("artist")
+    lyrics = data.get("lyrics")
+
+    if not title or not artist or not lyrics:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": "Missing required fields (title, artist, or lyrics)",
+                }
+            ),
+            400,
+        )
+
+    logger.info(f"Streaming meaning for '{title}' by '{artist}'")
+    return _ndjson_response(stream_explain_song_meaning(title, artist, lyrics))
+
+
+def _ndjson_response(events):
+    """Stream events as newline-delimited JSON, unbuffered by proxies."""
+
+    def generate():
+        try:
+            for event in events:
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            logger.exception(f"Error while streaming: {str(e)}")
+            yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route("/api/similar_songs", methods=["POST"])
 def similar_songs():
     """
@@ -331,6 +637,33 @@ def similar_songs():
         )
 
 
+@app.route("/api/admin/lyrics_cache/invalidate", methods=["POST"])
+def invalidate_lyrics_cache():
+    """
+    Forget cached lyrics so the next request fetches them again.
+
+    Requires the X-Admin-Token header to match ADMIN_TOKEN.
+
+    Expected request format:
+    - title: Song title (optional, all songs are invalidated if omitted)
+    - artist: Artist name (optional)
+    - negative_only: Only forget "no lyrics found" entries (optional)
+    """
+    token = request.headers.get(ADMIN_TOKEN_HEADER, "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+
+    data = request.get_json(silent=True) or {}
+    title = data.get("title")
+    artist = data.get("artist", "")
+    caches = invalidate_lyrics(
+        title, artist, negative_only=bool(data.get("negative_only"))
+    )
+    logger.info(f"Invalidated {caches} for {title or 'all songs'}")
+
+    return jsonify({"status": "success", "invalidated": caches})
+
+
 @app.route("/api/debug/gemini_status", methods=["GET"])
 def debug_gemini_status():
     """Debug endpoint to check Gemini API configuration status"""
@@ -355,6 +688,59 @@ def debug_gemini_status():
     )
 
 
+@app.route("/api/debug/decoder_status", methods=["GET"])
+def debug_decoder_status():
+    """Debug endpoint to check the audio decoder pool"""
+    if DECODER_BACKEND != "pool":
+        return jsonify(
+            {
+                "status": "success",
+                "backend": DECODER_BACKEND,
+                "message": "Decoder pool is disabled",
+            }
+        )
+
+    pool = get_pool()
+    healthy = pool.health_check()
+    logger.info(f"Debug request for decoder status: healthy={healthy}")
+
+    return jsonify(
+        {
+            "status": "success" if healthy else "error",
+            "backend": DECODER_BACKEND,
+            "workers": pool.size,
+            "stats": pool.stats,
+        }
+    )
+
+
+@app.route("/api/debug/http_status", methods=["GET"])
+def debug_http_status():
+    """Debug endpoint to check outbound connection pooling"""
+    client = get_http_client()
+    return jsonify(
+        {
+            "status": "success",
+            "http2": client.http2,
+            "hosts": client.connection_stats(),
+            "genius": get_genius_stats(),
+        }
+    )
+
+
+@app.route("/api/debug/cache_status", methods=["GET"])
+def debug_cache_status():
+    """Debug endpoint to check cache hit rates"""
+    return jsonify(
+        {
+            "status": "success",
+            "caches": all_cache_stats(),
+            "singleflight": get_singleflight_stats(),
+            "translation_memory": get_translation_memory_stats(),
+        }
+    )
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     debug = os.environ.get("FLASK_ENV") == "development" or True
@@ -0,0 +1,157 @@
+"""
+Lyrics HTML Extraction Benchmark
+
+Compares the lyrics extraction backends ("stdlib", "lxml", "bs4") over a
+corpus of saved Genius song pages, reporting CPU time and peak memory per
+page, and checking that every backend extracts the same lyrics.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_html_extract [CORPUS_DIR] [--backends stdlib,bs4] [--repeat 5]
+
+CORPUS_DIR should contain song pages saved from genius.com (.html). Without
+it, synthetic pages with a Genius-like layout are generated instead.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from api.html_extract import BACKENDS, LyricsExtractor, resolve_backend
+
+
+def load_corpus(corpus_dir):
+    """Load all saved pages from a directory, sorted by file name."""
+    pages = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.lower().endswith((".html", ".htm")):
+            with open(os.path.join(corpus_dir, name), encoding="utf-8") as page_file:
+                pages.append((name, page_file.read()))
+    return pages
+
+
+def synthetic_page(seed, verses=6):
+    """Build a page shaped like a Genius song page (scripts, header, sidebar, lyrics)."""
+    rng = random.Random(seed)
+    words = "love night heart fire rain dance light dream city road home".split()
+
+    def line():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(4, 9))).capitalize()
+
+    filler = "".join(
+        f'<div class="Sidebar__Item-{i}"><a href="/x/{i}">Related {i}</a>'
+        f"<span>{line()}</span></div>"
+        for i in range(400)
+    )
+    containers = []
+    for _ in range(3):
+        body = []
+        for _ in range(verses // 3):
+            body.append("[Verse]<br/>")
+            for _ in range(6):
+                body.append(
+                    f'<a class="ReferentFragmentdesktop__ClickTarget"><span>{line()}</span></a><br/>'
+                    if rng.random() < 0.3
+                    else f"{line()}<br/>"
+                )
+            body.append("<br/>")
+        body.append(
+            '<span class="ReferentFragmentVariantdesktop__Container">annotation</span>'
+        )
+        containers.append(
+            f'<div data-lyrics-container="true" class="Lyrics__Container-sc-1 abc">'
+            f'{"".join(body)}</div>'
+        )
+    # Genius embeds the page state as a large JSON script after the content
+    state = "<script>window.__PRELOADED_STATE__ = " + "{}," * 70000 + "</script>"
+    return (
+        "<html><head><title>Song</title><script>var config = {};</script></head><body>"
+        f'<div class="Header">{filler[: len(filler) // 2]}</div>'
+        f'<div class="SongPage__Section">{"".join(containers)}</div>'
+        '<div class="LyricsFooter__Container-sc-1">Credits</div>'
+        f'<div class="RightSidebar">{filler[len(filler) // 2:]}</div>'
+        f"{state}</body></html>"
+    )
+
+
+def measure(backend, html, repeat):
+    """Return (median CPU ms, peak KB, extracted text) for one page."""
+    extract = BACKENDS[backend]
+    cpu = []
+    for _ in range(repeat):
+        start = time.process_time()
+        text = extract(html)
+        cpu.append((time.process_time() - start) * 1000)
+
+    tracemalloc.start()
+    extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(cpu), peak / 1024, text
+
+
+def streamed_fraction(html, chunk_size=16384):
+    """Fraction of the page fed to the streaming extractor before it reports done."""
+    extractor = LyricsExtractor()
+    for start in range(0, len(html), chunk_size):
+        extractor.feed(html[start : start + chunk_size])
+        if extractor.done:
+            return min(1.0, (start + chunk_size) / len(html))
+    return 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("corpus_dir", nargs="?", help="Directory of saved Genius pages")
+    parser.add_argument("--backends", default="stdlib,lxml,bs4")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--synthetic", type=int, default=5, help="Synthetic pages to generate")
+    args = parser.parse_args()
+
+    if args.corpus_dir:
+        pages = load_corpus(args.corpus_dir)
+    else:
+        pages = [(f"synthetic-{i}", synthetic_page(i)) for i in range(args.synthetic)]
+    if not pages:
+        print("No pages found")
+        return 1
+
+    backends = []
+    for name in args.backends.split(","):
+        if resolve_backend(name) == name:
+            backends.append(name)
+        else:
+            print(f"Skipping unavailable backend: {name}")
+
+    results = {backend: [] for backend in backends}
+    texts = {backend: [] for backend in backends}
+    for name, html in pages:
+        for backend in backends:
+            cpu_ms, peak_kb, text = measure(backend, html, args.repeat)
+            results[backend].append((cpu_ms, peak_kb))
+            texts[backend].append(" ".join(text.split()))
+
+    average_kb = statistics.mean(len(html) for _, html in pages) / 1024
+    print(f"{len(pages)} pages, {average_kb:.0f} KB average")
+    print(f"{'backend':<8} {'cpu ms/page':>12} {'peak KB/page':>13} {'same text':>10}")
+    reference = texts[backends[0]]
+    for backend in backends:
+        cpu = statistics.mean(row[0] for row in results[backend])
+        peak = statistics.mean(row[1] for row in results[backend])
+        same = sum(a == b for a, b in zip(texts[backend], reference))
+        print(f"{backend:<8} {cpu:12.2f} {peak:13.0f} {same:>5}/{len(pages)}")
+
+    fraction = statistics.mean(streamed_fraction(html) for _, html in pages)
+    print(f"Streaming scrape stops after {fraction:.0%} of the page on average")
+
+    empty = sum(not text for text in reference)
+    if empty:
+        print(f"Warning: {empty} pages had no lyrics containers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
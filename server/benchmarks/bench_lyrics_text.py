@@ -0,0 +1,223 @@
+"""
+Lyrics Cleanup and Validation Benchmark
+
+Compares api.lyrics_text against the original regex chain it replaced (kept
+below as the reference), reporting time per text and checking that both give
+the same cleaned text and the same validity decision for every input.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_lyrics_text [CORPUS_DIR] [--fuzz 2000] [--repeat 20]
+
+CORPUS_DIR may contain raw lyrics text (.txt) or saved Genius song pages
+(.html, extracted with the stdlib backend). Synthetic lyrics with Genius page
+furniture, and randomly assembled fuzz inputs, are always included. Exits
+with status 1 if any output differs.
+"""
+
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+from api.html_extract import extract_lyrics_text
+from api.lyrics_text import check_lyrics, clean_lyrics, process_lyrics
+
+
+def reference_clean(lyrics):
+    """The original cleanup chain from genius.py, unchanged."""
+    lyrics = re.sub(r"\d+ Contributors.*?Read More", "", lyrics, flags=re.DOTALL)
+    lyrics = re.sub(r"Translations.*?Lyrics", "", lyrics, flags=re.DOTALL)
+    lyrics = re.sub(r"[\w\s]+ Lyrics", "", lyrics)
+    lyrics = re.sub(r"\[.*?\]", "", lyrics)
+    lyrics = re.sub(r"Embed$", "", lyrics, flags=re.MULTILINE)
+    lyrics = re.sub(r"Share URL$", "", lyrics, flags=re.MULTILINE)
+    lyrics = re.sub(r"Copy$", "", lyrics, flags=re.MULTILINE)
+    lyrics = re.sub(r"\r\n", "\n", lyrics)
+    lyrics = re.sub(r"([a-z])[\s]*\n[\s]*([a-z])", r"\1 \2", lyrics)
+    lyrics = re.sub(r"([.,;:!?])[\s]*\n", r"\1\n", lyrics)
+    lyrics = re.sub(r"([.,;:!?])[\s]*([A-Z])", r"\1\n\2", lyrics)
+    lyrics = re.sub(r"\n{3,}", "\n\n", lyrics)
+    lyrics_lines = [line.strip() for line in lyrics.split("\n")]
+    lyrics = "\n".join(lyrics_lines)
+    lyrics = re.sub(r" {2,}", " ", lyrics)
+    lyrics = re.sub(r"^\n+", "", lyrics)
+    lyrics = re.sub(r"\n+$", "", lyrics)
+    lyrics = re.sub(r"\n{3,}", "\n\n", lyrics)
+    return lyrics.strip()
+
+
+def reference_is_valid(text):
+    """The original is_valid_lyrics from genius.py, without its logging."""
+    if not text:
+        return False
+    if len(text.strip()) < 100:
+        return False
+    non_lyrics_patterns = [
+        r"(?i)best of \d{4}",
+        r"(?i)worst of \d{4}",
+        r"(?i)top \d+ (songs|tracks)",
+        r"(?i)#\d+:",
+        r"(?i)honorable mention",
+        r"(?i)ft\.\s+[\w\s]+#\d+",
+    ]
+    for pattern in non_lyrics_patterns:
+        if re.search(pattern, text):
+            return False
+    if len(re.findall(r"#\d+", text)) > 3:
+        return False
+    if len(re.findall(r"[\w\s&]+ ~ [\w\s&\'.]+ \(\d+:\d+\)", text)) > 2:
+        return False
+    if len(re.findall(r",\s*[\w\s&]+ ~ [\w\s&\'.]+ \(\d+:\d+\)", text)) > 2:
+        return False
+    if len(re.findall(r"(?:^|\n|\,)\s*([\w\s&]+),\s*$", text)) > 3:
+        return False
+    if len(re.findall(r"\(\d+:\d+\)", text)) > 3:
+        return False
+    lines = text.strip().split("\n")
+    short_lines = [line for line in lines if 0 < len(line.strip()) < 80]
+    if len(short_lines) < 8 or len(short_lines) / len(lines) < 0.5:
+        return False
+    return True
+
+
+def reference_process(raw_text):
+    lyrics = reference_clean(raw_text)
+    return lyrics, reference_is_valid(lyrics)
+
+
+def load_corpus(corpus_dir):
+    """Load raw lyrics texts and saved pages from a directory."""
+    texts = []
+    for name in sorted(os.listdir(corpus_dir)):
+        path = os.path.join(corpus_dir, name)
+        if name.lower().endswith(".txt"):
+            with open(path, encoding="utf-8") as text_file:
+                texts.append(text_file.read())
+        elif name.lower().endswith((".html", ".htm")):
+            with open(path, encoding="utf-8") as page_file:
+                texts.append(extract_lyrics_text(page_file.read(), backend="stdlib"))
+    return texts
+
+
+WORDS = "love night heart fire rain dance light dream city road home".split()
+FURNITURE = [
+    "12 Contributors",
+    "Translations",
+    "Read More",
+    "Song Title Lyrics",
+    " Lyrics",
+    "Lyrics",
+    "-",
+    "Beyoncé",
+    " & ",
+    " ~ ",
+    ",",
+    ", \n",
+    "[Chorus]",
+    "[Verse 1: Artist]",
+    "Embed",
+    "Share URL",
+    "Copy",
+    "CopyEmbed",
+    "Share URLEmbed",
+    "EmbedShare URL",
+    "Share URLCopy",
+    "\r\n",
+    "\n",
+    "\n\n\n",
+    "  ",
+    " \n ",
+    ", ",
+    ". ",
+    "! I",
+    "#1: ",
+    "Artist ~ Song (3:45)",
+    "(2:10)",
+    "Best of 2015",
+]
+
+
+def synthetic_lyrics(rng, verses=6):
+    """Raw container text shaped like a scraped Genius page."""
+    parts = [f"{rng.randint(1, 90)} Contributors", "Translations", "Español"]
+    parts.append("Song Title Lyrics")
+    parts.append(f"About this song{rng.choice(['', '…'])} Read More ")
+    for verse in range(verses):
+        parts.append(f"[Verse {verse + 1}]")
+        for _ in range(rng.randint(4, 8)):
+            line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+            parts.append(line.capitalize() + rng.choice(["", ",", ".", "!", "  "]))
+        parts.append("")
+    parts.append(rng.choice(["Embed", "Share URLCopyEmbed", "123Embed", "Copy"]))
+    return rng.choice(["\n", "\r\n"]).join(parts)
+
+
+def fuzz_text(rng):
+    """Random mix of words and page furniture, to exercise pattern interactions."""
+    pieces = []
+    for _ in range(rng.randint(1, 60)):
+        if rng.random() < 0.4:
+            pieces.append(rng.choice(FURNITURE))
+        else:
+            pieces.append(rng.choice(WORDS + [word.capitalize() for word in WORDS]))
+        pieces.append(rng.choice(["", " ", "\n", " \n"]))
+    return "".join(pieces)
+
+
+def time_per_text(process, texts, repeat):
+    """Median over repeats of the mean wall time per text, in microseconds."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            process(text)
+        runs.append((time.perf_counter() - start) / len(texts) * 1e6)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("corpus_dir", nargs="?", help="Directory of .txt or .html files")
+    parser.add_argument("--synthetic", type=int, default=200)
+    parser.add_argument("--fuzz", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    corpus = load_corpus(args.corpus_dir) if args.corpus_dir else []
+    corpus += [synthetic_lyrics(rng) for _ in range(args.synthetic)]
+    fuzz = [fuzz_text(rng) for _ in range(args.fuzz)]
+
+    mismatches = 0
+    for text in corpus + fuzz:
+        expected = reference_clean(text)
+        if clean_lyrics(text) != expected:
+            mismatches += 1
+            print(f"Cleanup differs for {text!r}")
+        # Validate both the cleaned text and the raw text, which has more
+        # furniture for the list/playlist checks to catch
+        for candidate in (expected, text):
+            if check_lyrics(candidate).valid != reference_is_valid(candidate):
+                mismatches += 1
+                print(f"Validation differs for {candidate!r}")
+
+    valid = sum(process_lyrics(text)[1].valid for text in corpus)
+    print(f"{len(corpus)} lyrics texts ({valid} valid), {len(fuzz)} fuzz inputs")
+    print(f"{'pipeline':<10} {'us/text':>9}")
+    reference_us = time_per_text(reference_process, corpus, args.repeat)
+    compiled_us = time_per_text(process_lyrics, corpus, args.repeat)
+    print(f"{'reference':<10} {reference_us:9.1f}")
+    print(f"{'compiled':<10} {compiled_us:9.1f}  ({reference_us / compiled_us:.2f}x)")
+
+    if mismatches:
+        print(f"{mismatches} outputs differ from the reference")
+        return 1
+    print("All outputs identical to the reference")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+ACRCloud Sample Profile Benchmark
+
+Compares sample profiles ("full", "compact", ...) over a directory of captured
+clips, reporting sample size, preparation time, ACRCloud round-trip time,
+end-to-end latency and match rate.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_sample_profiles CAPTURE_DIR [--profiles full,compact] [--offline]
+
+CAPTURE_DIR should contain recordings as produced by the extension (.webm).
+With --offline, ACRCloud is not called and only size/preparation time is measured.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from api.acrcloud import prepare_sample, send_sample_to_acrcloud  # noqa: E402
+from api.sample_profiles import PROFILES  # noqa: E402
+
+
+def load_captures(capture_dir):
+    """Load all audio captures from a directory, sorted by file name."""
+    captures = []
+    for name in sorted(os.listdir(capture_dir)):
+        if name.lower().endswith((".webm", ".ogg", ".wav", ".mp3", ".m4a")):
+            with open(os.path.join(capture_dir, name), "rb") as capture_file:
+                captures.append((name, capture_file.read()))
+    return captures
+
+
+def matched_title(response):
+    """Return "title - artist" for a matched ACRCloud response, or None."""
+    if response.status_code != 200:
+        return None
+    result = response.json()
+    music = result.get("metadata", {}).get("music", [])
+    if result.get("status", {}).get("code") != 0 or not music:
+        return None
+    artists = music[0].get("artists") or [{}]
+    return f"{music[0].get('title', '')} - {artists[0].get('name', '')}"
+
+
+def run_profile(profile, captures, offline):
+    """Run every capture through one profile and collect per-clip measurements."""
+    rows = []
+    for name, data in captures:
+        start = time.perf_counter()
+        sample = prepare_sample(data, profile)
+        prepared = time.perf_counter()
+
+        match = None
+        if not offline:
+            match = matched_title(send_sample_to_acrcloud(sample))
+        finished = time.perf_counter()
+
+        rows.append(
+            {
+                "name": name,
+                "bytes": len(sample),
+                "prepare_ms": (prepared - start) * 1000,
+                "acr_ms": (finished - prepared) * 1000,
+                "total_ms": (finished - start) * 1000,
+                "match": match,
+            }
+        )
+    return rows
+
+
+def summarize(profile, rows, reference=None, offline=False):
+    """Print one summary line for a profile."""
+    total = [row["total_ms"] for row in rows]
+    summary = (
+        f"{profile:>10} | "
+        f"avg sample {statistics.mean(row['bytes'] for row in rows) / 1024:8.1f} KB | "
+        f"prepare p50 {statistics.median(row['prepare_ms'] for row in rows):7.1f} ms | "
+    )
+    if not offline:
+        matches = sum(1 for row in rows if row["match"])
+        summary += (
+            f"acr p50 {statistics.median(row['acr_ms'] for row in rows):7.1f} ms | "
+            f"e2e p50 {statistics.median(total):7.1f} ms "
+            f"max {max(total):7.1f} ms | "
+            f"match rate {matches}/{len(rows)}"
+        )
+        if reference is not None:
+            agree = sum(
+                1
+                for row, ref in zip(rows, reference)
+                if ref["match"] and row["match"] == ref["match"]
+            )
+            summary += f" | agrees with full {agree}/{sum(1 for r in reference if r['match'])}"
+    print(summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("capture_dir", help="Directory of captured audio clips")
+    parser.add_argument(
+        "--profiles",
+        default=",".join(PROFILES),
+        help="Comma-separated profile names to compare",
+    )
+    parser.add_argument(
+        "--offline", action="store_true", help="Do not call ACRCloud"
+    )
+    args = parser.parse_args()
+
+    captures = load_captures(args.capture_dir)
+    if not captures:
+        print(f"No captures found in {args.capture_dir}")
+        return 1
+
+    profiles = [name.strip() for name in args.profiles.split(",") if name.strip()]
+    print(f"Benchmarking {len(captures)} captures across profiles: {', '.join(profiles)}")
+
+    results = {profile: run_profile(profile, captures, args.offline) for profile in profiles}
+    for profile in profiles:
+        reference = results.get("full") if profile != "full" else None
+        summarize(profile, results[profile], reference, args.offline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
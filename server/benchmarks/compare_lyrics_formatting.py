@@ -0,0 +1,180 @@
+"""
+Lyrics Formatting Comparison
+
+Compares the local rule-based formatter (api.lyrics_text.format_lyrics) with
+Gemini-formatted lyrics for the same songs: how many words agree, and how
+well line breaks and verse breaks line up (F1 over break positions, measured
+in words so that differences in punctuation don't matter). Also reports how
+long each formatter takes per song.
+
+Usage (from the server directory):
+    python -m benchmarks.compare_lyrics_formatting CORPUS_DIR [--fetch-gemini]
+
+CORPUS_DIR holds one input per song, either the raw lyrics container text
+(NAME.raw.txt) or a saved Genius page (NAME.html), next to the Gemini output
+for it (NAME.gemini.txt). With --fetch-gemini, missing Gemini outputs are
+generated with format_lyrics_with_gemini (needs GEMINI_API_KEY) and saved.
+"""
+
+import argparse
+import difflib
+import os
+import re
+import statistics
+import sys
+import time
+
+from api.html_extract import extract_lyrics_text
+from api.lyrics_text import clean_lyrics, format_lyrics
+
+WORD = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+
+
+def load_corpus(corpus_dir):
+    """Return (name, raw container text, reference path) for every song."""
+    songs = []
+    for file_name in sorted(os.listdir(corpus_dir)):
+        path = os.path.join(corpus_dir, file_name)
+        if file_name.endswith(".raw.txt"):
+            name = file_name[: -len(".raw.txt")]
+            with open(path, encoding="utf-8") as raw_file:
+                raw_text = raw_file.read()
+        elif file_name.lower().endswith((".html", ".htm")):
+            name = os.path.splitext(file_name)[0]
+            with open(path, encoding="utf-8") as page_file:
+                raw_text = extract_lyrics_text(page_file.read(), backend="stdlib")
+        else:
+            continue
+        songs.append((name, raw_text, os.path.join(corpus_dir, f"{name}.gemini.txt")))
+    return songs
+
+
+def fetch_gemini(raw_text, reference_path):
+    """Format one song with Gemini and save the result, returning (text, seconds)."""
+    from api.gemini import _format_lyrics_with_gemini
+
+    start = time.perf_counter()
+    result = _format_lyrics_with_gemini(clean_lyrics(raw_text))
+    elapsed = time.perf_counter() - start
+    if result.get("status") != "success":
+        print(f"Gemini failed for {reference_path}: {result.get('message')}")
+        return None, elapsed
+    with open(reference_path, "w", encoding="utf-8") as reference_file:
+        reference_file.write(result["lyrics"])
+    return result["lyrics"], elapsed
+
+
+def layout(text):
+    """
+    Split formatted lyrics into words and break positions.
+
+    Returns:
+        tuple: (words, line break offsets, verse break offsets), where an
+            offset is the number of words before the break
+    """
+    words = []
+    line_breaks = set()
+    verse_breaks = set()
+    blank = False
+    for line in text.strip().split("\n"):
+        line_words = WORD.findall(line.casefold())
+        if not line_words:
+            blank = True
+            continue
+        if words:
+            (verse_breaks if blank else line_breaks).add(len(words))
+        words.extend(line_words)
+        blank = False
+    return words, line_breaks, verse_breaks
+
+
+def f1(found, expected):
+    """F1 score of two sets of break offsets (1.0 when both are empty)."""
+    if not found and not expected:
+        return 1.0
+    matched = len(found & expected)
+    if not matched:
+        return 0.0
+    precision = matched / len(found)
+    recall = matched / len(expected)
+    return 2 * precision * recall / (precision + recall)
+
+
+def compare(local, reference):
+    """Return (word similarity, line break F1, verse break F1) for one song."""
+    local_words, local_lines, local_verses = layout(local)
+    reference_words, reference_lines, reference_verses = layout(reference)
+    matcher = difflib.SequenceMatcher(None, local_words, reference_words, autojunk=False)
+
+    # Map break offsets in the local text onto the reference through matching words
+    offsets = {}
+    for block in matcher.get_matching_blocks():
+        for i in range(block.size):
+            offsets[block.a + i + 1] = block.b + i + 1
+
+    def mapped(breaks):
+        return {offsets[offset] for offset in breaks if offset in offsets}
+
+    # A line break in one text may be a verse break in the other; count both
+    # as line breaks for the line score
+    local_all = mapped(local_lines | local_verses)
+    reference_all = reference_lines | reference_verses
+    return (
+        matcher.ratio(),
+        f1(local_all, reference_all),
+        f1(mapped(local_verses), reference_verses),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("corpus_dir", help="Directory of .raw.txt/.html and .gemini.txt files")
+    parser.add_argument(
+        "--fetch-gemini", action="store_true", help="Generate missing Gemini outputs"
+    )
+    args = parser.parse_args()
+
+    songs = load_corpus(args.corpus_dir)
+    if not songs:
+        print("No .raw.txt or .html inputs found")
+        return 1
+
+    rows = []
+    local_ms = []
+    gemini_seconds = []
+    print(f"{'song':<32} {'words':>6} {'lines':>6} {'verses':>7}")
+    for name, raw_text, reference_path in songs:
+        start = time.perf_counter()
+        local = format_lyrics(raw_text)
+        local_ms.append((time.perf_counter() - start) * 1000)
+
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as reference_file:
+                reference = reference_file.read()
+        elif args.fetch_gemini:
+            reference, elapsed = fetch_gemini(raw_text, reference_path)
+            gemini_seconds.append(elapsed)
+        else:
+            reference = None
+        if not reference:
+            print(f"{name[:32]:<32} {'no Gemini output':>21}")
+            continue
+
+        words, lines, verses = compare(local, reference)
+        rows.append((words, lines, verses))
+        print(f"{name[:32]:<32} {words:6.1%} {lines:6.2f} {verses:7.2f}")
+
+    if rows:
+        print(
+            f"{'mean':<32} {statistics.mean(r[0] for r in rows):6.1%} "
+            f"{statistics.mean(r[1] for r in rows):6.2f} "
+            f"{statistics.mean(r[2] for r in rows):7.2f}"
+        )
+    print(f"Local formatter: {statistics.mean(local_ms):.2f} ms per song")
+    if gemini_seconds:
+        print(f"Gemini formatter: {statistics.mean(gemini_seconds):.2f} s per song")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
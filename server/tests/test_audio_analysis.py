@@ -0,0 +1,188 @@
+"""
+Pre-filter fixtures: synthesized silence, noise, speech and music clips must
+be accepted or rejected as labeled, so threshold changes can't silently
+regress. Real captures can be added by pointing PREFILTER_FIXTURE_DIR at a
+directory with one sub-directory per expected label (music/, silence/,
+noise/, speech/).
+"""
+
+import os
+
+import numpy as np
+import pytest
+from api.audio_analysis import (
+    REJECTION_MESSAGES,
+    analyze_pcm,
+    classify_features,
+    prefilter_sample,
+)
+
+SAMPLE_RATE = 8000
+FIXTURE_DIR = os.environ.get("PREFILTER_FIXTURE_DIR")
+MUSIC = "music"
+SECONDS = 6
+
+
+def _to_pcm(signal):
+    return (np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def _tone(freqs, t, rate, partials=6):
+    """Harmonic tone with decaying partials for each fundamental."""
+    out = np.zeros_like(t)
+    for freq in freqs:
+        for k in range(1, partials + 1):
+            if freq * k < 0.45 * rate:
+                out += np.sin(2 * np.pi * freq * k * t) / k
+    return out / max(1, len(freqs))
+
+
+def _speech_like(t, rate, rng):
+    """Voiced syllables with formant colouring, separated by pauses."""
+    signal = np.zeros_like(t)
+    position = 0.1
+    while position < t[-1]:
+        length = rng.uniform(0.12, 0.25)
+        pitch = rng.uniform(100, 180)
+        mask = (t >= position) & (t < position + length)
+        local = t[mask] - position
+        syllable = np.zeros_like(local)
+        for k in range(1, 25):
+            freq = pitch * k
+            if freq > 0.45 * rate:
+                break
+            # Emphasize harmonics near typical vowel formants
+            gain = sum(
+                np.exp(-(((freq - formant) / 150) ** 2))
+                for formant in rng.choice([500, 700, 1100, 1700, 2500], 2)
+            )
+            syllable += (0.05 + gain) * np.sin(2 * np.pi * freq * local) / k
+        syllable *= np.sin(np.pi * local / length)
+        signal[mask] += syllable
+        # Short gap between syllables, occasionally a longer pause between phrases
+        if rng.random() < 0.3:
+            position += length + rng.uniform(0.3, 0.6)
+        else:
+            position += length + rng.uniform(0.03, 0.08)
+    return 0.3 * signal / (np.max(np.abs(signal)) + 1e-9)
+
+
+def _music(t, rate, rng, drums=True, level=0.3):
+    """Chord progression with a bass line and optional kick and hi-hat."""
+    progression = [
+        [261.6, 329.6, 392.0],
+        [220.0, 261.6, 329.6],
+        [174.6, 220.0, 261.6],
+        [196.0, 246.9, 293.7],
+    ]
+    signal = np.zeros_like(t)
+    chord_length = 1.0
+    repeats = int(np.ceil(t[-1] / (chord_length * 4)))
+    for index, chord in enumerate(progression * repeats):
+        mask = (t >= index * chord_length) & (t < (index + 1) * chord_length)
+        signal[mask] += _tone(chord, t[mask], rate) + 0.5 * _tone(
+            [chord[0] / 2], t[mask], rate, 3
+        )
+    if drums:
+        beat = 0.5
+        for start in np.arange(0, t[-1], beat):
+            mask = (t >= start) & (t < start + 0.15)
+            local = t[mask] - start
+            signal[mask] += 0.8 * np.sin(2 * np.pi * 60 * local) * np.exp(-local * 30)
+            hat = (t >= start + beat / 2) & (t < start + beat / 2 + 0.03)
+            signal[hat] += 0.1 * rng.standard_normal(np.sum(hat))
+    return level * signal / (np.max(np.abs(signal)) + 1e-9)
+
+
+def synthetic_fixtures(sample_rate):
+    """
+    Build the deterministic labeled fixture set.
+
+    Returns:
+        list: (name, label, pcm_bytes) tuples
+    """
+    rng = np.random.default_rng(1234)
+    t = np.arange(int(SECONDS * sample_rate)) / sample_rate
+    speech = _speech_like(t, sample_rate, rng)
+    music = _music(t, sample_rate, rng)
+
+    return [
+        ("digital_silence", "silence", _to_pcm(np.zeros_like(t))),
+        ("dither", "silence", _to_pcm(1e-4 * rng.standard_normal(len(t)))),
+        ("quiet_hiss", "silence", _to_pcm(5e-4 * rng.standard_normal(len(t)))),
+        ("white_noise", "noise", _to_pcm(0.2 * rng.standard_normal(len(t)))),
+        ("speech", "speech", _to_pcm(speech)),
+        (
+            "speech_with_hum",
+            "speech",
+            _to_pcm(speech + 0.005 * np.sin(2 * np.pi * 50 * t)),
+        ),
+        ("music_band", MUSIC, _to_pcm(music)),
+        (
+            "music_no_drums",
+            MUSIC,
+            _to_pcm(_music(t, sample_rate, rng, drums=False)),
+        ),
+        ("music_quiet", MUSIC, _to_pcm(_music(t, sample_rate, rng, level=0.02))),
+        ("music_with_vocals", MUSIC, _to_pcm(music + 0.5 * speech)),
+        (
+            "music_with_noise",
+            MUSIC,
+            _to_pcm(music + 0.02 * rng.standard_normal(len(t))),
+        ),
+        ("music_fade_in", MUSIC, _to_pcm(music * np.minimum(1, t / 2))),
+    ]
+
+
+def directory_fixtures(fixture_dir, sample_rate):
+    """Decode labeled captures from fixture_dir/<label>/."""
+    from api.transcode import decode_to_pcm
+
+    fixtures = []
+    for label in sorted(os.listdir(fixture_dir)):
+        label_dir = os.path.join(fixture_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            with open(os.path.join(label_dir, name), "rb") as fixture_file:
+                pcm = decode_to_pcm(fixture_file.read(), sample_rate, 1)
+            fixtures.append((f"{label}/{name}", label, pcm))
+    return fixtures
+
+
+FIXTURES = synthetic_fixtures(SAMPLE_RATE)
+
+
+@pytest.mark.parametrize(
+    "label, pcm",
+    [(label, pcm) for _, label, pcm in FIXTURES],
+    ids=[name for name, _, _ in FIXTURES],
+)
+def test_synthetic_fixture_classification(label, pcm):
+    features = analyze_pcm(pcm, SAMPLE_RATE, 1)
+    assert (classify_features(features) or MUSIC) == label, features
+
+
+@pytest.mark.parametrize(
+    "label, pcm",
+    [(label, pcm) for _, label, pcm in FIXTURES],
+    ids=[name for name, _, _ in FIXTURES],
+)
+def test_prefilter_accepts_music_and_rejects_the_rest(label, pcm):
+    rejection = prefilter_sample(pcm, SAMPLE_RATE, 1)
+    if label == MUSIC:
+        assert rejection is None
+    else:
+        assert rejection["status"] == "error"
+        assert rejection["error_code"] == label
+        assert rejection["message"] == REJECTION_MESSAGES[label]
+
+
+@pytest.mark.skipif(not FIXTURE_DIR, reason="PREFILTER_FIXTURE_DIR not set")
+def test_directory_fixture_classification():
+    failures = []
+    for name, label, pcm in directory_fixtures(FIXTURE_DIR, SAMPLE_RATE):
+        predicted = classify_features(analyze_pcm(pcm, SAMPLE_RATE, 1)) or MUSIC
+        if predicted != label:
+            failures.append(f"{name}: got {predicted}")
+    assert not failures
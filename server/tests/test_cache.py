@@ -0,0 +1,58 @@
+"""
+Cache keys must treat trivially different spellings of a song as the same,
+without merging songs whose names merely contain "feat" or "ft".
+"""
+
+import threading
+
+import pytest
+from api.cache import TieredCache, normalize_song_key, normalize_text
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Halo (feat. Someone)", "halo"),
+        ("Halo [Ft. Someone] [Live]", "halo live"),
+        ("Halo (featuring Someone", "halo"),
+        ("Halo - feat. Someone", "halo"),
+        ("Halo, ft Someone & Other", "halo"),
+        ("Halo – Featuring Someone", "halo"),
+        ("Ft. Lauderdale", "ft lauderdale"),
+        ("Feat of Strength", "feat of strength"),
+        ("Left Feat", "left feat"),
+        ("Beyoncé", "beyonce"),
+    ],
+)
+def test_normalize_text(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_song_keys_differ_for_names_containing_credit_words():
+    assert normalize_song_key("Ft. Lauderdale", "A") != normalize_song_key("", "A")
+    assert normalize_song_key("Feat of Strength", "A") != normalize_song_key(
+        "Feat", "A"
+    )
+    assert normalize_song_key("Beyoncé - Halo (feat. X)") == normalize_song_key(
+        "beyonce halo"
+    )
+
+
+def test_stats_count_every_lookup_across_threads():
+    cache = TieredCache("test_stats", ttl=3600, db_path=None)
+    cache.set("present", 1)
+
+    def lookups():
+        for _ in range(1000):
+            cache.get("present")
+            cache.get("missing")
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.stats["memory_hits"] == 8000
+    assert cache.stats["misses"] == 8000
+    assert cache.stats["writes"] == 1
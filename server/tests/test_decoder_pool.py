@@ -0,0 +1,35 @@
+"""
+The decoder pool's health check must not disturb decodes that are running:
+a busy pool is left alone instead of being torn down.
+"""
+
+import time
+
+import pytest
+from api.decoder_pool import DecoderPool
+
+
+@pytest.fixture
+def pool():
+    pool = DecoderPool(size=1, health_interval=0)
+    yield pool
+    pool.shutdown()
+
+
+def test_health_check_passes_on_idle_pool(pool):
+    assert pool.health_check(timeout=30)
+    assert pool.stats["healthy"] is True
+
+
+def test_health_check_keeps_job_in_flight(pool):
+    # Warm up the worker so the job below starts right away
+    assert pool.health_check(timeout=30)
+    executor = pool._get_executor()
+    job = pool._submit(executor, time.sleep, 1)
+
+    assert pool.health_check(timeout=0.1)
+
+    assert job.result(timeout=30) is None
+    assert pool._get_executor() is executor
+    assert pool.stats["restarts"] == 0
+    assert pool.stats["retired"] == 0
@@ -0,0 +1,74 @@
+"""
+lyrics_text must clean and validate lyrics exactly like the regex chain it
+replaced (kept as the reference in benchmarks/bench_lyrics_text.py), so edits
+to the compiled patterns can't silently change the output.
+"""
+
+import random
+
+import pytest
+from api.lyrics_text import check_lyrics, clean_lyrics, process_lyrics
+from benchmarks.bench_lyrics_text import (
+    fuzz_text,
+    reference_clean,
+    reference_is_valid,
+    synthetic_lyrics,
+)
+
+VERSE = """[Verse 1: Artist]
+Walking down the road tonight
+City lights are burning bright,
+I can feel it in my heart
+Every ending is a start
+
+[Chorus]
+Oh, we dance in the rain
+And we never feel the pain.
+Oh, we dance in the rain
+Till the morning comes again
+"""
+
+SAMPLES = {
+    "genius_page": (
+        "34 Contributors\nTranslations\nEspañol\nFrançais\n"
+        "Dance in the Rain Lyrics\nAbout this song… Read More \n"
+        + VERSE
+        + "\n[Verse 2]\nShadows falling on the wall\nI can hear the thunder call\n"
+        "Nothing left for us to lose\nThis is the road we choose\n"
+        "42Embed"
+    ),
+    "crlf_and_spacing": VERSE.replace("\n", "\r\n").replace(" road", "   road")
+    + "Share URLCopyEmbed",
+    "broken_words": "Walking down the\nroad tonight and the lights are\nbright\n"
+    + VERSE,
+    "ranking_page": "Best of 2015\n#1: Artist - Song (3:45)\n#2: Other ~ Track (2:10)\n"
+    "#3: Third ~ Tune (4:01)\n#4: Fourth ~ Piece (3:33)\n" + VERSE,
+    "playlist_page": "\n".join(
+        f"Artist {i} ~ Song number {i} (3:{i:02d})," for i in range(12)
+    ),
+    "too_short": "[Intro]\nOh yeah\nEmbed",
+    "long_lines": " ".join([VERSE.replace("\n", " ")] * 4),
+}
+
+
+@pytest.mark.parametrize("text", SAMPLES.values(), ids=SAMPLES.keys())
+def test_sample_texts_match_reference(text):
+    expected = reference_clean(text)
+    assert clean_lyrics(text) == expected
+    cleaned, check = process_lyrics(text)
+    assert cleaned == expected
+    assert check.valid == reference_is_valid(expected)
+    assert check_lyrics(text).valid == reference_is_valid(text)
+
+
+def test_generated_texts_match_reference():
+    rng = random.Random(0)
+    texts = [synthetic_lyrics(rng) for _ in range(100)]
+    texts += [fuzz_text(rng) for _ in range(2000)]
+    for text in texts:
+        expected = reference_clean(text)
+        assert clean_lyrics(text) == expected, text
+        for candidate in (expected, text):
+            assert check_lyrics(candidate).valid == reference_is_valid(candidate), (
+                candidate
+            )
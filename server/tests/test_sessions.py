@@ -0,0 +1,156 @@
+"""
+Identify sessions must keep answering repeat captures of the song that is
+still playing, including captures from later in the track than anything the
+fingerprint index has seen, and must let captures of a different song
+through to ACRCloud.
+"""
+
+import numpy as np
+import pytest
+from api import acrcloud
+from api.fingerprint import FingerprintIndex, fingerprint_pcm, ms_to_frames
+from api.sessions import SessionCache
+
+SAMPLE_RATE = 8000
+SETTINGS = {"sample_rate": SAMPLE_RATE, "channels": 1}
+TRACK_SECONDS = 120
+CLIP_MS = 8000
+CLIENT = "tab-1"
+
+
+def _track(seed):
+    """Melody of random notes with harmonics, 250ms per note."""
+    rng = np.random.default_rng(seed)
+    note_len = SAMPLE_RATE // 4
+    t = np.arange(note_len) / SAMPLE_RATE
+    notes = []
+    for _ in range(TRACK_SECONDS * 4):
+        freq = 110 * 2 ** (rng.integers(0, 36) / 12)
+        note = sum(np.sin(2 * np.pi * freq * k * t) / k for k in range(1, 5))
+        notes.append(note * np.exp(-3 * t))
+    signal = np.concatenate(notes) * 0.4
+    return (np.clip(signal, -1, 1) * 32767).astype("<i2")
+
+
+def _clip(track, start_ms, length_ms=CLIP_MS):
+    start = start_ms * SAMPLE_RATE // 1000
+    return track[start : start + length_ms * SAMPLE_RATE // 1000].tobytes()
+
+
+def _song(title):
+    return {
+        "status": "success",
+        "title": title,
+        "artist": "Artist",
+        "raw": {"acrid": title, "duration_ms": TRACK_SECONDS * 1000},
+    }
+
+
+@pytest.fixture
+def local_caches(monkeypatch):
+    index = FingerprintIndex()
+    sessions = SessionCache()
+    monkeypatch.setattr(acrcloud, "get_fingerprint_index", lambda: index)
+    monkeypatch.setattr(acrcloud, "get_sessions", lambda: sessions)
+    monkeypatch.setattr(acrcloud, "FINGERPRINT_CACHE_ENABLED", True)
+    monkeypatch.setattr(acrcloud, "SESSION_CACHE_ENABLED", True)
+    return index, sessions
+
+
+def _identify_first(track, song, start_ms):
+    """Run a first capture through the ACRCloud path and remember the result."""
+    pcm = _clip(track, start_ms)
+    cached, capture = acrcloud.lookup_local_match(pcm, SETTINGS, CLIENT)
+    assert cached is None
+    song = dict(song, raw=dict(song["raw"], play_offset_ms=start_ms + CLIP_MS))
+    acrcloud.remember_match(song, capture)
+
+
+def _wait(sessions, seconds):
+    """Pretend the song kept playing for some seconds."""
+    sessions._sessions[CLIENT]["anchored_at"] -= seconds
+
+
+def test_later_capture_reuses_session(local_caches):
+    index, sessions = local_caches
+    track = _track(1)
+    _identify_first(track, _song("first"), 10000)
+
+    _wait(sessions, 60)
+    cached, _ = acrcloud.lookup_local_match(_clip(track, 70000), SETTINGS, CLIENT)
+
+    assert cached["title"] == "first"
+    assert cached["cache"] == "session"
+    assert sessions.stats["predicted"] == 1
+
+
+def test_overlapping_capture_is_confirmed_by_alignment(local_caches):
+    index, sessions = local_caches
+    track = _track(1)
+    _identify_first(track, _song("first"), 10000)
+
+    _wait(sessions, 2)
+    cached, _ = acrcloud.lookup_local_match(_clip(track, 12000), SETTINGS, CLIENT)
+
+    assert cached["cache"] == "session"
+    assert sessions.stats["hits"] == 1
+    assert sessions.stats["predicted"] == 0
+    # The confirmed capture re-anchors the session on the aligned position
+    assert sessions.get(CLIENT)["position_ms"] == pytest.approx(20000, abs=100)
+
+
+def test_different_song_at_indexed_position_ends_session(local_caches):
+    index, sessions = local_caches
+    track = _track(1)
+    _identify_first(track, _song("first"), 10000)
+
+    _wait(sessions, 2)
+    other = _clip(_track(2), 12000)
+    cached, _ = acrcloud.lookup_local_match(other, SETTINGS, CLIENT)
+
+    assert cached is None
+    assert sessions.stats["mismatches"] == 1
+    assert sessions.get(CLIENT) is None
+
+
+def test_capture_of_another_indexed_song_switches_session(local_caches):
+    index, sessions = local_caches
+    first, second = _track(1), _track(2)
+    hashes, frames = fingerprint_pcm(_clip(second, 40000), SAMPLE_RATE, 1)
+    index.add("second", hashes, frames + ms_to_frames(40000), _song("second"))
+    _identify_first(first, _song("first"), 10000)
+
+    _wait(sessions, 30)
+    cached, _ = acrcloud.lookup_local_match(_clip(second, 40000), SETTINGS, CLIENT)
+
+    assert cached["title"] == "second"
+    assert cached["cache"] == "fingerprint"
+    assert sessions.get(CLIENT)["track_key"] == "second"
+
+
+def test_session_reused_without_fingerprints(local_caches, monkeypatch):
+    index, sessions = local_caches
+    monkeypatch.setattr(acrcloud, "FINGERPRINT_CACHE_ENABLED", False)
+    track = _track(1)
+    _identify_first(track, _song("first"), 10000)
+
+    _wait(sessions, 60)
+    cached, _ = acrcloud.lookup_local_match(_clip(track, 70000), SETTINGS, CLIENT)
+
+    assert cached["cache"] == "session"
+    assert len(index) == 0
+
+
+def test_late_artwork_updates_cached_copies(local_caches):
+    index, sessions = local_caches
+    track = _track(1)
+    song = _song("first")
+    _identify_first(track, song, 10000)
+    stored = index._tracks["first"]["result"]
+
+    acrcloud.remember_artwork(song, "https://example.com/art.jpg", CLIENT)
+
+    assert "albumArtwork" not in song
+    assert "albumArtwork" not in stored
+    assert index._tracks["first"]["result"]["albumArtwork"].endswith("art.jpg")
+    assert sessions.get(CLIENT)["song_info"]["albumArtwork"].endswith("art.jpg")
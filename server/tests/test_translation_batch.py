@@ -0,0 +1,69 @@
+"""
+Batch translation must only fill in the lines each language is missing, so
+remembered translations are never overwritten, and must split long lyrics
+into the same token-budgeted batches as single translations.
+"""
+
+import pytest
+from api import gemini
+from api.cache import TieredCache
+from api.translation_memory import TranslationMemory
+
+LYRICS = "Walking down the road\nCity lights are bright\n\nWalking down the road"
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    memory = TranslationMemory(
+        cache=TieredCache("test_translation_memory", ttl=3600, db_path=None)
+    )
+    monkeypatch.setattr(gemini, "translation_memory", memory)
+    monkeypatch.setattr(gemini, "TRANSLATION_MEMORY_ENABLED", True)
+    monkeypatch.setattr(gemini, "GEMINI_CACHE_ENABLED", False)
+    monkeypatch.setattr(gemini, "is_configured", lambda: True)
+    return memory
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Replace Gemini with a fake that tags each line with its language."""
+    calls = []
+
+    def fake_translate(lines, source_lang, target_langs):
+        calls.append(list(lines))
+        return {lang: [f"{lang}: {line}" for line in lines] for lang in target_langs}
+
+    monkeypatch.setattr(gemini, "_translate_lines_multi", fake_translate)
+    return calls
+
+
+def test_batch_keeps_remembered_lines(memory, calls):
+    memory.store({"Walking down the road": "remembered"}, "French")
+
+    result = gemini.translate_lyrics_batch(LYRICS, ["French", "German"])
+
+    french = result["translations"]["French"]
+    assert french["translated_lyrics"] == (
+        "remembered\nFrench: City lights are bright\n\nremembered"
+    )
+    assert french["lines_translated"] == 1
+    assert memory.lookup("Walking down the road", "French")[0] == {
+        "Walking down the road": "remembered"
+    }
+    german = result["translations"]["German"]["translated_lyrics"]
+    assert german.startswith("German: Walking down the road")
+
+
+def test_batch_splits_long_lyrics(memory, calls, monkeypatch):
+    monkeypatch.setattr(gemini, "TRANSLATION_CHUNK_TOKENS", 5)
+    lyrics = "\n".join(f"Line number {i} of the song" for i in range(6))
+
+    result = gemini.translate_lyrics_batch(lyrics, ["French", "German"])
+
+    assert len(calls) > 1
+    assert sorted(line for batch in calls for line in batch) == sorted(
+        lyrics.split("\n")
+    )
+    assert result["translations"]["German"]["translated_lyrics"] == "\n".join(
+        f"German: {line}" for line in lyrics.split("\n")
+    )